@@ -0,0 +1,352 @@
+"""
+Point-in-time backtesting of player projections over historical weeks
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from .data_processor import DataProcessor
+from .models import PlayerProjectionModel
+from .model_registry import METADATA_FILE, training_cutoff
+
+logger = logging.getLogger(__name__)
+
+PROJECTED_POSITIONS = ("QB", "RB", "WR", "TE")
+HEURISTIC = "heuristic"
+
+
+def week_start(season: int, week: int) -> datetime:
+    """Approximate kickoff date of a regular season week"""
+    return datetime(int(season), 9, 5) + timedelta(weeks=int(week) - 1)
+
+
+def projection_metrics(projected: np.ndarray, actual: np.ndarray, lower: np.ndarray,
+                       upper: np.ndarray, n_bins: int = 10) -> Dict[str, Any]:
+    """
+    Error and calibration of projections against actual points.
+
+    Calibration splits players into equal-sized bins by projected points and
+    compares the mean projection with the mean outcome in each bin.
+    """
+    if len(projected) == 0:
+        return {"count": 0}
+
+    errors = projected - actual
+    order = np.argsort(projected, kind="stable")
+    calibration = [
+        {
+            "projected_mean": round(float(projected[index].mean()), 2),
+            "actual_mean": round(float(actual[index].mean()), 2),
+            "count": int(len(index))
+        }
+        for index in np.array_split(order, min(n_bins, len(order)))
+    ]
+    return {
+        "count": int(len(errors)),
+        "mae": round(float(np.abs(errors).mean()), 4),
+        "rmse": round(float(np.sqrt((errors ** 2).mean())), 4),
+        "bias": round(float(errors.mean()), 4),
+        "interval_coverage": round(float(((actual >= lower) & (actual <= upper)).mean()), 4),
+        "calibration": calibration
+    }
+
+
+def artifact_cutoff(path: str) -> Optional[Tuple[int, int]]:
+    """Training cutoff of a registry version, read from the metadata beside its artifact"""
+    try:
+        with open(os.path.join(path, METADATA_FILE)) as f:
+            return training_cutoff(json.load(f))
+    except (OSError, ValueError):
+        return None
+
+
+# Replay inputs shared with pool workers once, instead of pickling them per week
+_worker_history = None
+_worker_players = None
+_worker_players_season = None
+_worker_predictors = None
+_worker_models = {}
+
+
+def _init_worker(history: Dict[str, Dict], players: Dict[str, Dict], players_season: int,
+                 predictors: Dict[str, Optional[str]]) -> None:
+    global _worker_history, _worker_players, _worker_players_season, _worker_predictors, _worker_models
+    _worker_history, _worker_players = history, players
+    _worker_players_season, _worker_predictors = players_season, predictors
+    _worker_models = {}
+
+
+def _predictor(name: str) -> PlayerProjectionModel:
+    """Projection model for a predictor, loaded once per worker"""
+    if name not in _worker_models:
+        # An untrained model falls back to the heuristic projection
+        model = PlayerProjectionModel(artifact_path=_worker_predictors[name], mmap_mode="r")
+        model.ensure_loaded()
+        _worker_models[name] = model
+    return _worker_models[name]
+
+
+def _replay_week(task: Tuple[str, int, int, int, List[str]]) -> Dict[str, Any]:
+    """Project one week from the weeks before it and score against what happened (runs in a pool worker)"""
+    season, week, lookback, min_games, names = task
+    start = time.perf_counter()
+    processor = DataProcessor()
+    as_of = week_start(season, week)
+    season_stats = _worker_history[season]
+    target = season_stats.get(str(week), {})
+    past_weeks = [(w, season_stats.get(str(w), {})) for w in range(max(1, week - lookback), week)]
+    seasons_since = max(0, _worker_players_season - int(season))
+
+    processed, actual, positions = [], [], []
+    for player_id, week_stats in target.items():
+        player = _worker_players.get(player_id, {})
+        position = player.get("position")
+        if position not in PROJECTED_POSITIONS:
+            continue
+
+        performance = [
+            {**stats[player_id], "week": w, "season": season}
+            for w, stats in past_weeks if stats.get(player_id)
+        ]
+        if len(performance) < min_games:
+            continue
+
+        # Player snapshot is current; keep only fields that can be rolled back in time
+        point_in_time = {
+            "player_id": player_id,
+            "position": position,
+            "birth_date": player.get("birth_date"),
+            "years_exp": max(0, (player.get("years_exp") or 0) - seasons_since)
+        }
+        processed.append(processor.prepare_projection_data(point_in_time, performance, as_of=as_of))
+        actual.append(sum(week_stats.get(stat, 0) * weight
+                          for stat, weight in processor.position_scoring[position].items()))
+        positions.append(position)
+
+    feature_time = time.perf_counter() - start
+    actual = np.array(actual, dtype=float)
+
+    predictions = {}
+    for name in names:
+        predict_start = time.perf_counter()
+        batch = _predictor(name).predict_batch(processed, weeks_ahead=1) if processed else None
+        predict_time = time.perf_counter() - predict_start
+        predictions[name] = {
+            "projected": batch["points"] if batch else np.empty(0),
+            "lower": batch["confidence_interval"][:, 0] if batch else np.empty(0),
+            "upper": batch["confidence_interval"][:, 1] if batch else np.empty(0),
+            "predict_time": predict_time
+        }
+
+    return {
+        "season": season,
+        "week": week,
+        "actual": actual,
+        "positions": np.array(positions, dtype=object),
+        "predictions": predictions,
+        "feature_time": feature_time,
+        "wall_time": time.perf_counter() - start
+    }
+
+
+class Backtester:
+    """
+    Replays past seasons week by week using only data available before each week.
+
+    For every (season, week) each player's last ``lookback`` weeks of stats are
+    turned into projection inputs as of that week, projected one week ahead by
+    every predictor, and compared with the points actually scored. Weeks are
+    replayed in parallel in a process pool.
+
+    ``predictors`` maps a name to a model artifact path; ``None`` evaluates the
+    heuristic projection used when no model is trained. A model only scores
+    weeks after its training cutoff (from the registry metadata beside the
+    artifact), so it never projects weeks it was trained on. Models without a
+    recorded cutoff score every week and are reported as not point-in-time.
+    """
+
+    def __init__(self, history: Dict[str, Any], predictors: Optional[Dict[str, Optional[str]]] = None,
+                 lookback: int = 8, min_games: int = 1, n_jobs: Optional[int] = None):
+        self.stats = history["stats"]
+        self.players = history.get("players", {})
+        self.players_season = int(history.get("players_season") or max(int(s) for s in self.stats))
+        self.predictors = predictors or {HEURISTIC: None}
+        self.cutoffs = {name: artifact_cutoff(path) for name, path in self.predictors.items() if path is not None}
+        for name, cutoff in self.cutoffs.items():
+            if cutoff is None:
+                logger.warning(f"Model {name} has no recorded training cutoff; its scores may include "
+                               f"weeks it was trained on")
+        self.lookback = lookback
+        self.min_games = min_games
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+
+    def weeks(self, seasons: Optional[List[str]] = None) -> List[Tuple[str, int]]:
+        """Replayable (season, week) pairs: every week with stats and at least one week before it"""
+        return [
+            (season, int(week))
+            for season in sorted(self.stats)
+            if seasons is None or season in seasons
+            for week in sorted(self.stats[season], key=int)
+            if int(week) > 1
+        ]
+
+    def _scored_predictors(self, season: str, week: int) -> List[str]:
+        """Predictors that may score a week: the heuristic, and models trained only on earlier weeks"""
+        return [
+            name for name in self.predictors
+            if self.cutoffs.get(name) is None or (int(season), int(week)) > self.cutoffs[name]
+        ]
+
+    def run(self, seasons: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Replay every week and report per-week and overall accuracy for each predictor"""
+        start = time.perf_counter()
+        tasks = [(season, week, self.lookback, self.min_games, self._scored_predictors(season, week))
+                 for season, week in self.weeks(seasons)]
+        if not tasks:
+            return {"error": "No replayable weeks"}
+
+        initargs = (self.stats, self.players, self.players_season, self.predictors)
+        if self.n_jobs == 1:
+            _init_worker(*initargs)
+            results = [_replay_week(task) for task in tasks]
+        else:
+            # Spawned, not forked: the server runs backtests from a thread of a process
+            # holding an event loop, sockets and locks
+            with ProcessPoolExecutor(max_workers=min(self.n_jobs, len(tasks)),
+                                     mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker, initargs=initargs) as executor:
+                results = list(executor.map(_replay_week, tasks))
+
+        report = {"predictors": {}, "weeks": [], "lookback": self.lookback, "n_jobs": self.n_jobs}
+        for name in self.predictors:
+            scored = [result for result in results if name in result["predictions"]]
+            actual = np.concatenate([result["actual"] for result in scored] or [np.empty(0)])
+            positions = np.concatenate([result["positions"] for result in scored] or [np.empty(0, dtype=object)])
+            columns = {
+                key: np.concatenate([result["predictions"][name][key] for result in scored] or [np.empty(0)])
+                for key in ("projected", "lower", "upper")
+            }
+            cutoff = self.cutoffs.get(name)
+            report["predictors"][name] = {
+                "weeks_scored": len(scored),
+                "training_cutoff": {"season": cutoff[0], "week": cutoff[1]} if cutoff else None,
+                "point_in_time": name not in self.cutoffs or cutoff is not None,
+                "overall": projection_metrics(columns["projected"], actual, columns["lower"], columns["upper"]),
+                "by_position": {
+                    position: {
+                        key: value
+                        for key, value in projection_metrics(
+                            *(column[positions == position] for column in
+                              (columns["projected"], actual, columns["lower"], columns["upper"]))
+                        ).items()
+                        if key != "calibration"
+                    }
+                    for position in PROJECTED_POSITIONS
+                    if (positions == position).any()
+                },
+                "predict_time_total": round(sum(r["predictions"][name]["predict_time"] for r in scored), 4)
+            }
+
+        for result in results:
+            week_report = {
+                "season": result["season"],
+                "week": result["week"],
+                "players": int(len(result["actual"])),
+                "feature_time": round(result["feature_time"], 4),
+                "wall_time": round(result["wall_time"], 4)
+            }
+            for name, prediction in result["predictions"].items():
+                metrics = projection_metrics(prediction["projected"], result["actual"],
+                                             prediction["lower"], prediction["upper"])
+                week_report[name] = {
+                    "mae": metrics.get("mae"),
+                    "bias": metrics.get("bias"),
+                    "interval_coverage": metrics.get("interval_coverage"),
+                    "predict_time": round(prediction["predict_time"], 4)
+                }
+            report["weeks"].append(week_report)
+
+        report["total_time"] = round(time.perf_counter() - start, 4)
+        return report
+
+
+async def fetch_history(seasons: List[str], weeks: range = range(1, 19), client=None) -> Dict[str, Any]:
+    """Download weekly stats and the player snapshot from Sleeper for backtesting (with ``client`` if given)"""
+    from .sleeper_client import SleeperAPIClient
+
+    if client is None:
+        async with SleeperAPIClient() as client:
+            return await fetch_history(seasons, weeks, client)
+
+    players = await client.get_all_players()
+    stats = {}
+    for season in seasons:
+        week_stats = await asyncio.gather(*(client.get_week_stats(season, week) for week in weeks))
+        stats[season] = {str(week): data for week, data in zip(weeks, week_stats) if data}
+
+    return {
+        "players_season": datetime.now().year,
+        "players": players,
+        "stats": stats
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest player projections on historical weeks")
+    parser.add_argument("history", help="JSON file with players, players_season and stats[season][week][player_id]")
+    parser.add_argument("--fetch", nargs="+", metavar="SEASON", help="Download these seasons into the history file first")
+    parser.add_argument("--model", action="append", default=[], metavar="NAME=PATH",
+                        help="Model artifact to evaluate alongside the heuristic (repeatable)")
+    parser.add_argument("--seasons", nargs="+", help="Only replay these seasons")
+    parser.add_argument("--lookback", type=int, default=8, help="Weeks of history per projection")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--output", help="Write the full report to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.fetch:
+        history = asyncio.run(fetch_history(args.fetch))
+        with open(args.history, "w") as f:
+            json.dump(history, f)
+    else:
+        with open(args.history) as f:
+            history = json.load(f)
+
+    predictors = {HEURISTIC: None}
+    for spec in args.model:
+        name, _, path = spec.partition("=")
+        predictors[name] = path
+
+    report = Backtester(history, predictors, lookback=args.lookback, n_jobs=args.jobs).run(args.seasons)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if "error" in report:
+        print(report["error"])
+        raise SystemExit(1)
+    for name, result in report["predictors"].items():
+        overall = result["overall"]
+        if not overall["count"]:
+            print(f"{name}: no weeks after its training cutoff")
+            continue
+        print(f"{name}: MAE {overall['mae']} RMSE {overall['rmse']} bias {overall['bias']} "
+              f"coverage {overall['interval_coverage']} over {overall['count']} player-weeks"
+              + ("" if result["point_in_time"] else " (no training cutoff recorded: not point-in-time)"))
+    wall_times = [week["wall_time"] for week in report["weeks"]]
+    print(f"{len(wall_times)} weeks, {np.mean(wall_times):.3f}s mean wall-clock per week, "
+          f"{report['total_time']:.2f}s total")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Runtime configuration for the analytics API, read from the environment
+"""
+
+import os
+from typing import Optional
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean environment variable"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_optional(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read an environment variable, treating empty strings and "none" as unset"""
+    value = os.getenv(name, default)
+    if value is None or value.strip().lower() in ("", "none"):
+        return None
+    return value
+
+
+class Settings:
+    """Analytics API settings"""
+
+    def __init__(self):
+        # Model artifacts
+        self.projection_model_path = _env_optional("ANALYTICS_PROJECTION_MODEL_PATH")
+        self.model_mmap_mode = _env_optional("ANALYTICS_MODEL_MMAP_MODE", "r")
+        self.eager_model_load = _env_flag("ANALYTICS_EAGER_MODEL_LOAD")
+
+        # Model registry and hot-swapping
+        self.model_registry_path = _env_optional("ANALYTICS_MODEL_REGISTRY_PATH")
+        self.model_registry_poll_seconds = float(os.getenv("ANALYTICS_MODEL_REGISTRY_POLL_SECONDS", "30"))
+        self.model_shadow = _env_flag("ANALYTICS_MODEL_SHADOW")
+
+        # Nightly dynasty value table (a registry of table versions)
+        self.dynasty_table_path = _env_optional("ANALYTICS_DYNASTY_TABLE_PATH")
+
+        # Directory of training data files that training jobs may name
+        self.training_data_dir = _env_optional("ANALYTICS_TRAINING_DATA_DIR")
+
+        # Monte Carlo season simulation
+        self.odds_simulations = int(os.getenv("ANALYTICS_ODDS_SIMULATIONS", "50000"))
+        self.odds_workers = int(os.getenv("ANALYTICS_ODDS_WORKERS", "1"))
+        self.odds_tracked_leagues = int(os.getenv("ANALYTICS_ODDS_TRACKED_LEAGUES", "32"))
+
+        # Executors for CPU-bound work (process pool for heavy jobs, threads for short NumPy work)
+        self.process_workers = int(os.getenv("ANALYTICS_PROCESS_WORKERS", "0")) or None
+        self.thread_workers = int(os.getenv("ANALYTICS_THREAD_WORKERS", "4"))
+        self.process_queue_size = int(os.getenv("ANALYTICS_PROCESS_QUEUE_SIZE", "16"))
+        self.thread_queue_size = int(os.getenv("ANALYTICS_THREAD_QUEUE_SIZE", "64"))
+        self.loop_lag_interval_seconds = float(os.getenv("ANALYTICS_LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+
+        # Startup prewarm (players, NFL state, recent week stats, models, workers) gating /ready
+        self.prewarm = _env_flag("ANALYTICS_PREWARM", True)
+        self.prewarm_budget_seconds = float(os.getenv("ANALYTICS_PREWARM_BUDGET_SECONDS", "60"))
+
+        # Background jobs (POST /jobs): running at once, waiting, and how long finished results are kept
+        self.job_concurrency = int(os.getenv("ANALYTICS_JOB_CONCURRENCY", "4"))
+        self.job_queue_size = int(os.getenv("ANALYTICS_JOB_QUEUE_SIZE", "100"))
+        self.job_result_ttl_seconds = float(os.getenv("ANALYTICS_JOB_RESULT_TTL_SECONDS", "3600"))
+        # Database holding jobs for every replica (SQLAlchemy URL); unset keeps them in process memory,
+        # which only works with a single replica. A running job not renewed within the lease has failed.
+        self.job_store_url = _env_optional("ANALYTICS_JOB_STORE_URL")
+        self.job_lease_seconds = float(os.getenv("ANALYTICS_JOB_LEASE_SECONDS", "30"))
+
+        # Concurrent upstream fetches and helpers per request
+        self.request_concurrency = int(os.getenv("ANALYTICS_REQUEST_CONCURRENCY", "8"))
+
+        # Response cache for projection, dynasty value and trade analysis endpoints
+        self.response_cache_bytes = int(os.getenv("ANALYTICS_RESPONSE_CACHE_BYTES", str(64 * 1024 * 1024)))
+        self.response_cache_ttl_seconds = float(os.getenv("ANALYTICS_RESPONSE_CACHE_TTL_SECONDS", "900"))
+
+
+settings = Settings()
@@ -1,7 +1,10 @@
 import pandas as pd
 import numpy as np
+from scipy.stats import rankdata
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
+from collections import OrderedDict
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,16 +23,29 @@ class DataProcessor:
             "K": {"field_goals": 3, "extra_points": 1},
             "DEF": {"defensive_tds": 6, "interceptions": 2, "fumble_recoveries": 2, "sacks": 1}
         }
+        
+        # Starting slots per position used to measure positional strength
+        self.starter_slots = {"QB": 1, "RB": 2, "WR": 3, "TE": 1}
+        
+        # League snapshot -> positional analysis for every roster
+        self._league_position_cache = OrderedDict()
+        self._league_position_cache_size = 64
     
     def prepare_projection_data(self, player_data: Dict, performance_data: List[Dict], 
-                              league_settings: Optional[Dict] = None) -> Dict:
-        """Prepare data for player projection model"""
+                              league_settings: Optional[Dict] = None,
+                              as_of: Optional[datetime] = None) -> Dict:
+        """
+        Prepare data for player projection model
+        
+        ``as_of`` evaluates time-dependent fields (age) at a past date, for
+        point-in-time replays.
+        """
         try:
             # Extract basic player info
             processed = {
                 "player_id": player_data.get("player_id"),
                 "position": player_data.get("position"),
-                "age": self._calculate_age(player_data.get("birth_date")),
+                "age": self._calculate_age(player_data.get("birth_date"), as_of),
                 "years_exp": player_data.get("years_exp", 0),
                 "team": player_data.get("team"),
                 "injury_status": player_data.get("injury_status", "Healthy")
@@ -82,21 +98,128 @@ class DataProcessor:
             logger.error(f"Error preparing projection data: {str(e)}")
             return {}
     
-    def prepare_waiver_data(self, team_data: Dict, available_players: List[Dict], 
-                           league_data: Dict, position_needs: Optional[List[str]] = None) -> Dict:
+    def prepare_projection_data_batch(self, players: List[Dict], performances: List[List[Dict]],
+                                      league_settings: Optional[Dict] = None,
+                                      as_of: Optional[datetime] = None) -> List[Dict]:
+        """
+        ``prepare_projection_data`` for many players with one DataFrame.
+
+        Every player's weekly rows are stacked and aggregated with a single
+        groupby; a player only gets the stat columns present in their own rows.
+        """
+        try:
+            lengths = np.array([len(performance or []) for performance in performances], dtype=np.intp)
+            rows = [row for performance in performances for row in (performance or [])]
+            owner = np.repeat(np.arange(len(players)), lengths)
+            df = pd.DataFrame(rows, index=owner)
+            numeric = df.select_dtypes(include=[np.number])
+
+            # Per-player aggregates as (player, column) arrays
+            grouped = numeric.groupby(level=0)
+            index = np.arange(len(players))
+            present = (grouped.count() > 0).reindex(index, fill_value=False).to_numpy(dtype=bool)
+            means = grouped.mean().reindex(index).to_numpy(dtype=float)
+            stds = grouped.std().reindex(index).to_numpy(dtype=float)
+            recent = numeric.groupby(level=0).tail(4).groupby(level=0).mean().reindex(index).to_numpy(dtype=float)
+            column_names = np.array(numeric.columns, dtype=object)
+
+            # Per-game fantasy points; a stat the player never recorded counts as 0
+            points = {}
+            for position, scoring in self.position_scoring.items():
+                total = np.zeros(len(numeric))
+                for stat, weight in scoring.items():
+                    if stat in numeric:
+                        values = numeric[stat].to_numpy(dtype=float)
+                        total += np.where(present[owner, numeric.columns.get_loc(stat)], values, 0.0) * weight
+                points[position] = total
+            offsets = np.concatenate([[0], np.cumsum(lengths)])
+        except Exception as e:
+            logger.error(f"Error preparing projection data batch: {str(e)}")
+            return [
+                self.prepare_projection_data(player, performance, league_settings, as_of)
+                for player, performance in zip(players, performances)
+            ]
+
+        results = []
+        for i, player_data in enumerate(players):
+            try:
+                position = player_data.get("position")
+                processed = {
+                    "player_id": player_data.get("player_id"),
+                    "position": position,
+                    "age": self._calculate_age(player_data.get("birth_date"), as_of),
+                    "years_exp": player_data.get("years_exp", 0),
+                    "team": player_data.get("team"),
+                    "injury_status": player_data.get("injury_status", "Healthy")
+                }
+
+                if lengths[i]:
+                    mask = present[i]
+                    columns = column_names[mask].tolist()
+                    season_avg = means[i, mask]
+                    processed["season_averages"] = dict(zip(columns, season_avg.tolist()))
+                    with np.errstate(divide="ignore", invalid="ignore"):
+                        trending = (recent[i, mask] - season_avg) / season_avg
+                        variation = stds[i, mask] / season_avg
+                    if lengths[i] >= 4:
+                        processed["trending"] = dict(zip(columns, np.nan_to_num(trending, nan=0.0,
+                                                                                posinf=np.inf, neginf=-np.inf).tolist()))
+                    else:
+                        processed["trending"] = {col: 0 for col in columns}
+
+                    fantasy_points = (points[position][offsets[i]:offsets[i + 1]].tolist()
+                                      if position in points else [])
+                    processed["fantasy_points"] = fantasy_points
+                    processed["consistency"] = {
+                        "coefficient_of_variation": pd.Series(variation, index=columns),
+                        "boom_bust_ratio": self._boom_bust_ratio(fantasy_points)
+                    }
+                else:
+                    processed.update({
+                        "season_averages": {},
+                        "trending": {},
+                        "fantasy_points": [],
+                        "consistency": {"coefficient_of_variation": {}, "boom_bust_ratio": 0}
+                    })
+
+                if league_settings:
+                    processed["scoring_settings"] = league_settings
+                    processed["adjusted_scoring"] = self._adjust_for_scoring(
+                        processed["fantasy_points"],
+                        league_settings
+                    )
+                results.append(processed)
+            except Exception as e:
+                logger.error(f"Error preparing projection data: {str(e)}")
+                results.append({})
+
+        return results
+
+    def prepare_waiver_data(self, team_data: Dict, available_players: List[Dict],
+                           league_data: Dict, position_needs: Optional[List[str]] = None,
+                           league_positions: Optional[Dict[str, Dict]] = None,
+                           trending_players: Optional[List[Dict]] = None) -> Dict:
         """Prepare data for waiver wire recommendations"""
         try:
+            # Recent add counts from the Sleeper trending feed
+            trending_counts = {
+                item["player_id"]: item.get("count", 0)
+                for item in (trending_players or []) if isinstance(item, dict) and "player_id" in item
+            }
+
+            # Team strengths/weaknesses come from the league-wide analysis
+            position_analysis = self.team_positions(team_data, league_positions)
+
             processed = {
                 "team_id": team_data.get("team_id"),
                 "current_roster": team_data.get("players", []),
                 "league_settings": league_data.get("scoring_settings", {}),
-                "league_size": len(league_data.get("rosters", [])),
-                "position_needs": position_needs or []
+                "league_size": len(league_positions) if league_positions else len(league_data.get("rosters", [])),
+                "position_needs": position_needs or self.position_needs(position_analysis),
+                "position_analysis": position_analysis,
+                "trending_max_count": max(trending_counts.values(), default=0)
             }
-            
-            # Analyze team strengths/weaknesses
-            processed["position_analysis"] = self._analyze_team_positions(team_data)
-            
+
             # Process available players
             processed["available_players"] = []
             for player_info in available_players:
@@ -112,7 +235,8 @@ class DataProcessor:
                     "age": self._calculate_age(player_data.get("birth_date")),
                     "team": player_data.get("team"),
                     "injury_status": player_data.get("injury_status", "Healthy"),
-                    "ownership_percentage": player_data.get("ownership_percentage", 0)
+                    "ownership_percentage": player_data.get("ownership_percentage", 0),
+                    "trending_count": trending_counts.get(player_info["player_id"], 0)
                 }
                 
                 processed["available_players"].append(processed_player)
@@ -164,14 +288,19 @@ class DataProcessor:
             logger.error(f"Error preparing dynasty data: {str(e)}")
             return {}
     
-    def _calculate_age(self, birth_date: str) -> int:
-        """Calculate player age from birth date"""
+    def _calculate_age(self, birth_date: str, as_of: Optional[datetime] = None) -> int:
+        """
+        Calculate player age from birth date, today or as of a given date
+        
+        Without ``as_of`` this is the original calculation against the current
+        date; only point-in-time replays pass a past date.
+        """
         if not birth_date:
             return 25  # Default age
         
         try:
             birth = datetime.strptime(birth_date, "%Y-%m-%d")
-            today = datetime.now()
+            today = datetime.now() if as_of is None else as_of
             age = today.year - birth.year - ((today.month, today.day) < (birth.month, birth.day))
             return age
         except:
@@ -195,7 +324,10 @@ class DataProcessor:
     
     def _calculate_boom_bust_ratio(self, stats_df: pd.DataFrame, position: str) -> float:
         """Calculate boom/bust ratio"""
-        fantasy_points = self._calculate_fantasy_points(stats_df, position)
+        return self._boom_bust_ratio(self._calculate_fantasy_points(stats_df, position))
+
+    def _boom_bust_ratio(self, fantasy_points: List[float]) -> float:
+        """Games at 150%+ of average per game at 50% or less"""
         if not fantasy_points:
             return 0
         
@@ -214,16 +346,121 @@ class DataProcessor:
         # For now, return original points
         return fantasy_points
     
-    def _analyze_team_positions(self, team_data: Dict) -> Dict:
-        """Analyze team's positional strengths and weaknesses"""
-        # Mock implementation - would analyze actual roster
+    def analyze_league_positions(self, league_id: str, rosters: List[Dict], players: Dict[str, Dict],
+                                 player_values: Optional[Dict[str, float]] = None,
+                                 data_version: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Analyze positional depth and strength for every roster in a league at once.
+
+        Results are cached per league snapshot (rostered players plus data version),
+        so every endpoint needing a team's positional picture reads the same analysis.
+        """
+        snapshot = self._league_snapshot_key(league_id, rosters, data_version)
+        cached = self._league_position_cache.get(snapshot)
+        if cached is not None:
+            self._league_position_cache.move_to_end(snapshot)
+            return cached
+
+        try:
+            analysis = self._compute_league_positions(rosters, players, player_values)
+        except Exception as e:
+            logger.error(f"Error analyzing league positions for {league_id}: {str(e)}")
+            return {}
+
+        self._league_position_cache[snapshot] = analysis
+        if len(self._league_position_cache) > self._league_position_cache_size:
+            self._league_position_cache.popitem(last=False)
+
+        return analysis
+
+    def position_needs(self, position_analysis: Dict[str, Dict]) -> List[str]:
+        """Positions a team is weak at, weakest relative to the league first"""
+        weak = [
+            (info["league_rank"], position)
+            for position, info in position_analysis.items()
+            if info.get("strength") == "weak"
+        ]
+        return [position for _, position in sorted(weak, reverse=True)]
+
+    def _league_snapshot_key(self, league_id: str, rosters: List[Dict],
+                             data_version: Optional[str]) -> str:
+        """Build a cache key identifying the current state of a league's rosters"""
+        digest = hashlib.sha1()
+        for roster in sorted(rosters, key=lambda r: str(r.get("roster_id"))):
+            digest.update(str(roster.get("roster_id")).encode())
+            digest.update(",".join(sorted(roster.get("players") or [])).encode())
+            digest.update(b";")
+        return f"{league_id}:{data_version or ''}:{digest.hexdigest()}"
+
+    def _compute_league_positions(self, rosters: List[Dict], players: Dict[str, Dict],
+                                  player_values: Optional[Dict[str, float]] = None) -> Dict[str, Dict]:
+        """Compute depth and strength for all rosters from a roster x player incidence matrix"""
+        positions = list(self.starter_slots)
+        roster_ids = [str(roster.get("roster_id")) for roster in rosters]
+        player_ids = sorted({pid for roster in rosters for pid in (roster.get("players") or [])})
+        if not roster_ids or not player_ids:
+            return {}
+
+        index = {pid: i for i, pid in enumerate(player_ids)}
+        rows = [r for r, roster in enumerate(rosters) for _ in (roster.get("players") or [])]
+        cols = [index[pid] for roster in rosters for pid in (roster.get("players") or [])]
+        incidence = np.zeros((len(roster_ids), len(player_ids)))
+        incidence[rows, cols] = 1.0
+
+        player_positions = np.array([players.get(pid, {}).get("position") for pid in player_ids], dtype=object)
+        position_matrix = np.stack([player_positions == position for position in positions], axis=1).astype(float)
+        values = self.player_values(player_ids, players, player_values)
+
+        # Depth: rostered players per position for every roster in one product
+        depth = incidence @ position_matrix
+
+        # Strength: value of the best starters at each position
+        weighted = incidence * values
+        strength = np.zeros((len(roster_ids), len(positions)))
+        for j, position in enumerate(positions):
+            position_values = weighted[:, position_matrix[:, j] > 0]
+            if position_values.shape[1] == 0:
+                continue
+            starters = min(self.starter_slots[position], position_values.shape[1])
+            strength[:, j] = -np.partition(-position_values, starters - 1, axis=1)[:, :starters].sum(axis=1)
+
+        # Compare each roster against the rest of the league
+        mean = strength.mean(axis=0)
+        std = strength.std(axis=0)
+        z_scores = np.divide(strength - mean, std, out=np.zeros_like(strength), where=std > 0)
+        # Tied rosters share the better rank (1, 1, 3, ...)
+        ranks = rankdata(-strength, method="min", axis=0)
+        labels = np.where(z_scores >= 0.5, "strong", np.where(z_scores <= -0.5, "weak", "average"))
+
         return {
-            "QB": {"strength": "average", "depth": 2},
-            "RB": {"strength": "weak", "depth": 1},
-            "WR": {"strength": "strong", "depth": 4},
-            "TE": {"strength": "weak", "depth": 1}
+            roster_id: {
+                position: {
+                    "strength": str(labels[r, j]),
+                    "depth": int(depth[r, j]),
+                    "score": round(float(strength[r, j]), 1),
+                    "league_rank": int(ranks[r, j])
+                }
+                for j, position in enumerate(positions)
+            }
+            for r, roster_id in enumerate(roster_ids)
         }
-    
+
+    def player_values(self, player_ids: List[str], players: Dict[str, Dict],
+                      player_values: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Per-player value vector, defaulting to a decay over Sleeper's search rank"""
+        if player_values is not None:
+            return np.array([player_values.get(pid, 0.0) for pid in player_ids], dtype=float)
+
+        ranks = np.array([players.get(pid, {}).get("search_rank") or 9999999 for pid in player_ids], dtype=float)
+        return 100.0 * np.exp(-ranks / 150.0)
+
+    def team_positions(self, team_data: Dict,
+                       league_positions: Optional[Dict[str, Dict]] = None) -> Dict:
+        """Look up a team's positional strengths and weaknesses in the league analysis"""
+        if not league_positions:
+            return {}
+        return league_positions.get(str(team_data.get("roster_id")), {})
+
     def _analyze_age_curve(self, historical_df: pd.DataFrame, position: str, current_age: int) -> Dict:
         """Analyze where player is on typical age curve"""
         # Position-specific age curves
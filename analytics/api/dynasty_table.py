@@ -0,0 +1,262 @@
+"""
+Precomputed dynasty value table for the whole player universe
+"""
+
+import json
+import time
+import asyncio
+import logging
+import argparse
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from src import artifacts
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AGE = 25
+
+# Position parameters of the dynasty value curve
+_BASE_VALUES = {"QB": 25, "RB": 30, "WR": 28, "TE": 20}
+_DECLINE_RATES = {"QB": 0.02, "RB": 0.15, "WR": 0.05, "TE": 0.04}
+_PEAK_AGES = {"QB": 30, "RB": 25, "WR": 27, "TE": 28}
+# (prime start, prime end, decline start); other positions follow the WR curve
+_AGE_CURVES = {"QB": (26, 33, 34), "RB": (22, 26, 28), "WR": (24, 29, 31), "TE": (25, 30, 32)}
+
+TABLE_COLUMNS = [
+    "player_id", "position", "age", "current_value", "value_1year", "value_2year",
+    "value_3year", "peak_year", "trend", "age_curve", "tier"
+]
+_VALUE_COLUMNS = ["current_value", "value_1year", "value_2year", "value_3year"]
+
+
+def _by_position(positions: np.ndarray, table: Dict[str, float], default: float) -> np.ndarray:
+    """Map each position to its parameter"""
+    values = np.full(len(positions), default, dtype=float)
+    for position, value in table.items():
+        values[positions == position] = value
+    return values
+
+
+def player_ages(birth_dates: Iterable[Optional[str]], as_of: Optional[datetime] = None) -> np.ndarray:
+    """Ages in whole years from ``YYYY-MM-DD`` birth dates; missing or invalid dates give the default age"""
+    as_of = as_of or datetime.now()
+    births = pd.to_datetime(pd.Series(list(birth_dates), dtype=object), format="%Y-%m-%d", errors="coerce")
+    before_birthday = (births.dt.month > as_of.month) | ((births.dt.month == as_of.month) & (births.dt.day > as_of.day))
+    ages = as_of.year - births.dt.year - before_birthday.astype(float)
+    return ages.fillna(DEFAULT_AGE).to_numpy(dtype=float)
+
+
+def dynasty_values(ages: np.ndarray, positions: np.ndarray, year: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Dynasty valuation of every (age, position) row at once.
+
+    Current value is the position's base value scaled by an age multiplier;
+    future values decline at a position-specific yearly rate with a floor at
+    10% of current value.
+    """
+    ages = np.asarray(ages, dtype=float)
+    positions = np.asarray(positions, dtype=object)
+    year = year or datetime.now().year
+    is_qb = positions == "QB"
+    is_rb = positions == "RB"
+
+    # Age curve adjustments
+    multiplier = np.where(
+        is_qb, np.select([ages < 25, ages < 30, ages < 35], [0.8, 1.0, 0.9], default=0.6),
+        np.where(
+            is_rb, np.select([ages < 24, ages < 27, ages < 30], [1.1, 1.0, 0.7], default=0.4),
+            np.select([ages < 26, ages < 30, ages < 33], [1.0, 1.0, 0.8], default=0.5)  # WR/TE
+        )
+    )
+    current_value = _by_position(positions, _BASE_VALUES, 25) * multiplier
+
+    # Future projections
+    retained = 1 - _by_position(positions, _DECLINE_RATES, 0.05)
+    future = {
+        f"value_{years}year": np.maximum(current_value * retained ** years, current_value * 0.1)
+        for years in (1, 2, 3)
+    }
+
+    curves = np.array([_AGE_CURVES.get(position, _AGE_CURVES["WR"]) for position in positions],
+                      dtype=float).reshape(-1, 3)
+
+    return {
+        "current_value": current_value,
+        **future,
+        "peak_year": (year + np.maximum(0, _by_position(positions, _PEAK_AGES, 27) - ages)).astype(int),
+        "trend": np.select(
+            [is_rb & (ages > 27), ages < 25, ages < 29], ["declining", "ascending", "stable"], default="declining"
+        ),
+        "age_curve": np.select(
+            [ages < curves[:, 0], ages <= curves[:, 1], ages < curves[:, 2]],
+            ["developing", "prime", "plateau"], default="declining"
+        ),
+        "tier": np.select(
+            [current_value >= 40, current_value >= 30, current_value >= 20, current_value >= 10],
+            ["Elite", "High-End", "Mid-Tier", "Depth"], default="Dart Throw"
+        )
+    }
+
+
+class DynastyValueTable:
+    """
+    Dynasty values for every player, one column array per field.
+
+    Built in one vectorized pass by the nightly job and published as a model
+    registry version; the API memory-maps it and answers per-player and
+    per-team questions with index lookups.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], version: Optional[str] = None,
+                 built_at: Optional[str] = None):
+        self.columns = columns
+        self.version = version
+        self.built_at = built_at
+        self._index = {str(player_id): row for row, player_id in enumerate(columns["player_id"])}
+
+    @classmethod
+    def build(cls, players: Dict[str, Dict], as_of: Optional[datetime] = None,
+              version: Optional[str] = None) -> "DynastyValueTable":
+        """Value every player in a Sleeper players dict"""
+        as_of = as_of or datetime.now()
+        player_ids = list(players)
+        positions = np.array([players[pid].get("position") or "" for pid in player_ids], dtype=object)
+        ages = player_ages((players[pid].get("birth_date") for pid in player_ids), as_of)
+        values = dynasty_values(ages, positions, as_of.year)
+
+        # Fixed-width strings keep every column memory-mappable
+        columns = {
+            "player_id": np.array(player_ids, dtype=str),
+            "position": positions.astype(str),
+            "age": ages,
+            **{name: np.asarray(column) for name, column in values.items()}
+        }
+        for name in ("trend", "age_curve", "tier"):
+            columns[name] = columns[name].astype(str)
+        return cls(columns, version=version, built_at=as_of.isoformat())
+
+    def __len__(self) -> int:
+        return len(self.columns["player_id"])
+
+    def __contains__(self, player_id: str) -> bool:
+        return str(player_id) in self._index
+
+    def lookup(self, player_id: str) -> Optional[Dict[str, Any]]:
+        """Dynasty analysis of one player, shaped like ``DynastyValueModel.analyze``"""
+        row = self._index.get(str(player_id))
+        if row is None:
+            return None
+        columns = self.columns
+        return {
+            "current_value": round(float(columns["current_value"][row]), 1),
+            "value_1year": round(float(columns["value_1year"][row]), 1),
+            "value_2year": round(float(columns["value_2year"][row]), 1),
+            "value_3year": round(float(columns["value_3year"][row]), 1),
+            "peak_year": int(columns["peak_year"][row]),
+            "trend": str(columns["trend"][row]),
+            "age_curve": str(columns["age_curve"][row]),
+            "tier": str(columns["tier"][row])
+        }
+
+    def rows(self, player_ids: Iterable[str]) -> np.ndarray:
+        """Table rows of the given players, skipping unknown IDs"""
+        return np.array([self._index[pid] for pid in map(str, player_ids) if pid in self._index], dtype=np.intp)
+
+    def records(self, rows: Optional[np.ndarray] = None, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """Table rows as dicts (all rows by default), ``batch_size`` at a time"""
+        if rows is None:
+            rows = np.arange(len(self))
+        for start in range(0, len(rows), batch_size):
+            index = rows[start:start + batch_size]
+            columns = {
+                name: (np.round(self.columns[name][index], 1) if name in _VALUE_COLUMNS or name == "age"
+                       else self.columns[name][index]).tolist()
+                for name in TABLE_COLUMNS
+            }
+            yield [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    def team_score(self, player_ids: Iterable[str]) -> Dict[str, Any]:
+        """Aggregate dynasty value of a roster"""
+        rows = self.rows(player_ids)
+        columns = self.columns
+        positions = columns["position"][rows]
+        tiers, tier_counts = np.unique(columns["tier"][rows], return_counts=True)
+        return {
+            "players_valued": int(len(rows)),
+            **{name: round(float(columns[name][rows].sum()), 1) for name in _VALUE_COLUMNS},
+            "average_age": round(float(columns["age"][rows].mean()), 1) if len(rows) else None,
+            "by_position": {
+                str(position): round(float(columns["current_value"][rows][positions == position].sum()), 1)
+                for position in np.unique(positions) if position
+            },
+            "tiers": {str(tier): int(count) for tier, count in zip(tiers, tier_counts)},
+            "table_version": self.version
+        }
+
+    def save_model(self, filepath: str) -> bool:
+        """Save the table as an artifact directory (so it can be published to a model registry)"""
+        try:
+            manifest = {"model_class": type(self).__name__, "rows": len(self), "built_at": self.built_at}
+            artifacts.save_artifact(filepath, {name: self.columns[name] for name in TABLE_COLUMNS}, manifest)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving dynasty value table: {str(e)}")
+            return False
+
+    @classmethod
+    def load(cls, filepath: str, mmap_mode: Optional[str] = "r",
+             version: Optional[str] = None) -> "DynastyValueTable":
+        """Load a saved table, memory-mapping its columns"""
+        manifest, columns = artifacts.load_artifact(filepath, mmap_mode=mmap_mode)
+        return cls(columns, version=version, built_at=manifest.get("built_at"))
+
+
+def load_active_table(registry, mmap_mode: Optional[str] = "r") -> Optional[DynastyValueTable]:
+    """Load the active table version of a registry, if there is one"""
+    version = registry.active_version()
+    if version is None:
+        return None
+    return DynastyValueTable.load(registry.version_path(version), mmap_mode=mmap_mode, version=version)
+
+
+async def _fetch_players() -> Dict[str, Dict]:
+    from .sleeper_client import SleeperAPIClient
+
+    async with SleeperAPIClient() as client:
+        return await client.get_all_players()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the dynasty value table for every player (nightly job)")
+    parser.add_argument("--registry", required=True, help="Registry directory to publish the table to")
+    parser.add_argument("--players", help="JSON players file instead of fetching from Sleeper")
+    parser.add_argument("--no-activate", action="store_true", help="Publish without activating")
+    args = parser.parse_args()
+
+    from .model_registry import ModelRegistry
+
+    logging.basicConfig(level=logging.INFO)
+    if args.players:
+        with open(args.players) as f:
+            players = json.load(f)
+    else:
+        players = asyncio.run(_fetch_players())
+    if not players:
+        raise SystemExit("No players to value")
+
+    start = time.perf_counter()
+    table = DynastyValueTable.build(players)
+    build_time = time.perf_counter() - start
+
+    version = ModelRegistry(args.registry).publish(
+        table, metadata={"rows": len(table), "build_time": round(build_time, 4)}, activate=not args.no_activate
+    )
+    print(f"Published dynasty value table {version}: {len(table)} players in {build_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Managed executors for CPU-bound work in async endpoints, and event-loop lag monitoring
+"""
+
+import os
+import time
+import asyncio
+import logging
+import functools
+import threading
+import importlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Executor
+from typing import Dict, Any, Callable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROCESS = "process"
+THREAD = "thread"
+
+# Executor used for each kind of task. Process tasks must be picklable
+# (module-level functions or methods of small objects) and only receive the
+# data they need; thread tasks suit short NumPy/pandas work and work on
+# shared in-process state.
+TASK_KINDS = {
+    # Vectorized NumPy that releases the GIL; the season odds tracker it builds is tens of MB
+    # and stays in this process instead of being pickled back from a worker
+    "simulation": THREAD,
+    "training": PROCESS,
+    "weekly_update": PROCESS,
+    "trade_search": PROCESS,
+    "prediction": THREAD,
+    "features": THREAD,
+    "odds_update": THREAD,
+    # Backtests fan out to their own process pool; the thread only waits on it
+    "backtest": THREAD,
+}
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when an executor's queue is full; callers should shed load (HTTP 503)"""
+
+
+class _BoundedExecutor:
+    """An executor with a cap on running plus queued tasks"""
+
+    def __init__(self, name: str, factory: Callable[[], Executor], workers: int, queue_size: int):
+        self.name = name
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+        # Tasks submitted and not yet finished, whether or not anything still awaits them
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+    @property
+    def executor(self) -> Executor:
+        # Created on first use so processes are not spawned for idle workers
+        if self._executor is None:
+            self._executor = self._factory()
+        return self._executor
+
+    def _release(self, future) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise ExecutorSaturated(f"{self.name} executor is at capacity ({self.capacity} tasks)")
+            self.in_flight += 1
+        try:
+            future = self.executor.submit(functools.partial(fn, *args, **kwargs))
+        except Exception:
+            with self._lock:
+                self.in_flight -= 1
+            raise
+        # Released when the task actually ends: a running task cannot be cancelled
+        # and keeps its slot until it finishes in the background
+        future.add_done_callback(self._release)
+        try:
+            result = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Drop the task if it has not started
+            future.cancel()
+            self.cancelled += 1
+            raise
+        self.completed += 1
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled
+        }
+
+
+class ExecutorPool:
+    """
+    Runs CPU-bound work off the event loop, choosing the executor by task kind.
+
+    Heavy jobs (simulation, training, trade search) go to a process pool so
+    they do not hold the GIL of the serving process; short NumPy work goes to
+    a thread pool. Each executor accepts at most ``workers + queue_size``
+    tasks; beyond that ``run`` raises ``ExecutorSaturated`` instead of letting
+    the backlog grow. Cancelling the awaiting coroutine cancels queued tasks.
+    """
+
+    def __init__(self, process_workers: Optional[int] = None, thread_workers: int = 4,
+                 process_queue: int = 16, thread_queue: int = 64):
+        process_workers = process_workers or os.cpu_count() or 1
+        # Spawned workers do not inherit the event loop, sockets or locks of the server
+        context = multiprocessing.get_context("spawn")
+        self.executors = {
+            PROCESS: _BoundedExecutor(
+                PROCESS, lambda: ProcessPoolExecutor(max_workers=process_workers, mp_context=context),
+                process_workers, process_queue
+            ),
+            THREAD: _BoundedExecutor(
+                THREAD, lambda: ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix="analytics"),
+                thread_workers, thread_queue
+            )
+        }
+
+    async def run(self, task: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` on the executor for ``task`` (a ``TASK_KINDS`` key)"""
+        return await self.executors[TASK_KINDS[task]].run(fn, *args, **kwargs)
+
+    async def warm_up(self, modules: Iterable[str] = ()) -> None:
+        """Start every process worker and import ``modules`` in each"""
+        process = self.executors[PROCESS]
+        modules = tuple(modules)
+        # One task per worker; the pool starts a new worker for each pending task
+        await asyncio.gather(*(
+            asyncio.wrap_future(process.executor.submit(_import_modules, modules))
+            for _ in range(process.workers)
+        ))
+
+    def shutdown(self) -> None:
+        for executor in self.executors.values():
+            executor.shutdown()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: executor.stats() for name, executor in self.executors.items()}
+
+
+def _import_modules(modules: Tuple[str, ...]) -> None:
+    # Keeps the worker busy briefly so each task lands on its own process
+    for module in modules:
+        importlib.import_module(module)
+    time.sleep(0.05)
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up from a sleep.
+
+    Lag is time the loop spent running something else (typically CPU work in
+    a handler) when it should have been serving other requests.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.last = 0.0
+        self.max = 0.0
+        self.mean = 0.0
+        self.samples = 0
+
+    async def run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - start - self.interval))
+
+    def record(self, lag: float) -> None:
+        self.last = lag
+        self.max = max(self.max, lag)
+        self.samples += 1
+        # Exponentially weighted, so it follows recent load
+        self.mean = lag if self.samples == 1 else 0.9 * self.mean + 0.1 * lag
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "last_seconds": round(self.last, 4),
+            "mean_seconds": round(self.mean, 4),
+            "max_seconds": round(self.max, 4),
+            "samples": self.samples
+        }
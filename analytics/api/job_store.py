@@ -0,0 +1,318 @@
+"""
+Where background jobs and their results are kept: process memory or a shared database
+"""
+
+import time
+import threading
+from typing import Dict, Any, Optional, Tuple, List
+
+import orjson
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+
+from .jobs import Job, JobQueueFull, QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED, FINISHED
+from .serialization import dumps
+
+LOST = "Job stopped: the worker running it stopped responding"
+
+
+def _counts(statuses: List[str]) -> Dict[str, int]:
+    counts = {status: 0 for status in (QUEUED, RUNNING) + FINISHED}
+    for status in statuses:
+        counts[status] += 1
+    return counts
+
+
+class MemoryJobStore:
+    """
+    Jobs in this process's memory.
+
+    Only suitable for a single replica: other processes cannot see the jobs,
+    and they are lost on restart. Use ``SQLJobStore`` when the service is
+    scaled out.
+    """
+
+    def __init__(self, ttl: float = 3600.0, lease: float = 30.0):
+        self.ttl = ttl
+        self.lease = lease
+        self._jobs: Dict[str, Job] = {}
+        self._live: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None, reuse: bool = True) -> None:
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        job.expires_at = job.finished_at + self.ttl
+        if (status != SUCCEEDED or not reuse) and self._live.get(job.key) is job:
+            del self._live[job.key]
+
+    def _purge(self) -> None:
+        now = time.time()
+        for job in list(self._jobs.values()):
+            if job.status == RUNNING and job.heartbeat_at < now - self.lease:
+                self._finish(job, FAILED, LOST)
+            if job.expires_at is not None and job.expires_at < now:
+                del self._jobs[job.id]
+                if self._live.get(job.key) is job:
+                    del self._live[job.key]
+
+    def add(self, job: Job, max_queued: int) -> Tuple[Job, bool]:
+        with self._lock:
+            self._purge()
+            existing = self._live.get(job.key)
+            if existing is not None:
+                return existing, False
+            queued = sum(other.status == QUEUED for other in self._jobs.values())
+            if queued >= max_queued:
+                raise JobQueueFull(f"{queued} jobs are already queued")
+            self._jobs[job.id] = job
+            self._live[job.key] = job
+            return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            self._purge()
+            return sorted(self._jobs.values(), key=lambda job: -job.submitted_at)
+
+    def claim(self, owner: str, kinds: List[str]) -> Optional[Job]:
+        with self._lock:
+            queued = [job for job in self._jobs.values() if job.status == QUEUED and job.kind in kinds]
+            job = min(queued, key=lambda job: (-job.priority, job.submitted_at), default=None)
+            if job is not None:
+                job.status = RUNNING
+                job.owner = owner
+                job.started_at = job.heartbeat_at = time.time()
+            return job
+
+    def heartbeat(self, owner: str, job_ids: List[str]) -> List[str]:
+        with self._lock:
+            now = time.time()
+            cancelled = []
+            for job_id in job_ids:
+                job = self._jobs.get(job_id)
+                if job is not None and job.owner == owner and job.status == RUNNING:
+                    job.heartbeat_at = now
+                    if job.cancel_requested:
+                        cancelled.append(job_id)
+            return cancelled
+
+    def purge(self) -> Dict[str, int]:
+        with self._lock:
+            self._purge()
+            return _counts([job.status for job in self._jobs.values()])
+
+    def finish(self, job_id: str, owner: str, status: str, result: Any, error: Optional[str],
+               reuse: bool = True) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.owner != owner or job.status != RUNNING:
+                return
+            job.result = result if status == SUCCEEDED else None
+            self._finish(job, status, error, reuse)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._purge()
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == QUEUED:
+                self._finish(job, CANCELLED)
+            elif job is not None and job.status == RUNNING:
+                job.cancel_requested = True
+            return job
+
+    def release(self, owner: str) -> None:
+        with self._lock:
+            for job in self._jobs.values():
+                if job.owner != owner or job.status != RUNNING:
+                    continue
+                if job.cancel_requested:
+                    self._finish(job, CANCELLED)
+                else:
+                    job.status = QUEUED
+                    job.owner = job.started_at = job.heartbeat_at = None
+
+
+_metadata = sa.MetaData()
+
+# Created by database/migrations/002_analytics_jobs.up.sql
+JOBS = sa.Table(
+    "analytics_jobs", _metadata,
+    sa.Column("id", sa.String(32), primary_key=True),
+    sa.Column("kind", sa.String(64), nullable=False),
+    sa.Column("job_key", sa.String(64), nullable=False),
+    # The job key while the job is queued, running or succeeded (if its kind reuses results);
+    # unique, so one live job per key
+    sa.Column("live_key", sa.String(64), unique=True),
+    sa.Column("params", sa.Text, nullable=False),
+    sa.Column("priority", sa.Integer, nullable=False),
+    sa.Column("status", sa.String(16), nullable=False),
+    sa.Column("result", sa.Text),
+    sa.Column("error", sa.Text),
+    sa.Column("owner", sa.String(255)),
+    sa.Column("cancel_requested", sa.Boolean, nullable=False, default=False),
+    sa.Column("submitted_at", sa.Float, nullable=False),
+    sa.Column("started_at", sa.Float),
+    sa.Column("finished_at", sa.Float),
+    sa.Column("expires_at", sa.Float),
+    sa.Column("heartbeat_at", sa.Float),
+)
+
+
+def _job(row) -> Job:
+    return Job(
+        row.kind, row.job_key, orjson.loads(row.params), row.priority, id=row.id, status=row.status,
+        result=orjson.loads(row.result) if row.result is not None else None, error=row.error,
+        owner=row.owner, cancel_requested=row.cancel_requested, submitted_at=row.submitted_at,
+        started_at=row.started_at, finished_at=row.finished_at, expires_at=row.expires_at,
+        heartbeat_at=row.heartbeat_at
+    )
+
+
+class SQLJobStore:
+    """
+    Jobs in a database table shared by every replica (PostgreSQL in deployment).
+
+    A unique ``live_key`` column makes deduplication atomic across replicas,
+    and queued jobs are claimed with ``FOR UPDATE SKIP LOCKED`` so each runs
+    once. Params and results are stored as JSON text.
+    """
+
+    def __init__(self, url: str, ttl: float = 3600.0, lease: float = 30.0):
+        self.ttl = ttl
+        self.lease = lease
+        self.engine = sa.create_engine(url, pool_pre_ping=True)
+
+    def _finished(self, status: str, error: Optional[str] = None, reuse: bool = True) -> Dict[str, Any]:
+        now = time.time()
+        values = {"status": status, "error": error, "finished_at": now, "expires_at": now + self.ttl}
+        if status != SUCCEEDED or not reuse:
+            values["live_key"] = None
+        return values
+
+    def _purge(self, conn) -> None:
+        now = time.time()
+        conn.execute(
+            JOBS.update()
+            .where(JOBS.c.status == RUNNING, JOBS.c.heartbeat_at < now - self.lease)
+            .values(**self._finished(FAILED, LOST))
+        )
+        conn.execute(JOBS.delete().where(JOBS.c.expires_at < now))
+
+    def add(self, job: Job, max_queued: int) -> Tuple[Job, bool]:
+        with self.engine.begin() as conn:
+            self._purge(conn)
+        with self.engine.begin() as conn:
+            existing = conn.execute(JOBS.select().where(JOBS.c.live_key == job.key)).first()
+            if existing is not None:
+                return _job(existing), False
+            queued = conn.execute(sa.select(sa.func.count()).where(JOBS.c.status == QUEUED)).scalar()
+            if queued >= max_queued:
+                raise JobQueueFull(f"{queued} jobs are already queued")
+            try:
+                with conn.begin_nested():
+                    conn.execute(JOBS.insert().values(
+                        id=job.id, kind=job.kind, job_key=job.key, live_key=job.key,
+                        params=dumps(job.params).decode(), priority=job.priority, status=QUEUED,
+                        cancel_requested=False, submitted_at=job.submitted_at
+                    ))
+            except IntegrityError:
+                # Another replica queued the same job first
+                existing = conn.execute(JOBS.select().where(JOBS.c.live_key == job.key)).first()
+                if existing is not None:
+                    return _job(existing), False
+                raise
+            return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.engine.begin() as conn:
+            self._purge(conn)
+            row = conn.execute(JOBS.select().where(JOBS.c.id == job_id)).first()
+        return _job(row) if row is not None else None
+
+    def list(self) -> List[Job]:
+        with self.engine.begin() as conn:
+            self._purge(conn)
+            rows = conn.execute(JOBS.select().order_by(JOBS.c.submitted_at.desc())).all()
+        return [_job(row) for row in rows]
+
+    def claim(self, owner: str, kinds: List[str]) -> Optional[Job]:
+        with self.engine.begin() as conn:
+            job_id = conn.execute(
+                sa.select(JOBS.c.id)
+                .where(JOBS.c.status == QUEUED, JOBS.c.kind.in_(kinds))
+                .order_by(JOBS.c.priority.desc(), JOBS.c.submitted_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).scalar()
+            if job_id is None:
+                return None
+            now = time.time()
+            claimed = conn.execute(
+                JOBS.update()
+                .where(JOBS.c.id == job_id, JOBS.c.status == QUEUED)
+                .values(status=RUNNING, owner=owner, started_at=now, heartbeat_at=now)
+            ).rowcount
+            if not claimed:
+                return None
+            return _job(conn.execute(JOBS.select().where(JOBS.c.id == job_id)).one())
+
+    def heartbeat(self, owner: str, job_ids: List[str]) -> List[str]:
+        if not job_ids:
+            return []
+        mine = (JOBS.c.id.in_(job_ids), JOBS.c.owner == owner, JOBS.c.status == RUNNING)
+        with self.engine.begin() as conn:
+            conn.execute(JOBS.update().where(*mine).values(heartbeat_at=time.time()))
+            return list(conn.execute(sa.select(JOBS.c.id).where(*mine, JOBS.c.cancel_requested)).scalars())
+
+    def purge(self) -> Dict[str, int]:
+        with self.engine.begin() as conn:
+            self._purge(conn)
+            rows = conn.execute(sa.select(JOBS.c.status, sa.func.count()).group_by(JOBS.c.status)).all()
+        counts = _counts([])
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def finish(self, job_id: str, owner: str, status: str, result: Any, error: Optional[str],
+               reuse: bool = True) -> None:
+        values = self._finished(status, error, reuse)
+        if status == SUCCEEDED:
+            values["result"] = dumps(result).decode()
+        with self.engine.begin() as conn:
+            conn.execute(
+                JOBS.update()
+                .where(JOBS.c.id == job_id, JOBS.c.owner == owner, JOBS.c.status == RUNNING)
+                .values(**values)
+            )
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self.engine.begin() as conn:
+            self._purge(conn)
+            cancelled = conn.execute(
+                JOBS.update()
+                .where(JOBS.c.id == job_id, JOBS.c.status == QUEUED)
+                .values(**self._finished(CANCELLED))
+            ).rowcount
+            if not cancelled:
+                # The owning replica cancels it on its next heartbeat
+                conn.execute(
+                    JOBS.update()
+                    .where(JOBS.c.id == job_id, JOBS.c.status == RUNNING)
+                    .values(cancel_requested=True)
+                )
+            row = conn.execute(JOBS.select().where(JOBS.c.id == job_id)).first()
+        return _job(row) if row is not None else None
+
+    def release(self, owner: str) -> None:
+        mine = (JOBS.c.owner == owner, JOBS.c.status == RUNNING)
+        with self.engine.begin() as conn:
+            conn.execute(JOBS.update().where(*mine, JOBS.c.cancel_requested).values(**self._finished(CANCELLED)))
+            conn.execute(
+                JOBS.update().where(*mine)
+                .values(status=QUEUED, owner=None, started_at=None, heartbeat_at=None)
+            )
@@ -0,0 +1,270 @@
+"""
+Background jobs for long-running analytics, polled by clients
+"""
+
+import os
+import time
+import uuid
+import socket
+import asyncio
+import hashlib
+import logging
+from typing import Dict, Any, Callable, Awaitable, Optional, Tuple, List
+
+from .serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+# Jobs a duplicate submission is answered with
+LIVE = (QUEUED, RUNNING, SUCCEEDED)
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when too many jobs are waiting; callers should retry later (HTTP 503)"""
+
+
+class Job:
+    """One submitted job and, once finished, its result or error"""
+
+    def __init__(self, kind: str, key: str, params: Dict[str, Any], priority: int = 0,
+                 id: Optional[str] = None, status: str = QUEUED, result: Any = None,
+                 error: Optional[str] = None, owner: Optional[str] = None,
+                 cancel_requested: bool = False, submitted_at: Optional[float] = None,
+                 started_at: Optional[float] = None, finished_at: Optional[float] = None,
+                 expires_at: Optional[float] = None, heartbeat_at: Optional[float] = None):
+        self.id = id or uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.params = params
+        self.priority = priority
+        self.status = status
+        self.result = result
+        self.error = error
+        # Process running the job, and when it last reported in
+        self.owner = owner
+        self.heartbeat_at = heartbeat_at
+        self.cancel_requested = cancel_requested
+        self.submitted_at = time.time() if submitted_at is None else submitted_at
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.expires_at = expires_at
+
+    def as_dict(self, include_result: bool = False) -> Dict[str, Any]:
+        job = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "expires_at": self.expires_at
+        }
+        if self.error is not None:
+            job["error"] = self.error
+        if include_result and self.status == SUCCEEDED:
+            job["result"] = self.result
+        return job
+
+
+class JobManager:
+    """
+    Runs registered job kinds in the background with priority and concurrency limits.
+
+    Jobs and results live in a job store (see ``api.job_store``). With a
+    shared database store every replica sees every job: any replica answers
+    polls, duplicates are detected across replicas, queued jobs are claimed
+    by whichever replica has capacity, and results survive restarts.
+
+    Submitting returns a job immediately. The dispatcher claims queued jobs,
+    highest priority first (FIFO within a priority), while fewer than
+    ``concurrency`` jobs run in this process and fewer than the kind's own
+    limit run of that kind. Submitting the same kind, parameters and data
+    version again returns the queued or running job instead of a duplicate,
+    or the succeeded one for kinds that reuse results.
+    Finished jobs and their results are kept for the store's ``ttl``, then purged.
+
+    Running jobs are renewed every third of the store's lease; a job whose
+    process stops renewing it is marked failed. On shutdown, running jobs go
+    back to the queue for another replica.
+    """
+
+    def __init__(self, store, concurrency: int = 4, max_queued: int = 100,
+                 poll_interval: float = 1.0, owner: Optional[str] = None):
+        self.store = store
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.poll_interval = poll_interval
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {}
+        self._limits: Dict[str, int] = {}
+        self._reuse: Dict[str, bool] = {}
+        self._running: Dict[str, int] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._changed = asyncio.Event()
+        self._stopping = False
+        # Jobs by status in the store, refreshed with each heartbeat (read by /metrics)
+        self._counts = {status: 0 for status in (QUEUED, RUNNING) + FINISHED}
+        self.completed = 0
+        self.failed = 0
+        self.deduplicated = 0
+
+    def register(self, kind: str, handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+                 limit: Optional[int] = None, reuse_results: bool = True) -> None:
+        """
+        Add a job kind; ``handler(params)`` is awaited to run a job.
+        
+        Without ``reuse_results``, a submission after a job succeeded runs again
+        (e.g. training, which publishes a new model each time).
+        """
+        self._handlers[kind] = handler
+        self._limits[kind] = limit or self.concurrency
+        self._reuse[kind] = reuse_results
+        self._running[kind] = 0
+
+    @property
+    def kinds(self) -> List[str]:
+        return list(self._handlers)
+
+    @staticmethod
+    def job_key(kind: str, params: Any, version: Optional[str] = None) -> str:
+        """Deduplication key of a submission"""
+        return hashlib.sha256(dumps([kind, params, version], sort_keys=True)).hexdigest()
+
+    async def _store(self, method: str, *args) -> Any:
+        # Store calls may block on the database
+        return await asyncio.to_thread(getattr(self.store, method), *args)
+
+    async def submit(self, kind: str, params: Dict[str, Any], priority: int = 0,
+                     version: Optional[str] = None) -> Tuple[Job, bool]:
+        """
+        Queue a job, or return the live job with the same key; the flag is True for a new job.
+        
+        ``version`` identifies the data the job reads (e.g. league rosters), so a
+        stored result is not reused once that data changes.
+        """
+        if kind not in self._handlers:
+            raise KeyError(kind)
+        job = Job(kind, self.job_key(kind, params, version), params, priority)
+        job, created = await self._store("add", job, self.max_queued)
+        if created:
+            self._changed.set()
+        else:
+            self.deduplicated += 1
+        return job, created
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """A job that has not expired"""
+        return await self._store("get", job_id)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; finished jobs are left as they are"""
+        job = await self._store("cancel", job_id)
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+        return job
+
+    async def list(self) -> List[Dict[str, Any]]:
+        """Every job that has not expired, newest first"""
+        jobs = await self._store("list")
+        self._counts = {status: sum(job.status == status for job in jobs) for status in self._counts}
+        return [job.as_dict() for job in jobs]
+
+    async def run(self) -> None:
+        """Dispatch queued jobs and renew running ones until cancelled"""
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            await self._dispatch()
+        finally:
+            heartbeat.cancel()
+
+    def _free_kinds(self) -> List[str]:
+        if len(self._tasks) >= self.concurrency:
+            return []
+        return [kind for kind in self._handlers if self._running[kind] < self._limits[kind]]
+
+    async def _dispatch(self) -> None:
+        while True:
+            self._changed.clear()
+            kinds = self._free_kinds()
+            try:
+                job = await self._store("claim", self.owner, kinds) if kinds else None
+            except Exception as e:
+                # E.g. the database is briefly unreachable; back off and try again
+                logger.error(f"Error claiming jobs: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+                continue
+            if job is None:
+                # Jobs submitted to other replicas only show up in the store, so poll
+                try:
+                    await asyncio.wait_for(self._changed.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self._running[job.kind] += 1
+            self._tasks[job.id] = asyncio.create_task(self._execute(job))
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.store.lease / 3)
+            try:
+                cancelled = await self._store("heartbeat", self.owner, list(self._tasks))
+                for job_id in cancelled:
+                    if job_id in self._tasks:
+                        self._tasks[job_id].cancel()
+                self._counts = await self._store("purge")
+            except Exception as e:
+                logger.error(f"Error renewing jobs: {str(e)}")
+
+    async def _execute(self, job: Job) -> None:
+        job.error = None
+        try:
+            job.result = await self._handlers[job.kind](job.params)
+            self.completed += 1
+            status = SUCCEEDED
+        except asyncio.CancelledError:
+            status = CANCELLED
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+            job.error = str(e) or type(e).__name__
+            self.failed += 1
+            status = FAILED
+        finally:
+            self._running[job.kind] -= 1
+            del self._tasks[job.id]
+            self._changed.set()
+        if self._stopping:
+            return
+        await self._store("finish", job.id, self.owner, status, job.result, job.error, self._reuse[job.kind])
+        logger.info(f"Job {job.id} ({job.kind}) {status} in {time.time() - job.started_at:.2f}s")
+
+    def shutdown(self) -> None:
+        """Stop running jobs and return them to the queue"""
+        self._stopping = True
+        for task in self._tasks.values():
+            task.cancel()
+        try:
+            self.store.release(self.owner)
+        except Exception as e:
+            logger.error(f"Error releasing running jobs: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Limits, this process's counters and jobs by status as of the last heartbeat"""
+        return {
+            "concurrency": self.concurrency,
+            "max_queued": self.max_queued,
+            "limits": dict(self._limits),
+            "running_here": len(self._tasks),
+            "jobs": dict(self._counts),
+            "completed": self.completed,
+            "failed": self.failed,
+            "deduplicated": self.deduplicated
+        }
@@ -1,10 +1,13 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from fastapi.responses import JSONResponse
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator, Iterable, Iterator
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from collections import OrderedDict
 import logging
 from .models import (
     PlayerProjectionModel,
@@ -14,6 +17,27 @@ from .models import (
 )
 from .sleeper_client import SleeperAPIClient
 from .data_processor import DataProcessor
+from .model_registry import ModelRegistry, ModelManager, training_cutoff
+from .dynasty_table import DynastyValueTable, load_active_table
+from .season_simulator import SeasonState, SeasonOddsTracker, PlayoffFormat
+from .response_cache import ResponseCache
+from .timing import StageTimer, gather_bounded
+from .streaming import wants_ndjson, ndjson_response
+from .serialization import FastJSONResponse, dumps
+from .player_registry import PlayerRegistry, DISPLAY_FIELDS
+from .jobs import JobManager, JobQueueFull, SUCCEEDED
+from .job_store import MemoryJobStore, SQLJobStore
+from .backtest import Backtester, fetch_history, HEURISTIC
+from .training import train_and_publish, resolve_training_data
+from .weekly_update import finalize_week_from_history
+from .executors import ExecutorPool, ExecutorSaturated, LoopLagMonitor
+from .prewarm import Prewarmer
+from .metrics import MetricsMiddleware, AnalyticsCollector, metrics_response
+from prometheus_client import REGISTRY
+from .config import settings
+import asyncio
+import hashlib
+import signal
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -33,14 +57,72 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Initialize models and clients
 sleeper_client = SleeperAPIClient()
 data_processor = DataProcessor()
-projection_model = PlayerProjectionModel()
+projection_models = ModelManager(
+    registry=ModelRegistry(settings.model_registry_path) if settings.model_registry_path else None,
+    model=None if settings.model_registry_path else PlayerProjectionModel(
+        artifact_path=settings.projection_model_path,
+        mmap_mode=settings.model_mmap_mode
+    ),
+    mmap_mode=settings.model_mmap_mode,
+    shadow=settings.model_shadow
+)
 waiver_model = WaiverWireRecommendationModel()
 trade_analyzer = TradeAnalyzerModel()
 dynasty_model = DynastyValueModel()
+dynasty_tables = ModelRegistry(settings.dynasty_table_path) if settings.dynasty_table_path else None
+# CPU-bound work runs here instead of on the event loop
+executors = ExecutorPool(
+    process_workers=settings.process_workers,
+    thread_workers=settings.thread_workers,
+    process_queue=settings.process_queue_size,
+    thread_queue=settings.thread_queue_size
+)
+loop_lag = LoopLagMonitor(settings.loop_lag_interval_seconds)
+# Startup warm-up of caches, models and worker processes, reported by /ready
+prewarmer = Prewarmer(settings.prewarm_budget_seconds)
+# Trade searches queued by /analytics/insights run after jobs clients submitted
+INSIGHT_JOB_PRIORITY = -1
+# Weekly model updates need four games per player (see build_training_set)
+FIRST_UPDATE_WEEK = 4
+# Largest player list accepted by /projections/players, and when streamed as NDJSON
+MAX_BULK_PROJECTIONS = 500
+MAX_STREAMED_PROJECTIONS = 5000
+# Rows computed and flushed together in NDJSON responses
+STREAM_BATCH_SIZE = 100
+response_cache = ResponseCache(max_bytes=settings.response_cache_bytes, ttl=settings.response_cache_ttl_seconds)
+# league_id -> cached simulation state, updated as weeks finalize and rosters change
+odds_trackers = OrderedDict()
+# (season, week) of finalized weeks this process has queued a weekly model update for
+weekly_updates_queued = set()
+# Long-running analytics submitted through /jobs (kinds are registered below the endpoints);
+# kept in the shared database when configured, so every replica sees every job
+if settings.job_store_url:
+    job_store = SQLJobStore(settings.job_store_url, ttl=settings.job_result_ttl_seconds,
+                            lease=settings.job_lease_seconds)
+else:
+    job_store = MemoryJobStore(ttl=settings.job_result_ttl_seconds, lease=settings.job_lease_seconds)
+jobs = JobManager(
+    job_store,
+    concurrency=settings.job_concurrency,
+    max_queued=settings.job_queue_size
+)
+REGISTRY.register(AnalyticsCollector({
+    "response_cache": response_cache.stats,
+    "caches": lambda: {
+        "players": len(sleeper_client._players_cache),
+        "week_stats": len(sleeper_client._week_stats_cache),
+        "player_registry": len(sleeper_client._player_registry or ()),
+        "odds_trackers": len(odds_trackers)
+    },
+    "executors": executors.stats,
+    "jobs": jobs.stats,
+    "event_loop_lag": loop_lag.stats
+}))
 
 # Pydantic models for requests/responses
 class PlayerProjectionRequest(BaseModel):
@@ -59,6 +141,15 @@ class PlayerProjectionResponse(BaseModel):
     injury_risk: float
     trending: str  # "up", "down", "stable"
 
+class BulkProjectionRequest(BaseModel):
+    player_ids: List[str]
+    weeks_ahead: int = 4
+    league_settings: Optional[Dict[str, Any]] = None
+
+class BulkProjectionResponse(BaseModel):
+    projections: List[PlayerProjectionResponse]
+    errors: Dict[str, str]  # player_id -> reason
+
 class WaiverWireRequest(BaseModel):
     league_id: str
     team_id: str
@@ -94,6 +185,49 @@ class TradeAnalysisResponse(BaseModel):
     recommendation: str
     reasoning: str
 
+class TradeSearchRequest(BaseModel):
+    league_id: str
+    team_id: str
+    max_results: int = 10
+
+class TradeCandidate(BaseModel):
+    partner_roster_id: str
+    give: List[str]
+    receive: List[str]
+    give_value: float
+    receive_value: float
+    my_gain: float
+    partner_gain: float
+    score: float
+
+class TradeSearchResponse(BaseModel):
+    trades: List[TradeCandidate]
+    candidates_scored: int
+    search_time: float
+
+class JobRequest(BaseModel):
+    kind: str  # "league_odds", "trade_search", "backtest", "training" or "weekly_update"
+    params: Dict[str, Any] = {}
+    priority: int = Field(0, ge=-10, le=10)  # higher runs first
+
+class LeagueOddsJob(BaseModel):
+    league_id: str
+
+class BacktestJob(BaseModel):
+    seasons: List[str]
+    models: Dict[str, str] = {}  # name -> model registry version, evaluated alongside the heuristic
+    lookback: int = 8
+
+class TrainingJob(BaseModel):
+    training_data: str  # JSON file of processed player dicts, named relative to ANALYTICS_TRAINING_DATA_DIR
+    data_version: Optional[str] = None
+    activate: bool = False
+
+class WeeklyUpdateJob(BaseModel):
+    season: str
+    week: int
+    lookback: int = 8
+
 class DynastyValueRequest(BaseModel):
     player_id: str
     league_settings: Optional[Dict[str, Any]] = None
@@ -110,6 +244,99 @@ class DynastyValueResponse(BaseModel):
     age_curve_position: str
     dynasty_tier: str
 
+@app.on_event("startup")
+async def load_models():
+    """Eagerly load and warm up model artifacts when configured to, and watch the registry"""
+    if settings.eager_model_load and projection_models.model.artifact_path:
+        try:
+            duration = projection_models.model.warm_up()
+            logger.info(f"Projection model warmed up in {duration:.3f}s")
+        except Exception as e:
+            logger.error(f"Error warming up projection model: {str(e)}")
+    
+    if projection_models.registry is not None:
+        app.state.registry_poller = asyncio.create_task(
+            projection_models.poll(settings.model_registry_poll_seconds)
+        )
+        try:
+            # SIGHUP triggers an immediate registry check
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGHUP, lambda: asyncio.create_task(projection_models.refresh())
+            )
+        except (NotImplementedError, RuntimeError, AttributeError):
+            pass
+    
+    if dynasty_tables is not None:
+        await _refresh_dynasty_table()
+        app.state.dynasty_table_poller = asyncio.create_task(_poll_dynasty_table())
+    
+    app.state.loop_lag_monitor = asyncio.create_task(loop_lag.run())
+    app.state.job_dispatcher = asyncio.create_task(jobs.run())
+    
+    if settings.prewarm:
+        _add_prewarm_stages()
+        app.state.prewarm = asyncio.create_task(prewarmer.run())
+    else:
+        prewarmer.mark_ready()
+
+@app.on_event("shutdown")
+async def stop_model_watch():
+    """Stop registry polling, shadow scoring, prewarming, jobs and executors"""
+    for name in ("registry_poller", "dynasty_table_poller", "loop_lag_monitor", "prewarm", "job_dispatcher"):
+        poller = getattr(app.state, name, None)
+        if poller is not None:
+            poller.cancel()
+    jobs.shutdown()
+    projection_models.shutdown()
+    executors.shutdown()
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    """Shed load when CPU executors are backed up"""
+    logger.warning(str(exc))
+    return JSONResponse(status_code=503, content={"detail": "Server busy, retry shortly"},
+                        headers={"Retry-After": "1"})
+
+def _add_prewarm_stages() -> None:
+    """Fill the caches and start the workers that the first requests would otherwise pay for"""
+    async def warm_projection_model():
+        model = projection_models.model
+        if model.artifact_path and not model.warmed_up:
+            await executors.run("prediction", model.warm_up)
+    
+    # Fetches the players snapshot and builds its registry
+    prewarmer.add("players", sleeper_client.get_player_registry)
+    prewarmer.add("nfl_state", sleeper_client.get_nfl_state)
+    # The same week range the projection and trade endpoints read
+    prewarmer.add("week_stats", lambda: sleeper_client.get_players_stats(
+        [], weeks=16, concurrency=settings.request_concurrency
+    ))
+    prewarmer.add("projection_model", warm_projection_model)
+    prewarmer.add("process_workers", lambda: executors.warm_up(
+        [TradeAnalyzerModel.__module__]
+    ))
+
+async def _refresh_dynasty_table() -> None:
+    """Load the active dynasty value table version if it changed"""
+    version = dynasty_tables.active_version()
+    current = dynasty_model.table.version if dynasty_model.table is not None else None
+    if version is None or version == current:
+        return
+    try:
+        table = await asyncio.get_running_loop().run_in_executor(
+            None, load_active_table, dynasty_tables, settings.model_mmap_mode
+        )
+        dynasty_model.set_table(table)
+        logger.info(f"Dynasty value table {version} loaded ({len(table)} players)")
+    except Exception as e:
+        logger.error(f"Error loading dynasty value table {version}: {str(e)}")
+
+async def _poll_dynasty_table() -> None:
+    """Pick up the nightly table without a restart"""
+    while True:
+        await asyncio.sleep(settings.model_registry_poll_seconds)
+        await _refresh_dynasty_table()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -117,87 +344,272 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
         "models_loaded": {
-            "projection_model": projection_model.is_loaded(),
+            "projection_model": projection_models.model.is_loaded(),
             "waiver_model": waiver_model.is_loaded(),
             "trade_analyzer": trade_analyzer.is_loaded(),
             "dynasty_model": dynasty_model.is_loaded()
-        }
+        },
+        "models_warmed_up": {
+            "projection_model": projection_models.model.warmed_up
+        },
+        "model_version": projection_models.version
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the startup prewarm is done or out of time"""
+    status = prewarmer.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metrics"""
+    return metrics_response()
+
+@app.get("/executors")
+async def get_executor_status():
+    """CPU executor load and event-loop lag"""
+    return {**executors.stats(), "event_loop_lag": loop_lag.stats()}
+
+@app.get("/cache")
+async def get_cache_status():
+    """Response cache occupancy and hit rate"""
+    return response_cache.stats()
+
+@app.post("/cache/clear")
+async def clear_cache():
+    """Drop every cached response"""
+    response_cache.clear()
+    return response_cache.stats()
+
+@app.get("/models")
+async def get_model_status():
+    """Serving model version, registry contents and shadow comparison"""
+    return {
+        **projection_models.status(),
+        "versions": projection_models.registry.versions() if projection_models.registry else []
+    }
+
+@app.post("/models/reload")
+async def reload_models():
+    """Load the registry's active version now instead of waiting for the next poll"""
+    if projection_models.registry is None:
+        raise HTTPException(status_code=404, detail="Model registry not configured")
+    changed = await projection_models.refresh()
+    return {"changed": changed, **projection_models.status()}
+
+@app.post("/models/promote")
+async def promote_shadow_model():
+    """Promote the shadow model to serving"""
+    if not projection_models.promote_shadow():
+        raise HTTPException(status_code=404, detail="No shadow model loaded")
+    return projection_models.status()
+
 @app.post("/projections/player", response_model=PlayerProjectionResponse)
-async def get_player_projection(request: PlayerProjectionRequest):
+async def get_player_projection(request: PlayerProjectionRequest, http_request: Request):
     """Get detailed player projections with confidence intervals"""
+    versions = await _data_versions("players", "week", "model")
+    key = response_cache.key("/projections/player", request, versions)
+    timer = StageTimer("projection_player")
+    return await response_cache.respond(http_request, key, lambda: _project_player(request, timer), timer)
+
+async def _project_player(request: PlayerProjectionRequest, timer: StageTimer) -> Dict[str, Any]:
+    """Compute a player projection"""
     try:
-        # Get player data from Sleeper
-        player_data = await sleeper_client.get_player(request.player_id)
-        if not player_data:
-            raise HTTPException(status_code=404, detail="Player not found")
-        
-        # Get recent performance data
-        performance_data = await sleeper_client.get_player_stats(
-            request.player_id, 
-            weeks=8
-        )
+        with timer.stage("fetch"):
+            # Get player data from Sleeper
+            player_data = await sleeper_client.get_player(request.player_id)
+            if not player_data:
+                raise HTTPException(status_code=404, detail="Player not found")
+            
+            # Get recent performance data
+            performance_data = await sleeper_client.get_player_stats(
+                request.player_id, 
+                weeks=8
+            )
         
         # Process data for model
-        processed_data = data_processor.prepare_projection_data(
-            player_data, 
-            performance_data,
-            request.league_settings
-        )
+        with timer.stage("features"):
+            processed_data = await executors.run(
+                "features",
+                data_processor.prepare_projection_data,
+                player_data, 
+                performance_data,
+                request.league_settings
+            )
         
         # Generate projection
-        projection = projection_model.predict(processed_data, request.weeks_ahead)
+        with timer.stage("predict"):
+            projection = await executors.run(
+                "prediction", projection_models.predict, processed_data, request.weeks_ahead
+            )
         
-        return PlayerProjectionResponse(
-            player_id=request.player_id,
-            player_name=player_data["full_name"],
-            position=player_data["position"],
-            team=player_data["team"],
-            projected_points=projection["points"],
-            confidence_interval=projection["confidence_interval"],
-            projection_breakdown=projection["breakdown"],
-            injury_risk=projection["injury_risk"],
-            trending=projection["trend"]
-        )
+        player, = await sleeper_client.get_players_display([request.player_id])
+        return _projection_row(request.player_id, player, projection)
         
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         logger.error(f"Error generating player projection: {str(e)}")
         raise HTTPException(status_code=500, detail="Error generating projection")
 
+@app.post("/projections/players", response_model=BulkProjectionResponse)
+async def get_player_projections(request: BulkProjectionRequest, http_request: Request):
+    """
+    Project many players at once: shared week stats, batched features and one model call.
+    
+    With ``Accept: application/x-ndjson`` projections are streamed in batches
+    as they are computed, one JSON object per line, and errors are lines with
+    ``player_id`` and ``error``. Streamed responses are not cached.
+    """
+    if wants_ndjson(http_request):
+        if len(request.player_ids) > MAX_STREAMED_PROJECTIONS:
+            raise HTTPException(status_code=422, detail=f"At most {MAX_STREAMED_PROJECTIONS} player IDs per request")
+        return ndjson_response(_stream_player_projections(request))
+    if len(request.player_ids) > MAX_BULK_PROJECTIONS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BULK_PROJECTIONS} player IDs per request")
+    versions = await _data_versions("players", "week", "model")
+    key = response_cache.key("/projections/players", request, versions)
+    timer = StageTimer("projection_players")
+    return await response_cache.respond(http_request, key, lambda: _project_players(request, timer), timer)
+
+async def _project_players(request: BulkProjectionRequest, timer: StageTimer) -> Dict[str, Any]:
+    """Compute projections for a list of players, collecting per-player errors"""
+    try:
+        player_ids = list(dict.fromkeys(request.player_ids))
+        with timer.stage("fetch"):
+            all_players = await sleeper_client.get_all_players()
+        projections, errors = await _project_batch(player_ids, all_players, request, timer)
+        return {"projections": projections, "errors": errors}
+        
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating bulk projections: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error generating projections")
+
+async def _stream_player_projections(request: BulkProjectionRequest) -> AsyncIterator[List[Any]]:
+    """Projection rows and error rows, one batch of players at a time"""
+    timer = StageTimer("projection_players_stream")
+    player_ids = list(dict.fromkeys(request.player_ids))
+    with timer.stage("fetch"):
+        all_players = await sleeper_client.get_all_players()
+    for start in range(0, len(player_ids), STREAM_BATCH_SIZE):
+        projections, errors = await _project_batch(
+            player_ids[start:start + STREAM_BATCH_SIZE], all_players, request, timer
+        )
+        yield projections + [{"player_id": player_id, "error": error} for player_id, error in errors.items()]
+    timer.log()
+
+async def _project_batch(player_ids: List[str], all_players: Dict[str, Dict], request: BulkProjectionRequest,
+                         timer: StageTimer) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """Projections of a batch of unique player IDs, and reasons for the ones that failed"""
+    errors = {player_id: "Player not found" for player_id in player_ids if not all_players.get(player_id)}
+    found = [player_id for player_id in player_ids if player_id not in errors]
+    
+    # Each week's stats are fetched once for every player
+    with timer.stage("fetch"):
+        performance = await sleeper_client.get_players_stats(found, weeks=8)
+    players = [all_players[player_id] for player_id in found]
+    with timer.stage("features"):
+        processed = await executors.run(
+            "features",
+            data_processor.prepare_projection_data_batch,
+            players,
+            [performance[player_id] for player_id in found],
+            request.league_settings
+        )
+    
+    rows = [i for i, data in enumerate(processed) if data]
+    for i, data in enumerate(processed):
+        if not data:
+            errors[found[i]] = "Error preparing projection data"
+    with timer.stage("predict"):
+        batch = await executors.run(
+            "prediction", projection_models.predict_batch, [processed[i] for i in rows], request.weeks_ahead
+        ) if rows else None
+    
+    projections = []
+    display = await sleeper_client.get_players_display([found[i] for i in rows])
+    for j, i in enumerate(rows):
+        player_id = found[i]
+        try:
+            projections.append(_projection_row(player_id, display[j], PlayerProjectionModel.projection_at(batch, j)))
+        except Exception as e:
+            logger.warning(f"Error formatting projection for {player_id}: {str(e)}")
+            errors[player_id] = "Error generating projection"
+    return projections, errors
+
+def _projection_row(player_id: str, player: Optional[Dict], projection: Dict) -> Dict[str, Any]:
+    """
+    A ``PlayerProjectionResponse`` as a plain dict, from the player's display fields.
+    
+    Projection responses are serialized directly (see ``api.serialization``)
+    instead of being built as Pydantic models, so this must keep the model's
+    fields and types.
+    """
+    for field in DISPLAY_FIELDS:
+        if not isinstance((player or {}).get(field), str):
+            raise ValueError(f"Player {player_id} has no {field}")
+    return {
+        "player_id": player_id,
+        **player,
+        "projected_points": float(projection["points"]),
+        "confidence_interval": [float(bound) for bound in projection["confidence_interval"]],
+        "projection_breakdown": {category: float(points) for category, points in projection["breakdown"].items()},
+        "injury_risk": float(projection["injury_risk"]),
+        "trending": str(projection["trend"])
+    }
+
 @app.post("/waiver-wire/recommendations")
 async def get_waiver_recommendations(request: WaiverWireRequest) -> List[WaiverWireRecommendation]:
     """Get AI-powered waiver wire recommendations"""
+    timer = StageTimer("waiver_recommendations")
     try:
-        # Get league and team data
-        league_data = await sleeper_client.get_league(request.league_id)
-        team_data = await sleeper_client.get_team(request.team_id)
-        available_players = await sleeper_client.get_available_players(request.league_id)
+        with timer.stage("fetch"):
+            # Get league and team data
+            league_data = await sleeper_client.get_league(request.league_id)
+            team_data = await sleeper_client.get_team(request.team_id)
+            rosters = await sleeper_client.get_league_rosters(request.league_id)
+            available_players = await sleeper_client.get_available_players(request.league_id, rosters)
+            league_positions = await _get_league_positions(request.league_id, rosters)
+            trending_players = await sleeper_client.get_trending_players(add_drop="add", hours=24, limit=200)
         
         # Process data for recommendations
-        processed_data = data_processor.prepare_waiver_data(
-            team_data,
-            available_players,
-            league_data,
-            request.position_needs
-        )
+        with timer.stage("features"):
+            processed_data = await executors.run(
+                "features",
+                data_processor.prepare_waiver_data,
+                team_data,
+                available_players,
+                league_data,
+                request.position_needs,
+                league_positions,
+                trending_players
+            )
         
         # Generate recommendations
-        recommendations = waiver_model.recommend(
-            processed_data,
-            budget_constraint=request.budget_constraint
-        )
+        with timer.stage("predict"):
+            recommendations = await executors.run(
+                "prediction",
+                waiver_model.recommend,
+                processed_data,
+                budget_constraint=request.budget_constraint
+            )
         
-        # Format response
+        # Format response; display fields of every recommended player come from one registry lookup
+        display = await sleeper_client.get_players_display([rec["player_id"] for rec in recommendations])
         formatted_recommendations = []
-        for rec in recommendations:
-            player_data = await sleeper_client.get_player(rec["player_id"])
+        for rec, player in zip(recommendations, display):
+            if player is None:
+                logger.warning(f"Recommended player {rec['player_id']} is not in the players snapshot")
+                continue
             formatted_recommendations.append(
                 WaiverWireRecommendation(
                     player_id=rec["player_id"],
-                    player_name=player_data["full_name"],
-                    position=player_data["position"],
-                    team=player_data["team"],
+                    player_name=player["player_name"],
+                    position=player["position"],
+                    team=player["team"],
                     recommendation_score=rec["score"],
                     projected_points=rec["projected_points"],
                     ownership_percentage=rec["ownership"],
@@ -209,39 +621,61 @@ async def get_waiver_recommendations(request: WaiverWireRequest) -> List[WaiverW
         
         return formatted_recommendations
         
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         logger.error(f"Error generating waiver recommendations: {str(e)}")
         raise HTTPException(status_code=500, detail="Error generating recommendations")
 
 @app.post("/trade/analyze", response_model=TradeAnalysisResponse)
-async def analyze_trade(request: TradeAnalysisRequest):
+async def analyze_trade(request: TradeAnalysisRequest, http_request: Request):
     """Analyze a proposed trade with detailed metrics"""
+    timer = StageTimer("trade_analyze")
+    # The analysis reads the team's roster and the league's settings, so both version the key;
+    # they are fetched once here and handed to the analysis
+    with timer.stage("context"):
+        team_data, league_data = await asyncio.gather(
+            timer.run("team", sleeper_client.get_team(request.team_id)),
+            timer.run("league", sleeper_client.get_league(request.league_id))
+        )
+    versions = await _data_versions("players", "week")
+    versions["roster"] = _content_version(team_data)
+    versions["league"] = _content_version(league_data)
+    key = response_cache.key("/trade/analyze", request, versions)
+    response = await response_cache.respond(
+        http_request, key, lambda: _analyze_trade(request, team_data, league_data, timer), timer
+    )
+    response.headers["Server-Timing"] = timer.server_timing()
+    return response
+
+async def _analyze_trade(request: TradeAnalysisRequest, team_data: Dict, league_data: Dict,
+                         timer: StageTimer) -> TradeAnalysisResponse:
+    """Compute a trade analysis"""
     try:
-        # Get player data for all involved players
-        giving_data = []
-        for player_id in request.giving_players:
-            player = await sleeper_client.get_player(player_id)
-            stats = await sleeper_client.get_player_stats(player_id, weeks=16)
-            giving_data.append({"player": player, "stats": stats})
+        # Players and one stats fan-out for both sides, at once
+        player_ids = list(dict.fromkeys(request.giving_players + request.receiving_players))
+        with timer.stage("fetch"):
+            all_players, stats = await gather_bounded(
+                settings.request_concurrency,
+                timer.run("players", sleeper_client.get_all_players()),
+                timer.run("stats", sleeper_client.get_players_stats(
+                    player_ids, weeks=16, concurrency=settings.request_concurrency
+                ))
+            )
         
-        receiving_data = []
-        for player_id in request.receiving_players:
-            player = await sleeper_client.get_player(player_id)
-            stats = await sleeper_client.get_player_stats(player_id, weeks=16)
-            receiving_data.append({"player": player, "stats": stats})
-        
-        # Get team context
-        team_data = await sleeper_client.get_team(request.team_id)
-        league_data = await sleeper_client.get_league(request.league_id)
+        giving_data = [{"player": all_players.get(pid, {}), "stats": stats[pid]} for pid in request.giving_players]
+        receiving_data = [{"player": all_players.get(pid, {}), "stats": stats[pid]} for pid in request.receiving_players]
         
         # Analyze trade
-        analysis = trade_analyzer.analyze(
-            giving_data,
-            receiving_data,
-            team_data,
-            league_data,
-            request.draft_picks
-        )
+        with timer.stage("analyze"):
+            analysis = trade_analyzer.analyze(
+                giving_data,
+                receiving_data,
+                team_data,
+                league_data,
+                request.draft_picks
+            )
+        timer.log()
         
         return TradeAnalysisResponse(**analysis)
         
@@ -249,27 +683,53 @@ async def analyze_trade(request: TradeAnalysisRequest):
         logger.error(f"Error analyzing trade: {str(e)}")
         raise HTTPException(status_code=500, detail="Error analyzing trade")
 
+@app.post("/trade/search", response_model=TradeSearchResponse)
+async def search_trades(request: TradeSearchRequest):
+    """Search every roster in the league for mutually beneficial trades"""
+    try:
+        team_data = await sleeper_client.get_team(request.team_id)
+        result = await _search_trades(request.league_id, team_data, top_n=request.max_results)
+        if "error" in result:
+            raise HTTPException(status_code=500, detail="Error searching trades")
+        
+        return TradeSearchResponse(**result)
+        
+    except (HTTPException, ExecutorSaturated):
+        raise
+    except Exception as e:
+        logger.error(f"Error searching trades: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error searching trades")
+
 @app.post("/dynasty/value", response_model=DynastyValueResponse)
-async def get_dynasty_value(request: DynastyValueRequest):
+async def get_dynasty_value(request: DynastyValueRequest, http_request: Request):
     """Get comprehensive dynasty value analysis for a player"""
+    versions = await _data_versions("players", "dynasty_table")
+    key = response_cache.key("/dynasty/value", request, versions)
+    return await response_cache.respond(http_request, key, lambda: _value_dynasty(request))
+
+async def _value_dynasty(request: DynastyValueRequest) -> DynastyValueResponse:
+    """Compute a dynasty value analysis"""
     try:
         # Get player data
         player_data = await sleeper_client.get_player(request.player_id)
         if not player_data:
             raise HTTPException(status_code=404, detail="Player not found")
         
-        # Get historical performance
-        historical_data = await sleeper_client.get_player_career_stats(request.player_id)
-        
-        # Process for dynasty model
-        processed_data = data_processor.prepare_dynasty_data(
-            player_data,
-            historical_data,
-            request.league_settings
-        )
-        
-        # Generate dynasty analysis
-        analysis = dynasty_model.analyze(processed_data)
+        # Precomputed value table first; value the player on the fly if it is missing
+        analysis = dynasty_model.lookup(request.player_id)
+        if analysis is None:
+            # Get historical performance
+            historical_data = await sleeper_client.get_player_career_stats(request.player_id)
+            
+            # Process for dynasty model
+            processed_data = data_processor.prepare_dynasty_data(
+                player_data,
+                historical_data,
+                request.league_settings
+            )
+            
+            # Generate dynasty analysis
+            analysis = dynasty_model.analyze(processed_data)
         
         return DynastyValueResponse(
             player_id=request.player_id,
@@ -288,66 +748,507 @@ async def get_dynasty_value(request: DynastyValueRequest):
         logger.error(f"Error analyzing dynasty value: {str(e)}")
         raise HTTPException(status_code=500, detail="Error analyzing dynasty value")
 
+def _with_display(batches: Iterable[List[Dict]], registry: PlayerRegistry) -> Iterator[List[Dict]]:
+    """Add each player's name and team to batches of dynasty table records"""
+    for batch in batches:
+        display = registry.hydrate([record["player_id"] for record in batch], fields=("player_name", "team"))
+        for record, player in zip(batch, display):
+            record.update(player or {"player_name": None, "team": None})
+        yield batch
+
+@app.get("/dynasty/table")
+async def get_dynasty_table(http_request: Request, league_id: Optional[str] = None,
+                            position: Optional[str] = None):
+    """
+    Dynasty values of every player, or of the players rostered in a league.
+    
+    With ``Accept: application/x-ndjson`` rows are streamed, one JSON object per line.
+    """
+    try:
+        table = dynasty_model.table
+        if table is None:
+            players = await sleeper_client.get_all_players()
+            table = await executors.run("features", DynastyValueTable.build, players)
+        
+        rows = None
+        if league_id:
+            rosters = await sleeper_client.get_league_rosters(league_id)
+            rows = table.rows(player_id for roster in rosters for player_id in roster.get("players") or [])
+        if position:
+            rows = np.arange(len(table)) if rows is None else rows
+            rows = rows[table.columns["position"][rows] == position]
+        
+        registry = await sleeper_client.get_player_registry()
+        batches = _with_display(table.records(rows), registry)
+        if wants_ndjson(http_request):
+            return ndjson_response(batches, headers={"X-Table-Version": str(table.version)})
+        return FastJSONResponse({
+            "table_version": table.version,
+            "players": [record for batch in batches for record in batch]
+        })
+        
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing dynasty values: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error listing dynasty values")
+
+@app.get("/leagues/{league_id}/odds")
+async def get_league_odds(league_id: str):
+    """Playoff, bye and championship probabilities for every roster in a league"""
+    try:
+        return await _simulate_league_odds(league_id)
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        logger.error(f"Error simulating league odds: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error simulating league odds")
+
+@app.post("/leagues/odds/refresh")
+async def refresh_league_odds():
+    """Bring every tracked league's odds up to date (run after each week finalizes)"""
+    refreshed = {}
+    for league_id in list(odds_trackers):
+        try:
+            odds = await _simulate_league_odds(league_id)
+            refreshed[league_id] = {"remaining_weeks": odds["remaining_weeks"]}
+        except Exception as e:
+            logger.error(f"Error refreshing odds for league {league_id}: {str(e)}")
+            refreshed[league_id] = {"error": str(e)}
+    return {"leagues": refreshed}
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest, response: Response):
+    """
+    Queue a long-running job and return its ID; poll ``GET /jobs/{job_id}`` for the result.
+    
+    Submitting the same kind and parameters as a queued, running or unexpired
+    finished job returns that job instead of starting another.
+    """
+    if request.kind not in JOB_KINDS:
+        raise HTTPException(status_code=422, detail=f"Unknown job kind; expected one of {sorted(JOB_KINDS)}")
+    model, _, _, check, version, _ = JOB_KINDS[request.kind]
+    try:
+        params = model(**request.params)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    if check is not None:
+        try:
+            check(params)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    
+    try:
+        job, created = await jobs.submit(
+            request.kind, params.model_dump(), priority=request.priority,
+            version=await version(params) if version is not None else None
+        )
+    except JobQueueFull as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=503, detail="Too many queued jobs, retry later", headers={"Retry-After": "30"})
+    
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return {**job.as_dict(), "deduplicated": not created}
+
+@app.get("/jobs")
+async def list_jobs():
+    """Queued, running and unexpired finished jobs, and dispatcher stats"""
+    items = await jobs.list()
+    return {**jobs.stats(), "items": items}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a job, with its result once it has succeeded"""
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return FastJSONResponse(job.as_dict(include_result=True))
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = await jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job.as_dict()
+
+async def _league_odds_job(params: LeagueOddsJob) -> Dict:
+    return await _simulate_league_odds(params.league_id)
+
+async def _league_odds_version(params: LeagueOddsJob) -> str:
+    """Odds change with each completed week and with the rosters"""
+    versions = await _data_versions("week")
+    rosters = await sleeper_client.get_league_rosters(params.league_id)
+    return f"{versions['week']}:{_rosters_version(rosters)}"
+
+async def _trade_search_version(params: TradeSearchRequest) -> str:
+    """Same version as the jobs team insights queue, so both share results"""
+    return _rosters_version(await sleeper_client.get_league_rosters(params.league_id))
+
+async def _trade_search_job(params: TradeSearchRequest) -> Dict:
+    team_data = await sleeper_client.get_team(params.team_id)
+    result = await _search_trades(params.league_id, team_data, top_n=params.max_results)
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return result
+
+async def _backtest_version(params: BacktestJob) -> str:
+    """The current season's history grows each week"""
+    return (await _data_versions("week"))["week"]
+
+def _backtest_predictors(params: BacktestJob) -> Dict[str, str]:
+    """
+    Artifact directory of each requested registry version; clients never name server paths.
+    
+    Versions must record their training cutoff, so the backtest only scores weeks after it.
+    """
+    if params.models and projection_models.registry is None:
+        raise ValueError("Backtesting models needs a model registry (ANALYTICS_MODEL_REGISTRY_PATH)")
+    registry = projection_models.registry
+    predictors = {name: registry.resolve(version) for name, version in params.models.items()}
+    for version in params.models.values():
+        if training_cutoff(registry.metadata(version)) is None:
+            raise ValueError(f"Model version {version} has no recorded training cutoff (a data_version "
+                             f"such as 2024w6), so it cannot be backtested without look-ahead")
+    return predictors
+
+async def _backtest_job(params: BacktestJob) -> Dict:
+    predictors = _backtest_predictors(params)
+    history = await fetch_history(params.seasons, client=sleeper_client)
+    backtester = Backtester(history, {HEURISTIC: None, **predictors}, lookback=params.lookback,
+                            n_jobs=settings.process_workers)
+    report = await executors.run("backtest", backtester.run, params.seasons)
+    if "error" in report:
+        raise RuntimeError(report["error"])
+    return report
+
+def _training_data_path(params: TrainingJob) -> str:
+    """
+    Training data file under the configured data directory; clients never name other paths.
+    
+    Trained models are only kept by publishing them, so a registry is required too.
+    """
+    if not settings.model_registry_path:
+        raise ValueError("Training jobs publish to the model registry, and ANALYTICS_MODEL_REGISTRY_PATH is not set")
+    if not settings.training_data_dir:
+        raise ValueError("Training jobs need a training data directory (ANALYTICS_TRAINING_DATA_DIR)")
+    return resolve_training_data(settings.training_data_dir, params.training_data)
+
+async def _training_job(params: TrainingJob) -> Dict:
+    training_data = _training_data_path(params)
+    # Published to the registry the API serves from, which picks up an activated version on its next poll
+    report = await executors.run(
+        "training", train_and_publish, training_data, data_version=params.data_version,
+        registry=settings.model_registry_path, activate=params.activate
+    )
+    if "error" in report:
+        raise RuntimeError(report["error"])
+    return report
+
+def _weekly_update_registry(params: WeeklyUpdateJob) -> str:
+    """Registry whose active version the week is folded into"""
+    if not settings.model_registry_path:
+        raise ValueError("Weekly updates publish to the model registry, and ANALYTICS_MODEL_REGISTRY_PATH is not set")
+    return settings.model_registry_path
+
+async def _weekly_update_job(params: WeeklyUpdateJob) -> Dict:
+    registry_path = _weekly_update_registry(params)
+    weeks = range(max(1, params.week - params.lookback + 1), params.week + 1)
+    history = await fetch_history([params.season], weeks=weeks, client=sleeper_client)
+    # Only players who played the week are sent to the worker process
+    played = history["stats"].get(params.season, {}).get(str(params.week), {})
+    history["players"] = {pid: history["players"][pid] for pid in played if pid in history["players"]}
+    # Published and activated only if holdout MAE holds; serving picks it up on its next registry poll
+    return await executors.run(
+        "weekly_update", finalize_week_from_history, registry_path, history,
+        params.season, params.week, lookback=params.lookback
+    )
+
+def _job_handler(model, handler):
+    """Handler of stored job params: parse them into the kind's parameter model"""
+    async def run(params: Dict[str, Any]) -> Any:
+        return await handler(model(**params))
+    return run
+
+# kind -> (parameter model, handler, most jobs of the kind running at once per replica,
+# check of the params at submission raising ValueError (answered with 422), version of the
+# data the job reads so stored results are not reused once it changes, and whether a
+# succeeded job answers later submissions)
+JOB_KINDS = {
+    "league_odds": (LeagueOddsJob, _league_odds_job, 2, None, _league_odds_version, True),
+    "trade_search": (TradeSearchRequest, _trade_search_job, 2, None, _trade_search_version, True),
+    "backtest": (BacktestJob, _backtest_job, 1, _backtest_predictors, _backtest_version, True),
+    # Every submission trains and publishes a new model
+    "training": (TrainingJob, _training_job, 1, _training_data_path, None, False),
+    # Queued as weeks finalize (see _queue_weekly_updates); a week already covered is skipped
+    "weekly_update": (WeeklyUpdateJob, _weekly_update_job, 1, _weekly_update_registry, None, True),
+}
+for kind, (model, handler, limit, _, _, reuse_results) in JOB_KINDS.items():
+    jobs.register(kind, _job_handler(model, handler), limit=limit, reuse_results=reuse_results)
+
 @app.get("/analytics/insights/{team_id}")
-async def get_team_insights(team_id: str):
+async def get_team_insights(team_id: str, response: Response):
     """Get comprehensive team insights and recommendations"""
+    timer = StageTimer("team_insights")
     try:
         # Get team data
-        team_data = await sleeper_client.get_team(team_id)
-        league_data = await sleeper_client.get_league(team_data["league_id"])
+        with timer.stage("team"):
+            team_data = await sleeper_client.get_team(team_id)
+        with timer.stage("league"):
+            league_data, rosters = await asyncio.gather(
+                sleeper_client.get_league(team_data["league_id"]),
+                sleeper_client.get_league_rosters(team_data["league_id"])
+            )
+        with timer.stage("league_positions"):
+            league_positions = await _get_league_positions(team_data["league_id"], rosters)
         
-        # Generate insights
-        insights = {
-            "team_strength": await _analyze_team_strength(team_data),
-            "position_analysis": await _analyze_positions(team_data),
-            "age_analysis": await _analyze_team_age(team_data),
-            "trade_opportunities": await _find_trade_opportunities(team_data, league_data),
-            "draft_strategy": await _generate_draft_strategy(team_data, league_data),
-            "waiver_priorities": await _get_waiver_priorities(team_data),
-            "championship_odds": await _calculate_championship_odds(team_data, league_data)
+        # Generate insights; the helpers only depend on the data above
+        helpers = {
+            "team_strength": _analyze_team_strength(team_data),
+            "position_analysis": _analyze_positions(team_data, league_positions),
+            "age_analysis": _analyze_team_age(team_data),
+            "trade_opportunities": _find_trade_opportunities(team_data, league_data, rosters, league_positions),
+            "draft_strategy": _generate_draft_strategy(team_data, league_data),
+            "waiver_priorities": _get_waiver_priorities(team_data, league_positions),
+            "championship_odds": _calculate_championship_odds(team_data, league_data, rosters)
         }
+        # A failing helper (or a saturated executor) leaves only its own field empty
+        with timer.stage("insights"):
+            results = await gather_bounded(
+                settings.request_concurrency,
+                *(timer.run(name, helper) for name, helper in helpers.items()),
+                return_exceptions=True
+            )
+        insights = {}
+        for name, result in zip(helpers, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Insight {name} failed for team {team_id}: {str(result) or type(result).__name__}")
+                result = None
+            insights[name] = result
         
+        response.headers["Server-Timing"] = timer.server_timing()
+        timer.log()
         return insights
         
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         logger.error(f"Error generating team insights: {str(e)}")
         raise HTTPException(status_code=500, detail="Error generating insights")
 
 # Helper functions
+async def _data_versions(*names: str) -> Dict[str, Any]:
+    """
+    Version tokens of the data a response depends on, for response cache keys
+    
+    players: Sleeper players snapshot; week: current NFL season and week (new
+    stats); model: serving projection model; dynasty_table: dynasty value table.
+    """
+    versions = {}
+    for name in names:
+        if name == "players":
+            # Refreshes an expired snapshot first, so the version is never missing or stale
+            await sleeper_client.get_all_players()
+            versions[name] = sleeper_client.players_version
+        elif name == "week":
+            nfl_state = await sleeper_client.get_nfl_state()
+            versions[name] = f"{nfl_state.get('season')}:{nfl_state.get('week')}"
+        elif name == "model":
+            versions[name] = projection_models.version or projection_models.model.artifact_path
+        elif name == "dynasty_table":
+            versions[name] = dynasty_model.table.version if dynasty_model.table is not None else None
+    return versions
+
+def _content_version(value: Any) -> str:
+    """Version token of fetched data (a roster, league settings): a hash of its content"""
+    return hashlib.sha256(dumps(value, sort_keys=True)).hexdigest()[:16]
+
+def _rosters_version(rosters: Optional[List[Dict]]) -> str:
+    """Version token of a league's rosters: changes with any trade, waiver claim or drop"""
+    players = sorted((str(roster.get("roster_id")), sorted(roster.get("players") or [])) for roster in rosters or [])
+    return hashlib.sha256(dumps(players)).hexdigest()[:16]
+
+async def _get_league_positions(league_id: str, rosters: Optional[List[Dict]] = None) -> Dict[str, Dict]:
+    """Get the cached league-wide positional analysis for every roster"""
+    if rosters is None:
+        rosters = await sleeper_client.get_league_rosters(league_id)
+    players = await sleeper_client.get_all_players()
+    return data_processor.analyze_league_positions(
+        league_id,
+        rosters or [],
+        players,
+        data_version=sleeper_client.players_version
+    )
+
 async def _analyze_team_strength(team_data):
     """Analyze overall team strength"""
-    # Implementation for team strength analysis
-    pass
+    player_ids = team_data.get("players") or []
+    players = None if dynasty_model.table is not None else await sleeper_client.get_all_players()
+    return dynasty_model.team_score(player_ids, players)
 
-async def _analyze_positions(team_data):
+async def _analyze_positions(team_data, league_positions):
     """Analyze positional strengths and weaknesses"""
-    # Implementation for position analysis
-    pass
+    return data_processor.team_positions(team_data, league_positions)
 
 async def _analyze_team_age(team_data):
     """Analyze team age profile"""
     # Implementation for age analysis
     pass
 
-async def _find_trade_opportunities(team_data, league_data):
-    """Find potential trade opportunities"""
-    # Implementation for trade opportunity finder
-    pass
+async def _search_trades(league_id: str, team_data: Dict, rosters: Optional[List[Dict]] = None,
+                         league_positions: Optional[Dict[str, Dict]] = None, top_n: int = 10) -> Dict:
+    """Run the league-wide trade search for a team"""
+    if rosters is None:
+        rosters = await sleeper_client.get_league_rosters(league_id)
+    if league_positions is None:
+        league_positions = await _get_league_positions(league_id, rosters)
+    players = await sleeper_client.get_all_players()
+    
+    rostered = [pid for roster in rosters or [] for pid in (roster.get("players") or [])]
+    values = data_processor.player_values(rostered, players)
+    
+    # Runs in a worker process; send only the rostered players
+    return await executors.run(
+        "trade_search",
+        trade_analyzer.find_trades,
+        team_data.get("roster_id"),
+        rosters or [],
+        {pid: players[pid] for pid in rostered if pid in players},
+        league_positions,
+        dict(zip(rostered, values.tolist())),
+        top_n=top_n
+    )
+
+async def _find_trade_opportunities(team_data, league_data, rosters, league_positions):
+    """
+    Trade search results for the team, from a background trade search job.
+    
+    The league-wide search is the heaviest operation in the service, so
+    insights never run it inline: they queue a low-priority job (shared with
+    other requests and replicas for the same rosters) and report its trades
+    once it has succeeded, and its status until then.
+    """
+    params = TradeSearchRequest(league_id=team_data["league_id"], team_id=team_data["team_id"], max_results=5)
+    job, _ = await jobs.submit("trade_search", params.model_dump(), priority=INSIGHT_JOB_PRIORITY,
+                               version=_rosters_version(rosters))
+    return {
+        "status": job.status,
+        "job_id": job.id,
+        "trades": job.result.get("trades", []) if job.status == SUCCEEDED else []
+    }
 
 async def _generate_draft_strategy(team_data, league_data):
     """Generate draft strategy recommendations"""
     # Implementation for draft strategy
     pass
 
-async def _get_waiver_priorities(team_data):
+async def _get_waiver_priorities(team_data, league_positions):
     """Get waiver wire priorities"""
-    # Implementation for waiver priorities
-    pass
+    position_analysis = data_processor.team_positions(team_data, league_positions)
+    return data_processor.position_needs(position_analysis)
+
+async def _simulate_league_odds(league_id: str, league_data: Optional[Dict] = None,
+                                rosters: Optional[List[Dict]] = None) -> Dict:
+    """
+    Championship odds for a league from its cached simulation state.
+    
+    The first request simulates the whole remaining season. Later requests only
+    fold in weeks completed since then and redraw the games of rosters whose
+    starting strength changed (e.g. after a trade).
+    """
+    league_data = league_data or await sleeper_client.get_league(league_id)
+    if rosters is None:
+        rosters = await sleeper_client.get_league_rosters(league_id)
+    playoff_format = PlayoffFormat.from_league(league_data)
+    
+    nfl_state = await sleeper_client.get_nfl_state()
+    season = str(league_data.get("season"))
+    in_season = nfl_state.get("season_type") == "regular" and str(nfl_state.get("season")) == season
+    last_completed_week = min(int(nfl_state.get("week") or 1) - 1 if in_season else 0,
+                              playoff_format.playoff_week_start - 1)
+    strength = _roster_strength(await _get_league_positions(league_id, rosters))
+    if in_season:
+        await _queue_weekly_updates(season, last_completed_week)
+    
+    entry = odds_trackers.get(league_id)
+    if entry is None or entry["season"] != season or entry["last_completed_week"] > last_completed_week:
+        entry = {"lock": asyncio.Lock(), "tracker": None, "season": season,
+                 "last_completed_week": last_completed_week, "strength": strength}
+        odds_trackers[league_id] = entry
+        while len(odds_trackers) > settings.odds_tracked_leagues:
+            odds_trackers.popitem(last=False)
+    odds_trackers.move_to_end(league_id)
+    
+    async with entry["lock"]:
+        tracker = entry["tracker"]
+        if tracker is None:
+            weeks = list(range(1, playoff_format.playoff_week_start))
+            week_matchups = await asyncio.gather(*(sleeper_client.get_league_matchups(league_id, week) for week in weeks))
+            state = SeasonState.from_sleeper(rosters, dict(zip(weeks, week_matchups)), last_completed_week, playoff_format)
+            # Built on a thread and kept here for incremental updates (ANALYTICS_ODDS_WORKERS
+            # shards the simulation over processes that only return per-shard totals)
+            tracker = await executors.run(
+                "simulation", SeasonOddsTracker, state,
+                n_sims=settings.odds_simulations, n_jobs=settings.odds_workers
+            )
+            entry["tracker"] = tracker
+        else:
+            new_weeks = list(range(entry["last_completed_week"] + 1, last_completed_week + 1))
+            week_matchups = await asyncio.gather(*(sleeper_client.get_league_matchups(league_id, week) for week in new_weeks))
+            for week, matchups in zip(new_weeks, week_matchups):
+                await executors.run("odds_update", tracker.finalize_week, week, matchups)
+            
+            # Scale the weekly scoring of rosters whose starters changed
+            for roster_id, value in strength.items():
+                previous = entry["strength"].get(roster_id)
+                if roster_id in tracker.state.roster_ids and previous and value and value != previous:
+                    team = tracker.state.roster_ids.index(roster_id)
+                    mean = tracker.means[team] * float(np.clip(value / previous, 0.8, 1.2))
+                    await executors.run("odds_update", tracker.update_team, roster_id, mean)
+        
+        entry["last_completed_week"] = last_completed_week
+        entry["strength"] = strength
+        odds = await executors.run("odds_update", tracker.odds)
+    
+    return {"league_id": league_id, **odds}
+
+async def _queue_weekly_updates(season: str, last_completed_week: int) -> None:
+    """
+    Queue a weekly model update for each finalized week after the active version's training cutoff.
+    
+    Each week is submitted once per process; the job store deduplicates
+    submissions from other replicas. A failed submission never fails the odds.
+    """
+    if projection_models.registry is None or (season, last_completed_week) in weekly_updates_queued:
+        return
+    try:
+        registry = projection_models.registry
+        active = registry.active_version()
+        cutoff = training_cutoff(registry.metadata(active)) if active else None
+        # Without a cutoff in this season, only the latest week is folded in
+        first_week = cutoff[1] + 1 if cutoff and cutoff[0] == int(season) else last_completed_week
+        for week in range(max(first_week, FIRST_UPDATE_WEEK), last_completed_week + 1):
+            if (season, week) not in weekly_updates_queued:
+                await jobs.submit("weekly_update", WeeklyUpdateJob(season=season, week=week).model_dump())
+                weekly_updates_queued.add((season, week))
+        weekly_updates_queued.add((season, last_completed_week))
+    except Exception as e:
+        logger.warning(f"Error queueing weekly model updates for {season}: {str(e)}")
 
-async def _calculate_championship_odds(team_data, league_data):
+def _roster_strength(league_positions: Dict[str, Dict]) -> Dict[str, float]:
+    """Total starter strength per roster from the league positional analysis"""
+    return {
+        roster_id: sum(info["score"] for info in positions.values())
+        for roster_id, positions in league_positions.items()
+    }
+
+async def _calculate_championship_odds(team_data, league_data, rosters=None):
     """Calculate championship probability"""
-    # Implementation for championship odds
-    pass
+    odds = await _simulate_league_odds(team_data["league_id"], league_data, rosters)
+    team_odds = odds["teams"].get(str(team_data.get("roster_id")))
+    if team_odds is None:
+        return None
+    return {**team_odds, "simulations": odds["simulations"]}
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,147 @@
+"""
+Prometheus metrics: request and stage latency histograms, and gauges read at scrape time
+
+Everything is kept in the default registry of one process, so the API is
+served by a single uvicorn worker per scrape target (scaled with replicas).
+"""
+
+import time
+import logging
+from typing import Callable, Dict, Any, Iterable
+
+from fastapi import Response
+from prometheus_client import Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# Upstream fetches take tens of milliseconds to seconds; model and feature stages are sub-millisecond
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+STAGE_SECONDS = Histogram(
+    "analytics_stage_duration_seconds", "Latency of one stage of a request (fetch, features, predict, ...)",
+    ["endpoint", "stage"], buckets=LATENCY_BUCKETS
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency by route template.
+
+    Labels use the matched route's path (``/leagues/{league_id}/odds``), never
+    the raw URL, so label cardinality stays bounded; unmatched paths share one
+    label. Implemented as plain ASGI rather than ``BaseHTTPMiddleware`` to
+    avoid wrapping every response body.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_SECONDS.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status)
+            ).observe(time.perf_counter() - start)
+
+
+class AnalyticsCollector:
+    """
+    Gauges of in-process state, read only when Prometheus scrapes.
+
+    ``sources`` maps a name to a zero-argument callable returning current
+    stats; nothing is computed on the request path.
+    """
+
+    def __init__(self, sources: Dict[str, Callable[[], Any]]):
+        self.sources = sources
+
+    def collect(self) -> Iterable:
+        try:
+            yield from self._collect()
+        except Exception as e:
+            logger.error(f"Error collecting metrics: {str(e)}")
+
+    def _collect(self) -> Iterable:
+        pending = 0
+        if "response_cache" in self.sources:
+            cache = self.sources["response_cache"]()
+            yield GaugeMetricFamily("analytics_response_cache_entries", "Cached responses", value=cache["entries"])
+            yield GaugeMetricFamily("analytics_response_cache_bytes", "Bytes of cached response bodies",
+                                    value=cache["bytes"])
+            yield CounterMetricFamily("analytics_response_cache_hits", "Response cache hits", value=cache["hits"])
+            yield CounterMetricFamily("analytics_response_cache_misses", "Response cache misses",
+                                      value=cache["misses"])
+            yield CounterMetricFamily("analytics_response_cache_coalesced",
+                                      "Response cache misses that waited for the same key's computation",
+                                      value=cache["coalesced"])
+            yield CounterMetricFamily("analytics_response_cache_evictions", "Response cache evictions",
+                                      value=cache["evictions"])
+
+        if "caches" in self.sources:
+            sizes = GaugeMetricFamily("analytics_cache_entries", "Entries in in-process data caches", labels=["cache"])
+            for name, size in self.sources["caches"]().items():
+                sizes.add_metric([name], size)
+            yield sizes
+
+        if "executors" in self.sources:
+            executors = self.sources["executors"]()
+            in_flight = GaugeMetricFamily("analytics_executor_in_flight", "Running plus queued tasks",
+                                          labels=["executor"])
+            queued = GaugeMetricFamily("analytics_executor_queue_depth", "Tasks waiting for a worker",
+                                       labels=["executor"])
+            capacity = GaugeMetricFamily("analytics_executor_capacity", "Tasks accepted before shedding load",
+                                         labels=["executor"])
+            rejected = CounterMetricFamily("analytics_executor_rejected", "Tasks rejected at capacity",
+                                           labels=["executor"])
+            for name, stats in executors.items():
+                depth = max(0, stats["in_flight"] - stats["workers"])
+                pending += depth
+                in_flight.add_metric([name], stats["in_flight"])
+                queued.add_metric([name], depth)
+                capacity.add_metric([name], stats["capacity"])
+                rejected.add_metric([name], stats["rejected"])
+            yield from (in_flight, queued, capacity, rejected)
+
+        if "jobs" in self.sources:
+            jobs = self.sources["jobs"]()
+            by_status = GaugeMetricFamily("analytics_jobs", "Background jobs by status", labels=["status"])
+            for status, count in jobs["jobs"].items():
+                by_status.add_metric([status], count)
+            yield by_status
+            yield CounterMetricFamily("analytics_jobs_failed", "Background jobs that failed", value=jobs["failed"])
+            pending += jobs["jobs"]["queued"]
+
+        # Work accepted but not yet started: queued jobs plus tasks waiting for an executor
+        yield GaugeMetricFamily("analytics_pending_jobs", "Analytics work waiting to run", value=pending)
+
+        if "event_loop_lag" in self.sources:
+            lag = self.sources["event_loop_lag"]()
+            yield GaugeMetricFamily("analytics_event_loop_lag_seconds", "Most recent event-loop lag",
+                                    value=lag["last_seconds"])
+            yield GaugeMetricFamily("analytics_event_loop_lag_max_seconds", "Largest event-loop lag seen",
+                                    value=lag["max_seconds"])
+
+
+def metrics_response() -> Response:
+    """Prometheus text exposition of the default registry"""
+    return Response(content=generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
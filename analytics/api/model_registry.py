@@ -0,0 +1,316 @@
+"""
+Versioned model registry and hot-swapping model manager
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable, Union, Tuple
+
+import numpy as np
+
+from .models import PlayerProjectionModel
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_POINTER = "ACTIVE"
+METADATA_FILE = "metadata.json"
+
+
+def training_cutoff(metadata: Dict) -> Optional[Tuple[int, int]]:
+    """
+    Last (season, week) a published version was trained on, if recorded.
+
+    Weekly updates record ``season`` and ``week``; trained versions record a
+    ``data_version`` such as "2024w6" ("2024" alone covers the whole season).
+    """
+    if metadata.get("season") is not None and metadata.get("week") is not None:
+        return int(metadata["season"]), int(metadata["week"])
+    match = re.fullmatch(r"(\d{4})(?:w(\d{1,2}))?", str(metadata.get("data_version") or ""))
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2) or 99)
+
+
+class ModelRegistry:
+    """
+    Directory of versioned model artifacts with a pointer to the active version.
+
+    Layout::
+
+        <root>/versions/<version>/   artifact directory plus metadata.json
+        <root>/ACTIVE                name of the active version
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.versions_dir = os.path.join(root, "versions")
+        os.makedirs(self.versions_dir, exist_ok=True)
+
+    def version_path(self, version: str) -> str:
+        """Artifact directory of a version"""
+        return os.path.join(self.versions_dir, version)
+
+    def resolve(self, version: str) -> str:
+        """Artifact directory of a published version named by a client; anything else is a ValueError"""
+        if version in ("", ".", "..") or os.path.basename(version) != version or \
+                not os.path.isfile(os.path.join(self.version_path(version), METADATA_FILE)):
+            raise ValueError(f"Unknown model version: {version}")
+        return self.version_path(version)
+
+    def versions(self) -> List[Dict]:
+        """Metadata of every published version, oldest first"""
+        versions = [self.metadata(name) for name in os.listdir(self.versions_dir)
+                    if os.path.isfile(os.path.join(self.versions_dir, name, METADATA_FILE))]
+        return sorted(versions, key=lambda meta: meta.get("published_at", ""))
+
+    def metadata(self, version: str) -> Dict:
+        """Metadata recorded when a version was published"""
+        with open(os.path.join(self.version_path(version), METADATA_FILE)) as f:
+            return json.load(f)
+
+    def active_version(self) -> Optional[str]:
+        """Name of the active version, if any"""
+        try:
+            with open(os.path.join(self.root, ACTIVE_POINTER)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(self, model: PlayerProjectionModel, version: Optional[str] = None,
+                metadata: Optional[Dict] = None, activate: bool = False) -> str:
+        """
+        Save a trained model as a new version and optionally activate it.
+        
+        Anything with a ``save_model(path)`` method can be published, e.g. the
+        dynasty value table.
+        """
+        version = version or datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+        path = self.version_path(version)
+        if os.path.exists(path):
+            raise ValueError(f"Model version already exists: {version}")
+
+        if not model.save_model(path):
+            raise RuntimeError(f"Could not save model version {version}")
+
+        meta = {
+            "version": version,
+            "published_at": datetime.utcnow().isoformat(),
+            "model_class": type(model).__name__,
+            **(metadata or {})
+        }
+        self._write_atomic(os.path.join(path, METADATA_FILE), json.dumps(meta, indent=2))
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version: str) -> None:
+        """Point the registry at a version; readers see either the old or new pointer"""
+        if not os.path.isfile(os.path.join(self.version_path(version), METADATA_FILE)):
+            raise ValueError(f"Unknown model version: {version}")
+        self._write_atomic(os.path.join(self.root, ACTIVE_POINTER), version)
+
+    def _write_atomic(self, path: str, content: str) -> None:
+        """Write a file through a temporary file and rename"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+class ModelManager:
+    """
+    Serves the active registry version and swaps in new versions without restarts.
+
+    Request handlers take ``manager.model`` once and keep using that object, so a
+    swap never interrupts a request in flight. New versions are loaded and warmed
+    up in a background thread before the reference is replaced.
+
+    With ``shadow`` enabled a new version is not promoted automatically. It is held
+    as a shadow model, live predictions are mirrored to it in the background, and
+    latency and prediction differences are accumulated until ``promote_shadow``.
+    """
+
+    def __init__(self, registry: Optional[ModelRegistry] = None,
+                 model: Optional[PlayerProjectionModel] = None,
+                 mmap_mode: Optional[str] = "r", shadow: bool = False,
+                 model_factory: Callable[..., PlayerProjectionModel] = PlayerProjectionModel):
+        self.registry = registry
+        self.mmap_mode = mmap_mode
+        self.shadow = shadow
+        self.model_factory = model_factory
+
+        self.version = registry.active_version() if registry else None
+        if model is None:
+            artifact_path = registry.version_path(self.version) if self.version else None
+            model = model_factory(artifact_path=artifact_path, mmap_mode=mmap_mode)
+        self.model = model
+
+        self.shadow_model = None
+        self.shadow_version = None
+        self.shadow_stats = self._empty_shadow_stats()
+        self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._shadow_busy = threading.Lock()
+        self._refresh_lock = asyncio.Lock()
+        self.last_swap = None
+
+    def predict(self, data: Dict, weeks_ahead: int = 4) -> Dict:
+        """Project a single player with the serving model, mirroring to the shadow"""
+        model = self.model
+        start = time.perf_counter()
+        result = model.predict(data, weeks_ahead)
+        self._mirror(data, weeks_ahead, np.array([result["points"]]), time.perf_counter() - start, single=True)
+        return result
+
+    def predict_batch(self, data: Union[np.ndarray, List[Dict]], weeks_ahead: int = 4) -> Dict[str, Any]:
+        """Project a batch with the serving model, mirroring to the shadow"""
+        model = self.model
+        start = time.perf_counter()
+        result = model.predict_batch(data, weeks_ahead)
+        self._mirror(data, weeks_ahead, result["points"], time.perf_counter() - start)
+        return result
+
+    async def refresh(self) -> bool:
+        """Load the registry's active version if it is new; returns True when it changed"""
+        if self.registry is None:
+            return False
+
+        async with self._refresh_lock:
+            version = self.registry.active_version()
+            if version is None or version in (self.version, self.shadow_version):
+                return False
+
+            loop = asyncio.get_running_loop()
+            try:
+                candidate = await loop.run_in_executor(None, self._load_version, version)
+            except Exception as e:
+                logger.error(f"Error loading model version {version}: {str(e)}")
+                return False
+
+            if self.shadow:
+                self.shadow_model, self.shadow_version = candidate, version
+                self.shadow_stats = self._empty_shadow_stats()
+                logger.info(f"Model version {version} loaded as shadow of {self.version}")
+            else:
+                self._swap(candidate, version)
+            return True
+
+    async def poll(self, interval: float) -> None:
+        """Check the registry pointer every ``interval`` seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Error polling model registry: {str(e)}")
+
+    def promote_shadow(self) -> bool:
+        """Make the shadow model the serving model"""
+        if self.shadow_model is None:
+            return False
+        candidate, version = self.shadow_model, self.shadow_version
+        self.shadow_model, self.shadow_version = None, None
+        self._swap(candidate, version)
+        return True
+
+    def status(self) -> Dict:
+        """Serving version, registry state and shadow comparison"""
+        return {
+            "serving_version": self.version,
+            "active_version": self.registry.active_version() if self.registry else None,
+            "loaded": self.model.is_loaded(),
+            "warmed_up": self.model.warmed_up,
+            "last_swap": self.last_swap,
+            "shadow": self.shadow_report()
+        }
+
+    def shadow_report(self) -> Optional[Dict]:
+        """Latency and prediction comparison between serving and shadow models"""
+        if self.shadow_model is None:
+            return None
+        stats = self.shadow_stats
+        requests = max(stats["requests"], 1)
+        rows = max(stats["rows"], 1)
+        return {
+            "version": self.shadow_version,
+            "requests": stats["requests"],
+            "rows": stats["rows"],
+            "skipped": stats["skipped"],
+            "serving_ms_avg": round(stats["serving_seconds"] / requests * 1000, 3),
+            "shadow_ms_avg": round(stats["shadow_seconds"] / requests * 1000, 3),
+            "mean_abs_diff": round(stats["abs_diff"] / rows, 4),
+            "max_abs_diff": round(stats["max_abs_diff"], 4)
+        }
+
+    def shutdown(self) -> None:
+        """Stop the shadow scoring thread"""
+        self._shadow_executor.shutdown(wait=False)
+
+    def _load_version(self, version: str) -> PlayerProjectionModel:
+        """Load and warm up a registry version (runs in a worker thread)"""
+        model = self.model_factory(artifact_path=self.registry.version_path(version),
+                                   mmap_mode=self.mmap_mode)
+        if not model.ensure_loaded():
+            raise RuntimeError(f"Artifact for version {version} could not be loaded")
+        model.warm_up()
+        return model
+
+    def _swap(self, candidate: PlayerProjectionModel, version: str) -> None:
+        """Replace the serving model reference"""
+        previous = self.version
+        self.model, self.version = candidate, version
+        self.last_swap = datetime.utcnow().isoformat()
+        logger.info(f"Serving model swapped from {previous} to {version}")
+
+    def _mirror(self, data, weeks_ahead: int, serving_points: np.ndarray,
+                serving_seconds: float, single: bool = False) -> None:
+        """Score the same request on the shadow model without delaying the response"""
+        shadow_model = self.shadow_model
+        if shadow_model is None:
+            return
+        # Drop mirrored work rather than queueing it while the shadow is busy
+        if not self._shadow_busy.acquire(blocking=False):
+            self.shadow_stats["skipped"] += 1
+            return
+        self._shadow_executor.submit(
+            self._score_shadow, shadow_model, data, weeks_ahead, serving_points, serving_seconds, single
+        )
+
+    def _score_shadow(self, shadow_model, data, weeks_ahead, serving_points, serving_seconds, single) -> None:
+        try:
+            start = time.perf_counter()
+            if single:
+                shadow_points = np.array([shadow_model.predict(data, weeks_ahead)["points"]])
+            else:
+                shadow_points = shadow_model.predict_batch(data, weeks_ahead)["points"]
+            shadow_seconds = time.perf_counter() - start
+
+            if shadow_model is not self.shadow_model:
+                return
+            diff = np.abs(np.asarray(shadow_points, dtype=float) - np.asarray(serving_points, dtype=float))
+            stats = self.shadow_stats
+            stats["requests"] += 1
+            stats["rows"] += len(diff)
+            stats["serving_seconds"] += serving_seconds
+            stats["shadow_seconds"] += shadow_seconds
+            stats["abs_diff"] += float(diff.sum())
+            stats["max_abs_diff"] = max(stats["max_abs_diff"], float(diff.max(initial=0.0)))
+        except Exception as e:
+            logger.error(f"Error shadow scoring version {self.shadow_version}: {str(e)}")
+        finally:
+            self._shadow_busy.release()
+
+    @staticmethod
+    def _empty_shadow_stats() -> Dict[str, float]:
+        return {
+            "requests": 0, "rows": 0, "skipped": 0,
+            "serving_seconds": 0.0, "shadow_seconds": 0.0,
+            "abs_diff": 0.0, "max_abs_diff": 0.0
+        }
@@ -8,25 +8,89 @@ from sklearn.metrics import mean_squared_error, r2_score
 import xgboost as xgb
 import pickle
 import logging
-from typing import Dict, List, Any, Tuple, Optional
+from typing import Dict, List, Any, Tuple, Optional, Union
 from datetime import datetime
 import joblib
+import threading
+import time
+# Shared with the src service, which imports these modules flat
+from src.tree_inference import FlatTreeEnsemble, benchmark_against_sklearn, flat_max_rows
+from src import artifacts
+from .trade_search import TradeSearchEngine
+from .dynasty_table import DynastyValueTable, dynasty_values
 
 logger = logging.getLogger(__name__)
 
+# Column layout of the projection feature matrix
+PROJECTION_FEATURES = [
+    "age", "years_exp", "is_qb", "is_rb", "is_wr", "is_te",
+    "avg_rushing_yards", "avg_receiving_yards", "avg_passing_yards", "avg_rushing_tds",
+    "avg_receiving_tds", "avg_passing_tds", "avg_receptions", "avg_targets",
+    "trend_rushing_yards", "trend_receiving_yards", "trend_passing_yards",
+    "trend_rushing_tds", "trend_receiving_tds",
+    "injured", "games_played"
+]
+_AGE, _YEARS_EXP, _IS_QB, _IS_RB, _IS_WR, _IS_TE = range(6)
+_TREND_COLUMNS = slice(14, 19)
+_INJURED = 19
+
+# The flattened ensemble has a higher per-row cost than scikit-learn, so batches
+# above a crossover size go to the estimator. The crossover depends on the backend
+# and on the number and size of the trees (``python -m src.tree_inference``: about
+# 200 rows for the 100-tree GBM, 50 for 400-tree histogram boosting, over 500 for
+# forests), so it is measured when a model is flattened and stored in its
+# artifact. Artifacts saved without one use the smallest crossover seen.
+DEFAULT_FLAT_MAX_ROWS = 50
+_CROSSOVER_BATCH_SIZES = (1, 10, 25, 50, 100, 150, 200, 300, 500)
+
+# Share of projected points per stat category for QB, RB, WR, TE and other positions.
+# NaN marks categories that do not apply to a position.
+BREAKDOWN_CATEGORIES = ["passing", "rushing", "receiving", "total"]
+_BREAKDOWN_WEIGHTS = np.array([
+    [0.8, 0.2, np.nan, np.nan],
+    [np.nan, 0.7, 0.3, np.nan],
+    [np.nan, 0.1, 0.9, np.nan],
+    [np.nan, 0.1, 0.9, np.nan],
+    [np.nan, np.nan, np.nan, 1.0],
+])
+_HEURISTIC_DEFAULT_POINTS = np.array([18.0, 12.0, 11.0, 8.0, 10.0])
+
+# Waiver scoring inputs
+_GOOD_OFFENSE_TEAMS = ["BUF", "KC", "SF", "MIA", "DAL"]
+_WAIVER_BASE_POINTS = {"QB": 15, "RB": 10, "WR": 9, "TE": 6}
+
 class PlayerProjectionModel:
     """
     ML model for predicting player fantasy points and performance metrics
     """
     
-    def __init__(self):
+    def __init__(self, artifact_path: Optional[str] = None, mmap_mode: Optional[str] = "r"):
         self.model = None
+        self.flat_model = None
+        self.flat_max_rows = DEFAULT_FLAT_MAX_ROWS
         self.scaler = StandardScaler()
-        self.feature_columns = []
+        self.feature_columns = list(PROJECTION_FEATURES)
         self.is_trained = False
         
+        # Artifact loaded lazily on first use (or eagerly via ensure_loaded)
+        self.artifact_path = artifact_path
+        self.mmap_mode = mmap_mode
+        self.warmed_up = False
+        self._load_attempted = False
+        self._load_lock = threading.Lock()
+        
     def prepare_features(self, data: Dict) -> np.ndarray:
         """Prepare features for model prediction"""
+        return np.array(self._feature_row(data)).reshape(1, -1)
+    
+    def prepare_features_batch(self, data: List[Dict]) -> np.ndarray:
+        """Prepare a feature matrix with one row per processed player dict"""
+        if not data:
+            return np.empty((0, len(PROJECTION_FEATURES)))
+        return np.array([self._feature_row(player_data) for player_data in data], dtype=float)
+    
+    def _feature_row(self, data: Dict) -> List[float]:
+        """Build the feature values for a single player"""
         features = []
         
         # Player characteristics
@@ -68,30 +132,37 @@ class PlayerProjectionModel:
             len(data.get("fantasy_points", [])),  # Games played
         ])
         
-        return np.array(features).reshape(1, -1)
-    
-    def train(self, training_data: List[Dict]) -> Dict:
-        """Train the projection model"""
+        return features
+    
+    def build_training_set(self, training_data: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """Build the feature matrix and targets (average of the last 4 games) in one batch"""
+        eligible = [
+            player_data for player_data in training_data
+            if len(player_data.get("fantasy_points", [])) >= 4  # Need minimum games
+        ]
+        X = self.prepare_features_batch(eligible)
+        y = np.array([np.mean(player_data["fantasy_points"][-4:]) for player_data in eligible])
+        return X, y
+    
+    def train(self, training_data: List[Dict], pipeline=None, data_version: Optional[str] = None) -> Dict:
+        """
+        Train the projection model
+        
+        With a ``TrainingPipeline`` the features are cached per data version and
+        hyperparameter candidates are cross-validated in parallel before the best
+        one is refit; otherwise a single GBM is trained on an 80/20 split.
+        """
         try:
-            # Prepare training features and targets
-            X = []
-            y = []
+            if pipeline is not None:
+                return pipeline.run(self, training_data, data_version=data_version)
             
-            for player_data in training_data:
-                features = self.prepare_features(player_data)
-                fantasy_points = player_data.get("fantasy_points", [])
-                
-                if len(fantasy_points) >= 4:  # Need minimum games
-                    X.append(features.flatten())
-                    y.append(np.mean(fantasy_points[-4:]))  # Target: avg of last 4 games
+            # Prepare training features and targets
+            X, y = self.build_training_set(training_data)
             
             if len(X) < 10:  # Need minimum training samples
                 logger.warning("Insufficient training data")
                 return {"error": "Insufficient training data"}
             
-            X = np.array(X)
-            y = np.array(y)
-            
             # Split data
             X_train, X_test, y_train, y_test = train_test_split(
                 X, y, test_size=0.2, random_state=42
@@ -110,6 +181,7 @@ class PlayerProjectionModel:
             )
             
             self.model.fit(X_train_scaled, y_train)
+            self._export_flat_model(X_test_scaled)
             
             # Evaluate
             y_pred = self.model.predict(X_test_scaled)
@@ -132,47 +204,180 @@ class PlayerProjectionModel:
     def predict(self, data: Dict, weeks_ahead: int = 4) -> Dict:
         """Generate player projection"""
         try:
+            self.ensure_loaded()
             if not self.is_trained:
                 # Use simple heuristic if model not trained
                 return self._heuristic_prediction(data, weeks_ahead)
             
-            features = self.prepare_features(data)
-            features_scaled = self.scaler.transform(features)
-            
-            # Base prediction
-            base_prediction = self.model.predict(features_scaled)[0]
-            
-            # Adjust for weeks ahead (simple scaling)
-            projected_points = base_prediction * weeks_ahead
-            
-            # Calculate confidence interval (mock implementation)
-            uncertainty = projected_points * 0.2  # 20% uncertainty
-            confidence_interval = [
-                projected_points - uncertainty,
-                projected_points + uncertainty
-            ]
-            
-            # Breakdown by stat categories
-            breakdown = self._generate_breakdown(data, projected_points)
-            
-            # Injury risk assessment
-            injury_risk = self._assess_injury_risk(data)
-            
-            # Trending analysis
-            trending = self._analyze_trend(data)
-            
-            return {
-                "points": round(projected_points, 1),
-                "confidence_interval": [round(ci, 1) for ci in confidence_interval],
-                "breakdown": breakdown,
-                "injury_risk": injury_risk,
-                "trend": trending
-            }
+            return self.projection_at(self.predict_batch([data], weeks_ahead), 0)
             
         except Exception as e:
             logger.error(f"Error generating prediction: {str(e)}")
             return self._heuristic_prediction(data, weeks_ahead)
     
+    def predict_batch(self, data: Union[np.ndarray, List[Dict]], weeks_ahead: int = 4) -> Dict[str, Any]:
+        """
+        Generate projections for many players with one scaler and one model call.
+        
+        Accepts a feature matrix laid out like ``PROJECTION_FEATURES`` or a list of
+        processed player dicts. Every returned array is aligned with the input rows;
+        breakdown categories that do not apply to a player's position are NaN.
+        """
+        self.ensure_loaded()
+        if isinstance(data, np.ndarray):
+            features = np.atleast_2d(data).astype(float)
+            trend_scores = features[:, _TREND_COLUMNS].mean(axis=1)
+            recent_points = np.full(len(features), np.nan)
+        else:
+            features = self.prepare_features_batch(data)
+            trend_scores = self._batch_trend_scores(data)
+            recent_points = self._batch_recent_points(data)
+        
+        if not self.is_trained:
+            return self._heuristic_prediction_batch(features, recent_points, weeks_ahead)
+        
+        base_predictions = self._predict_scaled(self.scaler.transform(features)) if len(features) else np.empty(0)
+        
+        # Adjust for weeks ahead (simple scaling)
+        projected_points = base_predictions * weeks_ahead
+        
+        # Calculate confidence interval (20% uncertainty)
+        uncertainty = projected_points * 0.2
+        confidence_interval = np.column_stack([
+            projected_points - uncertainty,
+            projected_points + uncertainty
+        ])
+        
+        return {
+            "points": np.round(projected_points, 1),
+            "confidence_interval": np.round(confidence_interval, 1),
+            "breakdown": self._breakdown_batch(features, projected_points),
+            "injury_risk": self._injury_risk_batch(features),
+            "trend": np.select(
+                [trend_scores > 0.1, trend_scores < -0.1], ["up", "down"], default="stable"
+            )
+        }
+    
+    def _predict_scaled(self, features_scaled: np.ndarray) -> np.ndarray:
+        """Run the ensemble: small batches on the flattened NumPy evaluator, large ones on scikit-learn"""
+        if self.flat_model is not None and len(features_scaled) <= self.flat_max_rows:
+            return self.flat_model.predict(features_scaled)
+        estimator = self.get_estimator()
+        if estimator is None:
+            return self.flat_model.predict(features_scaled)
+        return estimator.predict(features_scaled)
+    
+    def install_estimator(self, estimator, scaler: StandardScaler,
+                          validation_features: Optional[np.ndarray] = None) -> None:
+        """Serve an estimator fitted elsewhere (e.g. by the training pipeline)"""
+        self.model = estimator
+        self.scaler = scaler
+        self.feature_columns = list(PROJECTION_FEATURES)
+        self._export_flat_model(validation_features)
+        self.is_trained = True
+        self.warmed_up = False
+    
+    def _export_flat_model(self, validation_features: Optional[np.ndarray] = None) -> None:
+        """Flatten the trained ensemble, check it reproduces scikit-learn and measure its crossover"""
+        if hasattr(self.model, "coef_"):
+            # Linear backends are already a single dot product
+            self.flat_model = None
+            return
+        try:
+            flat_model = FlatTreeEnsemble.from_sklearn(self.model)
+            if validation_features is not None:
+                error = flat_model.max_error(self.model, validation_features)
+                if error > 1e-6:
+                    logger.warning(f"Flattened model deviates from scikit-learn by {error:.2e}; not using it")
+                    flat_model = None
+            if flat_model is not None:
+                self.flat_max_rows = self._measure_flat_max_rows(flat_model, validation_features)
+            self.flat_model = flat_model
+        except Exception as e:
+            logger.warning(f"Could not flatten projection model: {str(e)}")
+            self.flat_model = None
+    
+    def _measure_flat_max_rows(self, flat_model: FlatTreeEnsemble,
+                               features: Optional[np.ndarray] = None) -> int:
+        """Largest batch the flattened ensemble predicts faster than the estimator"""
+        if features is None or len(features) == 0:
+            features = np.random.default_rng(0).normal(size=(100, self.model.n_features_in_))
+        results = benchmark_against_sklearn(self.model, features, batch_sizes=_CROSSOVER_BATCH_SIZES,
+                                            repeats=20, flat=flat_model)
+        return flat_max_rows(results)
+    
+    @staticmethod
+    def projection_at(batch: Dict[str, Any], index: int) -> Dict:
+        """Extract a single player's projection dict from ``predict_batch`` output"""
+        return {
+            "points": float(batch["points"][index]),
+            "confidence_interval": [float(ci) for ci in batch["confidence_interval"][index]],
+            "breakdown": {
+                category: float(values[index])
+                for category, values in batch["breakdown"].items()
+                if not np.isnan(values[index])
+            },
+            "injury_risk": float(batch["injury_risk"][index]),
+            "trend": str(batch["trend"][index])
+        }
+    
+    def _position_groups(self, features: np.ndarray) -> np.ndarray:
+        """Map position one-hot columns to rows of the breakdown weight table"""
+        one_hot = features[:, _IS_QB:_IS_TE + 1]
+        return np.where(one_hot.any(axis=1), one_hot.argmax(axis=1), len(_BREAKDOWN_WEIGHTS) - 1)
+    
+    def _breakdown_batch(self, features: np.ndarray, total_points: np.ndarray) -> Dict[str, np.ndarray]:
+        """Point breakdown by category for every row"""
+        shares = _BREAKDOWN_WEIGHTS[self._position_groups(features)] * total_points[:, None]
+        return {category: shares[:, j] for j, category in enumerate(BREAKDOWN_CATEGORIES)}
+    
+    def _injury_risk_batch(self, features: np.ndarray) -> np.ndarray:
+        """Assess injury risk (0-1 scale) for every row"""
+        age = features[:, _AGE]
+        risk = (
+            0.1
+            + 0.1 * (age > 30)
+            + 0.1 * (age > 32)
+            + 0.2 * (features[:, _IS_RB] == 1)
+            + 0.3 * (features[:, _INJURED] == 1)
+        )
+        return np.minimum(risk, 1.0)
+    
+    def _batch_trend_scores(self, data: List[Dict]) -> np.ndarray:
+        """Average trending value per player"""
+        scores = []
+        for player_data in data:
+            values = [v for v in player_data.get("trending", {}).values() if isinstance(v, (int, float))]
+            scores.append(np.mean(values) if values else 0.0)
+        return np.array(scores, dtype=float)
+    
+    def _batch_recent_points(self, data: List[Dict]) -> np.ndarray:
+        """Average of the last four fantasy point totals, NaN without history"""
+        return np.array([
+            np.mean(player_data["fantasy_points"][-4:]) if player_data.get("fantasy_points") else np.nan
+            for player_data in data
+        ], dtype=float)
+    
+    def _heuristic_prediction_batch(self, features: np.ndarray, recent_points: np.ndarray,
+                                    weeks_ahead: int) -> Dict[str, Any]:
+        """Vectorized ``_heuristic_prediction`` for a batch of players"""
+        default_points = _HEURISTIC_DEFAULT_POINTS[self._position_groups(features)]
+        projected = np.where(np.isnan(recent_points), default_points, recent_points) * weeks_ahead
+        not_applicable = np.full(len(projected), np.nan)
+        
+        return {
+            "points": np.round(projected, 1),
+            "confidence_interval": np.round(np.column_stack([projected * 0.8, projected * 1.2]), 1),
+            "breakdown": {
+                "passing": not_applicable,
+                "rushing": projected * 0.4,
+                "receiving": projected * 0.6,
+                "total": not_applicable
+            },
+            "injury_risk": np.full(len(projected), 0.1),
+            "trend": np.full(len(projected), "stable", dtype=object)
+        }
+    
     def _heuristic_prediction(self, data: Dict, weeks_ahead: int) -> Dict:
         """Simple heuristic prediction when ML model unavailable"""
         position = data.get("position", "RB")
@@ -195,100 +400,107 @@ class PlayerProjectionModel:
             "trend": "stable"
         }
     
-    def _generate_breakdown(self, data: Dict, total_points: float) -> Dict:
-        """Generate point breakdown by category"""
-        position = data.get("position")
-        
-        if position == "QB":
-            return {
-                "passing": total_points * 0.8,
-                "rushing": total_points * 0.2
-            }
-        elif position == "RB":
-            return {
-                "rushing": total_points * 0.7,
-                "receiving": total_points * 0.3
-            }
-        elif position in ["WR", "TE"]:
-            return {
-                "receiving": total_points * 0.9,
-                "rushing": total_points * 0.1
-            }
-        else:
-            return {"total": total_points}
-    
-    def _assess_injury_risk(self, data: Dict) -> float:
-        """Assess injury risk (0-1 scale)"""
-        risk = 0.1  # Base risk
-        
-        # Age factor
-        age = data.get("age", 25)
-        if age > 30:
-            risk += 0.1
-        if age > 32:
-            risk += 0.1
-        
-        # Position factor
-        position = data.get("position")
-        if position == "RB":
-            risk += 0.2  # RBs have higher injury risk
-        
-        # Current injury status
-        if data.get("injury_status") != "Healthy":
-            risk += 0.3
-        
-        return min(risk, 1.0)
-    
-    def _analyze_trend(self, data: Dict) -> str:
-        """Analyze player trend"""
-        trending = data.get("trending", {})
-        
-        # Simple trend analysis based on recent performance
-        trend_values = [v for v in trending.values() if isinstance(v, (int, float))]
-        
-        if not trend_values:
-            return "stable"
-        
-        avg_trend = np.mean(trend_values)
-        
-        if avg_trend > 0.1:
-            return "up"
-        elif avg_trend < -0.1:
-            return "down"
-        else:
-            return "stable"
-    
     def save_model(self, filepath: str) -> bool:
-        """Save trained model to file"""
+        """
+        Save trained model as an artifact directory.
+        
+        Inference state (scaler and flattened ensemble) is stored as uncompressed
+        NumPy arrays that load memory-mapped; the scikit-learn estimator is kept
+        alongside for retraining. Linear backends have no ensemble and are served
+        from the estimator itself.
+        """
         try:
-            model_data = {
-                "model": self.model,
-                "scaler": self.scaler,
-                "feature_columns": self.feature_columns,
-                "is_trained": self.is_trained
+            if self.flat_model is None and self.model is not None:
+                self._export_flat_model()
+            if self.flat_model is None and self.get_estimator() is None:
+                raise ValueError("No trained model to save")
+            
+            arrays = artifacts.scaler_to_arrays(self.scaler)
+            if self.flat_model is not None:
+                arrays["ensemble"] = self.flat_model.to_arrays()
+            manifest = {
+                "model_class": type(self).__name__,
+                "estimator": type(self.get_estimator()).__name__,
+                "feature_columns": self.feature_columns
             }
-            joblib.dump(model_data, filepath)
+            if self.flat_model is not None:
+                manifest["flat_max_rows"] = self.flat_max_rows
+            artifacts.save_artifact(filepath, arrays, manifest, estimator=self.get_estimator())
             return True
         except Exception as e:
             logger.error(f"Error saving model: {str(e)}")
             return False
     
-    def load_model(self, filepath: str) -> bool:
-        """Load trained model from file"""
+    def load_model(self, filepath: str, mmap_mode: Optional[str] = None) -> bool:
+        """Load trained model from an artifact directory or a legacy joblib file"""
         try:
-            model_data = joblib.load(filepath)
-            self.model = model_data["model"]
-            self.scaler = model_data["scaler"]
-            self.feature_columns = model_data["feature_columns"]
-            self.is_trained = model_data["is_trained"]
+            if artifacts.is_artifact(filepath):
+                manifest, arrays = artifacts.load_artifact(filepath, mmap_mode=mmap_mode)
+                self.scaler = artifacts.scaler_from_arrays(arrays)
+                if "ensemble" in arrays:
+                    self.model = None
+                    self.flat_model = FlatTreeEnsemble.from_arrays(arrays["ensemble"])
+                    self.flat_max_rows = manifest.get("flat_max_rows", DEFAULT_FLAT_MAX_ROWS)
+                else:
+                    self.model = artifacts.load_estimator(filepath)
+                    self.flat_model = None
+                self.feature_columns = manifest["feature_columns"]
+                self.artifact_path = filepath
+                self.is_trained = True
+            else:
+                model_data = joblib.load(filepath)
+                self.model = model_data["model"]
+                self.scaler = model_data["scaler"]
+                self.feature_columns = model_data["feature_columns"]
+                self.is_trained = model_data["is_trained"]
+                if self.model is not None:
+                    self._export_flat_model()
+            self.warmed_up = False
             return True
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
             return False
     
+    def ensure_loaded(self) -> bool:
+        """Load the configured artifact on first use; safe to call from many threads"""
+        if self._load_attempted or not self.artifact_path:
+            return self.is_loaded()
+        
+        with self._load_lock:
+            if not self._load_attempted:
+                start = time.perf_counter()
+                if self.load_model(self.artifact_path, mmap_mode=self.mmap_mode):
+                    logger.info(f"Loaded projection model from {self.artifact_path} "
+                                f"in {time.perf_counter() - start:.3f}s")
+                self._load_attempted = True
+        
+        return self.is_loaded()
+    
+    def get_estimator(self):
+        """
+        The scikit-learn estimator, read from the artifact only when needed
+        
+        Unlike the memory-mapped arrays, the estimator is unpickled into private
+        memory, so workers that never see a large batch never load it.
+        """
+        if self.model is None and self.artifact_path and artifacts.is_artifact(self.artifact_path):
+            with self._load_lock:
+                if self.model is None:
+                    self.model = artifacts.load_estimator(self.artifact_path)
+        return self.model
+    
+    def warm_up(self) -> float:
+        """Run a throwaway prediction so pages and code paths are hot before serving"""
+        start = time.perf_counter()
+        self.ensure_loaded()
+        # Small batches only: the estimator behind large ones stays unloaded until needed
+        self.predict_batch(np.zeros((1, len(PROJECTION_FEATURES))))
+        self.warmed_up = True
+        return time.perf_counter() - start
+    
     def is_loaded(self) -> bool:
         """Check if model is loaded and ready"""
-        return self.is_trained and self.model is not None
+        return self.is_trained and (self.flat_model is not None or self.model is not None)
 
 
 class WaiverWireRecommendationModel:
@@ -300,91 +512,96 @@ class WaiverWireRecommendationModel:
         self.model = RandomForestRegressor(n_estimators=100, random_state=42)
         self.is_trained = False
     
-    def recommend(self, data: Dict, budget_constraint: Optional[float] = None) -> List[Dict]:
-        """Generate waiver wire recommendations"""
+    def recommend(self, data: Dict, budget_constraint: Optional[float] = None,
+                  top_k: int = 10) -> List[Dict]:
+        """
+        Generate waiver wire recommendations
+        
+        Every available player is scored at once over a column table; only the
+        ``top_k`` best (ties kept in input order) are selected with a partial
+        sort and turned into recommendation dicts.
+        """
         try:
             available_players = data.get("available_players", [])
-            position_needs = data.get("position_needs", [])
-            
-            recommendations = []
-            
-            for player in available_players:
-                score = self._calculate_recommendation_score(player, data)
-                
-                if score > 5.0:  # Minimum threshold
-                    rec = {
-                        "player_id": player["player_id"],
-                        "score": round(score, 1),
-                        "projected_points": self._estimate_points(player),
-                        "ownership": player.get("ownership_percentage", 0),
-                        "trending": self._calculate_trending_score(player),
-                        "reasoning": self._generate_reasoning(player, score),
-                        "priority": self._determine_priority(score)
-                    }
-                    recommendations.append(rec)
-            
-            # Sort by score
-            recommendations.sort(key=lambda x: x["score"], reverse=True)
-            
-            return recommendations[:10]  # Top 10 recommendations
+            if not available_players:
+                return []
+            
+            table = self._candidate_table(available_players)
+            scores = self._score_candidates(table, data.get("position_needs", []))
+            
+            candidates = np.flatnonzero(scores > 5.0)  # Minimum threshold
+            rounded = np.round(scores[candidates], 1)
+            top = candidates[self._top_k_order(rounded, top_k)]
+            
+            trending = 0.5 + table["trending_count"][top] / max(data.get("trending_max_count", 0), 1)
+            points = self._estimate_points_batch(table["points_position"][top], table["age"][top])
+            
+            return [
+                {
+                    "player_id": available_players[index]["player_id"],
+                    "score": round(float(scores[index]), 1),
+                    "projected_points": float(points[rank]),
+                    "ownership": available_players[index].get("ownership_percentage", 0),
+                    "trending": round(float(trending[rank]), 3),
+                    "reasoning": self._generate_reasoning(available_players[index], float(scores[index])),
+                    "priority": self._determine_priority(float(scores[index]))
+                }
+                for rank, index in enumerate(top)
+            ]
             
         except Exception as e:
             logger.error(f"Error generating recommendations: {str(e)}")
             return []
     
-    def _calculate_recommendation_score(self, player: Dict, context: Dict) -> float:
-        """Calculate recommendation score for a player"""
-        score = 5.0  # Base score
-        
-        # Position need bonus
-        if player.get("position") in context.get("position_needs", []):
-            score += 2.0
-        
-        # Age factor (younger players get slight bonus)
-        age = player.get("age", 25)
-        if age < 26:
-            score += 1.0
-        elif age > 30:
-            score -= 0.5
-        
-        # Team factor (good offensive teams get bonus)
-        good_teams = ["BUF", "KC", "SF", "MIA", "DAL"]
-        if player.get("team") in good_teams:
-            score += 1.0
-        
-        # Injury factor
-        if player.get("injury_status") != "Healthy":
-            score -= 2.0
-        
-        # Ownership factor (lower ownership = higher upside)
-        ownership = player.get("ownership_percentage", 50)
-        if ownership < 10:
-            score += 1.5
-        elif ownership < 30:
-            score += 1.0
-        
-        return max(0, min(10, score))
+    @staticmethod
+    def _top_k_order(keys: np.ndarray, k: int) -> np.ndarray:
+        """
+        Positions of the ``k`` largest keys, best first, ties in input order.
+        
+        Same result as a stable descending sort truncated to ``k``, but only the
+        selected rows are sorted.
+        """
+        if len(keys) > k:
+            threshold = np.partition(keys, len(keys) - k)[len(keys) - k]
+            above = np.flatnonzero(keys > threshold)
+            at_threshold = np.flatnonzero(keys == threshold)[:k - len(above)]
+            selected = np.sort(np.concatenate([above, at_threshold]))
+        else:
+            selected = np.arange(len(keys))
+        return selected[np.argsort(-keys[selected], kind="stable")]
     
-    def _estimate_points(self, player: Dict) -> float:
-        """Estimate fantasy points for player"""
-        position = player.get("position", "RB")
-        age = player.get("age", 25)
-        
-        # Base points by position
-        base_points = {"QB": 15, "RB": 10, "WR": 9, "TE": 6}.get(position, 8)
-        
-        # Age adjustment
-        if age < 26:
-            base_points *= 1.1
-        elif age > 30:
-            base_points *= 0.9
-        
-        return round(base_points, 1)
+    def _candidate_table(self, players: List[Dict]) -> Dict[str, np.ndarray]:
+        """Column arrays of the fields used for scoring"""
+        return {
+            "position": np.array([p.get("position") for p in players], dtype=object),
+            # Points estimates treat a player without a position as a running back
+            "points_position": np.array([p.get("position", "RB") for p in players], dtype=object),
+            "age": np.array([p.get("age", 25) for p in players], dtype=float),
+            "team": np.array([p.get("team") for p in players], dtype=object),
+            "healthy": np.array([p.get("injury_status") == "Healthy" for p in players]),
+            "ownership": np.array([p.get("ownership_percentage", 50) for p in players], dtype=float),
+            "trending_count": np.array([p.get("trending_count", 0) for p in players], dtype=float)
+        }
     
-    def _calculate_trending_score(self, player: Dict) -> float:
-        """Calculate trending score"""
-        # Mock implementation - would use actual trending data
-        return np.random.uniform(0.5, 1.5)
+    def _score_candidates(self, table: Dict[str, np.ndarray], position_needs: List[str]) -> np.ndarray:
+        """Recommendation score (0-10) for every candidate"""
+        age = table["age"]
+        ownership = table["ownership"]
+        score = (
+            5.0  # Base score
+            + 2.0 * np.isin(table["position"], list(position_needs))  # Position need bonus
+            + np.select([age < 26, age > 30], [1.0, -0.5], default=0.0)  # Younger players get slight bonus
+            + 1.0 * np.isin(table["team"], _GOOD_OFFENSE_TEAMS)  # Good offensive teams
+            - 2.0 * ~table["healthy"]  # Injury factor
+            + np.select([ownership < 10, ownership < 30], [1.5, 1.0], default=0.0)  # Lower ownership = upside
+        )
+        return np.clip(score, 0, 10)
+    
+    def _estimate_points_batch(self, positions: np.ndarray, ages: np.ndarray) -> np.ndarray:
+        """Estimate fantasy points from position base points and age"""
+        base_points = np.array([_WAIVER_BASE_POINTS.get(position, 8) for position in positions], dtype=float)
+        age_factor = np.select([ages < 26, ages > 30], [1.1, 0.9], default=1.0)
+        return np.round(base_points * age_factor, 1)
     
     def _generate_reasoning(self, player: Dict, score: float) -> str:
         """Generate human-readable reasoning"""
@@ -420,6 +637,7 @@ class TradeAnalyzerModel:
     
     def __init__(self):
         self.is_trained = True  # Use heuristic analysis
+        self.search_engine = TradeSearchEngine()
     
     def analyze(self, giving_players: List[Dict], receiving_players: List[Dict],
                 team_data: Dict, league_data: Dict, draft_picks: Optional[Dict] = None) -> Dict:
@@ -462,6 +680,18 @@ class TradeAnalyzerModel:
             logger.error(f"Error analyzing trade: {str(e)}")
             return {"error": str(e)}
     
+    def find_trades(self, roster_id: str, rosters: List[Dict], players: Dict[str, Dict],
+                    league_positions: Dict[str, Dict], player_values: Dict[str, float],
+                    top_n: int = 10) -> Dict:
+        """Search the league for mutually beneficial trades for one roster"""
+        try:
+            return self.search_engine.search(
+                roster_id, rosters, players, league_positions, player_values, top_n=top_n
+            )
+        except Exception as e:
+            logger.error(f"Error searching trades: {str(e)}")
+            return {"error": str(e)}
+    
     def _calculate_total_value(self, players: List[Dict]) -> float:
         """Calculate total value of players"""
         total_value = 0
@@ -579,163 +809,49 @@ class TradeAnalyzerModel:
 class DynastyValueModel:
     """
     Model for dynasty player valuations and projections
+    
+    Serves lookups from a precomputed ``DynastyValueTable`` when one is set and
+    falls back to valuing the player on the fly otherwise.
     """
     
-    def __init__(self):
+    def __init__(self, table: Optional[DynastyValueTable] = None):
         self.is_trained = True
+        self.table = table
+    
+    def set_table(self, table: Optional[DynastyValueTable]) -> None:
+        """Swap in a new value table; lookups in flight keep the old one"""
+        self.table = table
+    
+    def lookup(self, player_id: str) -> Optional[Dict]:
+        """Dynasty analysis from the value table, None when the player is not in it"""
+        table = self.table
+        return table.lookup(player_id) if table is not None else None
     
     def analyze(self, data: Dict) -> Dict:
         """Analyze dynasty value for a player"""
         try:
-            age = data.get("age", 25)
-            position = data.get("position")
-            years_exp = data.get("years_exp", 0)
-            
-            # Current value calculation
-            current_value = self._calculate_current_value(age, position, years_exp)
-            
-            # Future projections
-            value_1year = self._project_future_value(current_value, age, position, 1)
-            value_2year = self._project_future_value(current_value, age, position, 2)
-            value_3year = self._project_future_value(current_value, age, position, 3)
-            
-            # Peak analysis
-            peak_year = self._calculate_peak_year(age, position)
-            
-            # Trend analysis
-            trend = self._analyze_value_trend(age, position)
-            
-            # Age curve position
-            age_curve = self._analyze_age_curve_position(age, position)
-            
-            # Dynasty tier
-            tier = self._determine_dynasty_tier(current_value, age, position)
-            
+            values = dynasty_values(np.array([data.get("age", 25)]), np.array([data.get("position")], dtype=object))
             return {
-                "current_value": round(current_value, 1),
-                "value_1year": round(value_1year, 1),
-                "value_2year": round(value_2year, 1),
-                "value_3year": round(value_3year, 1),
-                "peak_year": peak_year,
-                "trend": trend,
-                "age_curve": age_curve,
-                "tier": tier
+                "current_value": round(float(values["current_value"][0]), 1),
+                "value_1year": round(float(values["value_1year"][0]), 1),
+                "value_2year": round(float(values["value_2year"][0]), 1),
+                "value_3year": round(float(values["value_3year"][0]), 1),
+                "peak_year": int(values["peak_year"][0]),
+                "trend": str(values["trend"][0]),
+                "age_curve": str(values["age_curve"][0]),
+                "tier": str(values["tier"][0])
             }
             
         except Exception as e:
             logger.error(f"Error analyzing dynasty value: {str(e)}")
             return {}
     
-    def _calculate_current_value(self, age: int, position: str, years_exp: int) -> float:
-        """Calculate current dynasty value"""
-        # Base value by position
-        base_values = {"QB": 25, "RB": 30, "WR": 28, "TE": 20}
-        base_value = base_values.get(position, 25)
-        
-        # Age curve adjustments
-        if position == "QB":
-            if age < 25:
-                multiplier = 0.8
-            elif age < 30:
-                multiplier = 1.0
-            elif age < 35:
-                multiplier = 0.9
-            else:
-                multiplier = 0.6
-        elif position == "RB":
-            if age < 24:
-                multiplier = 1.1
-            elif age < 27:
-                multiplier = 1.0
-            elif age < 30:
-                multiplier = 0.7
-            else:
-                multiplier = 0.4
-        else:  # WR/TE
-            if age < 26:
-                multiplier = 1.0
-            elif age < 30:
-                multiplier = 1.0
-            elif age < 33:
-                multiplier = 0.8
-            else:
-                multiplier = 0.5
-        
-        return base_value * multiplier
-    
-    def _project_future_value(self, current_value: float, age: int, position: str, years_ahead: int) -> float:
-        """Project future dynasty value"""
-        future_age = age + years_ahead
-        
-        # Age decline rates by position
-        decline_rates = {
-            "QB": 0.02,    # 2% per year
-            "RB": 0.15,    # 15% per year (steep decline)
-            "WR": 0.05,    # 5% per year
-            "TE": 0.04     # 4% per year
-        }
-        
-        decline_rate = decline_rates.get(position, 0.05)
-        
-        # Apply decline
-        future_value = current_value * (1 - decline_rate) ** years_ahead
-        
-        # Floor at 10% of original value
-        return max(future_value, current_value * 0.1)
-    
-    def _calculate_peak_year(self, age: int, position: str) -> int:
-        """Calculate estimated peak year"""
-        peak_ages = {"QB": 30, "RB": 25, "WR": 27, "TE": 28}
-        peak_age = peak_ages.get(position, 27)
-        
-        current_year = datetime.now().year
-        years_to_peak = peak_age - age
-        
-        return current_year + max(0, years_to_peak)
-    
-    def _analyze_value_trend(self, age: int, position: str) -> str:
-        """Analyze dynasty value trend"""
-        if position == "RB" and age > 27:
-            return "declining"
-        elif age < 25:
-            return "ascending"
-        elif age < 29:
-            return "stable"
-        else:
-            return "declining"
-    
-    def _analyze_age_curve_position(self, age: int, position: str) -> str:
-        """Determine position on age curve"""
-        curves = {
-            "QB": {"prime": (26, 33), "decline": 34},
-            "RB": {"prime": (22, 26), "decline": 28},
-            "WR": {"prime": (24, 29), "decline": 31},
-            "TE": {"prime": (25, 30), "decline": 32}
-        }
-        
-        curve = curves.get(position, curves["WR"])
-        
-        if age < curve["prime"][0]:
-            return "developing"
-        elif age <= curve["prime"][1]:
-            return "prime"
-        elif age < curve["decline"]:
-            return "plateau"
-        else:
-            return "declining"
-    
-    def _determine_dynasty_tier(self, current_value: float, age: int, position: str) -> str:
-        """Determine dynasty tier"""
-        if current_value >= 40:
-            return "Elite"
-        elif current_value >= 30:
-            return "High-End"
-        elif current_value >= 20:
-            return "Mid-Tier"
-        elif current_value >= 10:
-            return "Depth"
-        else:
-            return "Dart Throw"
+    def team_score(self, player_ids: List[str], players: Optional[Dict[str, Dict]] = None) -> Dict:
+        """Aggregate dynasty value of a roster, valuing players on the fly without a table"""
+        table = self.table
+        if table is None:
+            table = DynastyValueTable.build({pid: players.get(pid, {}) for pid in player_ids} if players else {})
+        return table.team_score(player_ids)
     
     def is_loaded(self) -> bool:
         """Check if model is ready"""
@@ -0,0 +1,67 @@
+"""
+Columnar directory of player display fields for resolving many player IDs at once
+"""
+
+from typing import Dict, List, Any, Optional, Iterable, Sequence
+
+import numpy as np
+
+DISPLAY_FIELDS = ("player_name", "position", "team")
+
+
+def _display_name(player: Dict) -> Optional[str]:
+    """Full name, or first and last name (team defenses have no ``full_name``)"""
+    name = player.get("full_name")
+    if name:
+        return name
+    name = f"{player.get('first_name') or ''} {player.get('last_name') or ''}".strip()
+    return name or None
+
+
+class PlayerRegistry:
+    """
+    Display fields of every player in a Sleeper players snapshot, one array per field.
+
+    Built once per snapshot. ``hydrate`` resolves a list of IDs with one index
+    lookup per ID and one gather per field, instead of going through the
+    players dict and its cache check for every player. Missing values are
+    ``None``.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], version: Optional[str] = None):
+        self.columns = columns
+        self.version = version
+        self._index = {player_id: row for row, player_id in enumerate(columns["player_id"])}
+
+    @classmethod
+    def build(cls, players: Dict[str, Dict], version: Optional[str] = None) -> "PlayerRegistry":
+        """Registry of a Sleeper ``players/nfl`` snapshot"""
+        player_ids = list(players)
+        records = [players[player_id] or {} for player_id in player_ids]
+        # Object arrays keep None for missing fields (e.g. free agents have no team)
+        columns = {
+            "player_id": np.array(player_ids, dtype=object),
+            "player_name": np.array([_display_name(player) for player in records], dtype=object),
+            "position": np.array([player.get("position") for player in records], dtype=object),
+            "team": np.array([player.get("team") for player in records], dtype=object)
+        }
+        return cls(columns, version=version)
+
+    def __len__(self) -> int:
+        return len(self.columns["player_id"])
+
+    def __contains__(self, player_id: str) -> bool:
+        return str(player_id) in self._index
+
+    def rows(self, player_ids: Iterable[str]) -> np.ndarray:
+        """Row of each player ID, -1 for unknown IDs"""
+        index = self._index
+        return np.array([index.get(str(player_id), -1) for player_id in player_ids], dtype=np.intp)
+
+    def hydrate(self, player_ids: Iterable[str],
+                fields: Sequence[str] = DISPLAY_FIELDS) -> List[Optional[Dict[str, Any]]]:
+        """Display fields of each player ID, in order; ``None`` for unknown IDs"""
+        rows = self.rows(player_ids)
+        known = rows >= 0
+        values = iter(zip(*(self.columns[field][rows[known]].tolist() for field in fields)))
+        return [dict(zip(fields, next(values))) if is_known else None for is_known in known.tolist()]
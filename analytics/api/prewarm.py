@@ -0,0 +1,98 @@
+"""
+Startup prewarming with a time budget, reported by the readiness endpoint
+"""
+
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Callable, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+TIMED_OUT = "timed_out"
+
+
+class Prewarmer:
+    """
+    Runs named warm-up stages concurrently and tracks their progress.
+
+    The instance becomes ready when every stage has finished (failed stages
+    included, since a cold cache still serves correctly) or when the time
+    budget runs out, whichever comes first. Stages still running at the
+    deadline are cancelled and reported as timed out.
+    """
+
+    def __init__(self, budget_seconds: float = 60.0):
+        self.budget_seconds = budget_seconds
+        self._stages: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.state = PENDING
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+
+    def add(self, name: str, stage: Callable[[], Awaitable[Any]]) -> None:
+        """Register a stage; ``stage`` is called with no arguments and awaited"""
+        self._stages[name] = stage
+        self.stages[name] = {"status": PENDING}
+
+    @property
+    def ready(self) -> bool:
+        return self.state in (DONE, TIMED_OUT)
+
+    async def _run_stage(self, name: str) -> None:
+        info = self.stages[name]
+        info["status"] = RUNNING
+        start = time.perf_counter()
+        try:
+            await self._stages[name]()
+            info["status"] = DONE
+        except asyncio.CancelledError:
+            info["status"] = TIMED_OUT
+            raise
+        except Exception as e:
+            logger.error(f"Prewarm stage {name} failed: {str(e)}")
+            info["status"] = FAILED
+            info["error"] = str(e)
+        finally:
+            info["seconds"] = round(time.perf_counter() - start, 3)
+
+    async def run(self) -> None:
+        """Run every stage within the budget"""
+        self.state = RUNNING
+        self._started = time.perf_counter()
+        tasks = [asyncio.create_task(self._run_stage(name)) for name in self._stages]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=self.budget_seconds)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        self._finished = time.perf_counter()
+        timed_out = any(info["status"] == TIMED_OUT for info in self.stages.values())
+        self.state = TIMED_OUT if timed_out else DONE
+        logger.info(f"Prewarm {self.state} in {self._finished - self._started:.2f}s: "
+                    f"{ {name: info['status'] for name, info in self.stages.items()} }")
+
+    def mark_ready(self) -> None:
+        """Skip prewarming (e.g. when it is disabled)"""
+        self.state = DONE
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness and per-stage progress"""
+        if self._started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._finished or time.perf_counter()) - self._started
+        finished = sum(info["status"] in (DONE, FAILED, TIMED_OUT) for info in self.stages.values())
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "elapsed_seconds": round(elapsed, 3),
+            "budget_seconds": self.budget_seconds,
+            "progress": round(finished / len(self.stages), 3) if self.stages else 1.0,
+            "stages": self.stages
+        }
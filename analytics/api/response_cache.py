@@ -0,0 +1,175 @@
+"""
+LRU cache of serialized API responses with strong ETags
+"""
+
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+from fastapi import Request, Response
+
+from .timing import StageTimer
+from .serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+
+def _canonical_json(value: Any) -> bytes:
+    """Stable JSON encoding: sorted keys, no whitespace"""
+    return dumps(value, sort_keys=True)
+
+
+def _serialize(value: Any) -> bytes:
+    """Compact JSON response body"""
+    return dumps(value)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches an ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+class CachedResponse:
+    """Serialized response body and its ETag"""
+
+    __slots__ = ("body", "etag", "expires_at")
+
+    def __init__(self, body: bytes, expires_at: float):
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    Responses keyed by endpoint, normalized request body and data versions.
+
+    A key includes the versions of everything the response depends on
+    (players snapshot, NFL week, model version, ...), so a new version simply
+    misses and old entries age out. Memory is bounded by total body bytes
+    with least-recently-used eviction; ``ttl`` bounds staleness of inputs
+    that are not versioned. ETags are hashes of the body, so clients holding
+    a response get a 304 until its content actually changes. Concurrent
+    misses on one key share a single computation.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = 900.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        # key -> computation of a missed response, awaited by every request for that key
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(endpoint: str, body: Any, versions: Dict[str, Any]) -> str:
+        """Cache key of a request"""
+        return hashlib.sha256(_canonical_json([endpoint, body, versions])).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Cached response of a key, if present and fresh"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, body: bytes) -> CachedResponse:
+        """Store a serialized response, evicting least recently used entries past the byte budget"""
+        entry = CachedResponse(body, time.monotonic() + self.ttl)
+        if key in self._entries:
+            self._remove(key)
+        if len(body) > self.max_bytes:
+            return entry
+        self._entries[key] = entry
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        return entry
+
+    def _remove(self, key: str) -> None:
+        self.size -= len(self._entries.pop(key).body)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    async def _fill(self, key: str, compute: Callable[[], Awaitable[Any]],
+                    timer: Optional[StageTimer]) -> CachedResponse:
+        result = await compute()
+        if timer is None:
+            body = _serialize(result)
+        else:
+            with timer.stage("serialize"):
+                body = _serialize(result)
+        return self.put(key, body)
+
+    def _filled(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Retrieve the exception in case every waiting request went away
+            task.exception()
+
+    async def respond(self, request: Request, key: str, compute: Callable[[], Awaitable[Any]],
+                      timer: Optional[StageTimer] = None) -> Response:
+        """
+        Serve a request from the cache, computing and storing the response on a miss.
+
+        Answers ``If-None-Match`` with 304 when the client already has the
+        current representation. A miss on a key that is already being computed
+        waits for that computation instead of starting another, and the
+        computation finishes even if the request that started it goes away.
+        Exceptions from ``compute`` reach every waiting request and are not cached.
+        Serialization of a miss is timed as the ``serialize`` stage of ``timer``.
+        """
+        entry = self.get(key)
+        if entry is None:
+            task = self._inflight.get(key)
+            if task is None:
+                self.misses += 1
+                task = asyncio.ensure_future(self._fill(key, compute, timer))
+                self._inflight[key] = task
+                task.add_done_callback(lambda done: self._filled(key, done))
+            else:
+                self.coalesced += 1
+            entry = await asyncio.shield(task)
+        else:
+            self.hits += 1
+
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache occupancy and hit counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,430 @@
+"""
+Vectorized Monte Carlo season simulation for playoff and championship odds
+"""
+
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Stream key offset separating playoff rounds from regular season weeks
+_PLAYOFF_STREAM = 1000
+# Standings sort on wins first, points for second
+_WINS_WEIGHT = 1e6
+
+
+class PlayoffFormat:
+    """Playoff settings of a league: number of teams and first playoff week"""
+
+    def __init__(self, playoff_teams: int = 6, playoff_week_start: int = 15):
+        self.playoff_teams = playoff_teams
+        self.playoff_week_start = playoff_week_start
+
+    @classmethod
+    def from_league(cls, league: Dict) -> "PlayoffFormat":
+        """Read the format from Sleeper league settings"""
+        settings = league.get("settings") or {}
+        return cls(
+            playoff_teams=int(settings.get("playoff_teams") or 6),
+            playoff_week_start=int(settings.get("playoff_week_start") or 15)
+        )
+
+    @property
+    def bracket_size(self) -> int:
+        return 1 << max(self.playoff_teams - 1, 0).bit_length()
+
+    @property
+    def byes(self) -> int:
+        """First-round byes, given to the top seeds"""
+        return self.bracket_size - self.playoff_teams
+
+    def bracket_order(self) -> np.ndarray:
+        """Seeds in bracket slot order (1 plays the lowest seed, 2 meets 3...)"""
+        order = [1]
+        while len(order) < self.bracket_size:
+            size = len(order) * 2
+            order = [seed for top in order for seed in (top, size + 1 - top)]
+        return np.array(order)
+
+
+class SeasonState:
+    """
+    Fixed and open parts of a season.
+
+    ``wins``, ``ties`` and ``points_for`` hold completed results per roster;
+    ``weekly_points`` is a (weeks, rosters) matrix of completed scores (NaN when
+    not played) used to estimate score distributions; ``remaining`` lists the
+    regular season weeks still to play as (week, home indices, away indices).
+    """
+
+    def __init__(self, roster_ids: List[str], wins: np.ndarray, ties: np.ndarray,
+                 points_for: np.ndarray, weekly_points: np.ndarray,
+                 remaining: List[Tuple[int, np.ndarray, np.ndarray]], fmt: PlayoffFormat):
+        self.roster_ids = roster_ids
+        self.wins = wins
+        self.ties = ties
+        self.points_for = points_for
+        self.weekly_points = weekly_points
+        self.remaining = remaining
+        # A league cannot send more teams to the playoffs than it has
+        if fmt.playoff_teams > len(roster_ids):
+            fmt = PlayoffFormat(len(roster_ids), fmt.playoff_week_start)
+        self.format = fmt
+
+    @classmethod
+    def from_sleeper(cls, rosters: List[Dict], matchups_by_week: Dict[int, List[Dict]],
+                     last_completed_week: int, fmt: PlayoffFormat) -> "SeasonState":
+        """Build the state from Sleeper rosters and per-week matchups"""
+        roster_ids = [str(roster.get("roster_id")) for roster in rosters]
+        index = {roster_id: i for i, roster_id in enumerate(roster_ids)}
+        n_teams = len(roster_ids)
+        regular_weeks = range(1, fmt.playoff_week_start)
+
+        weekly_points = np.full((len(regular_weeks), n_teams), np.nan)
+        wins, ties, points_for = np.zeros(n_teams), np.zeros(n_teams), np.zeros(n_teams)
+        remaining = []
+        for week in regular_weeks:
+            pairs = _matchup_pairs(matchups_by_week.get(week) or [], index)
+            if week <= last_completed_week:
+                for entry in matchups_by_week.get(week) or []:
+                    team = index.get(str(entry.get("roster_id")))
+                    if team is not None and entry.get("points") is not None:
+                        weekly_points[week - 1, team] = float(entry["points"])
+                for home, away in pairs:
+                    home_points, away_points = weekly_points[week - 1, home], weekly_points[week - 1, away]
+                    wins[home] += home_points > away_points
+                    wins[away] += away_points > home_points
+                    ties[[home, away]] += home_points == away_points
+                points_for += np.nan_to_num(weekly_points[week - 1])
+            elif pairs:
+                pairs = np.array(pairs, dtype=np.intp)
+                remaining.append((week, pairs[:, 0], pairs[:, 1]))
+
+        # Standings recorded on the rosters are authoritative when present
+        for roster in rosters:
+            settings = roster.get("settings") or {}
+            if "wins" in settings:
+                team = index[str(roster.get("roster_id"))]
+                wins[team] = settings.get("wins", 0)
+                ties[team] = settings.get("ties", 0)
+                points_for[team] = settings.get("fpts", 0) + settings.get("fpts_decimal", 0) / 100
+
+        return cls(roster_ids, wins, ties, points_for, weekly_points, remaining, fmt)
+
+    def score_distributions(self, prior_mean: float = 100.0, prior_std: float = 20.0,
+                            shrinkage: float = 3.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Weekly score mean and standard deviation per roster.
+
+        Each team's mean is its average score shrunk toward the league average by
+        ``shrinkage`` pseudo-games; the spread is the league-wide residual
+        standard deviation.
+        """
+        played = ~np.isnan(self.weekly_points)
+        games = played.sum(axis=0)
+        if not played.any():
+            n_teams = len(self.roster_ids)
+            return np.full(n_teams, prior_mean), np.full(n_teams, prior_std)
+
+        league_mean = np.nanmean(self.weekly_points)
+        team_totals = np.nansum(self.weekly_points, axis=0)
+        means = (team_totals + shrinkage * league_mean) / (games + shrinkage)
+
+        team_means = np.divide(team_totals, games, out=np.full(len(games), league_mean), where=games > 0)
+        residuals = (self.weekly_points - team_means)[played]
+        spread = float(np.sqrt((residuals ** 2).sum() / max(played.sum() - 1, 1))) if played.sum() > 1 else prior_std
+        return means, np.full(len(means), max(spread, 1.0))
+
+
+def _matchup_pairs(matchups: List[Dict], index: Dict[str, int]) -> List[Tuple[int, int]]:
+    """(home, away) roster indices of the head-to-head games in a Sleeper matchups list"""
+    games = {}
+    for entry in matchups:
+        team = index.get(str(entry.get("roster_id")))
+        if team is not None and entry.get("matchup_id") is not None:
+            games.setdefault(entry["matchup_id"], []).append(team)
+    return [(teams[0], teams[1]) for _, teams in sorted(games.items()) if len(teams) == 2]
+
+
+def week_scores(seed: int, shard: int, stream: int, n_sims: int,
+                means: np.ndarray, stds: np.ndarray) -> np.ndarray:
+    """
+    Simulated scores (sims, rosters) for one week of one shard.
+
+    Every (shard, week) has its own random stream derived from the seed, so a
+    week can be regenerated identically without replaying the others.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(shard, stream)))
+    return means + stds * rng.standard_normal((n_sims, len(means)))
+
+
+def play_week(wins: np.ndarray, points_for: np.ndarray, scores: np.ndarray,
+              home: np.ndarray, away: np.ndarray, sign: int = 1) -> None:
+    """Add (or with ``sign=-1`` remove) one week's simulated results in place"""
+    home_scores, away_scores = scores[:, home], scores[:, away]
+    wins[:, home] += sign * ((home_scores > away_scores) + 0.5 * (home_scores == away_scores))
+    wins[:, away] += sign * ((away_scores > home_scores) + 0.5 * (home_scores == away_scores))
+    points_for[:, home] += sign * home_scores
+    points_for[:, away] += sign * away_scores
+
+
+def seed_teams(wins: np.ndarray, points_for: np.ndarray) -> np.ndarray:
+    """Roster indices ordered by final standings for every simulation"""
+    return np.argsort(-(wins * _WINS_WEIGHT + points_for), axis=1, kind="stable")
+
+
+def play_playoffs(seeds: np.ndarray, fmt: PlayoffFormat, means: np.ndarray, stds: np.ndarray,
+                  seed: int, shard: int) -> np.ndarray:
+    """Champion roster index of every simulation, through a fixed single-elimination bracket"""
+    n_sims = len(seeds)
+    slots = fmt.bracket_order()
+    bracket = np.where(slots <= fmt.playoff_teams, seeds[:, np.minimum(slots, fmt.playoff_teams) - 1], -1)
+
+    playoff_round = 0
+    while bracket.shape[1] > 1:
+        scores = week_scores(seed, shard, _PLAYOFF_STREAM + playoff_round, n_sims, means, stds)
+        top, bottom = bracket[:, 0::2], bracket[:, 1::2]
+        top_scores = np.take_along_axis(scores, np.maximum(top, 0), axis=1)
+        bottom_scores = np.take_along_axis(scores, np.maximum(bottom, 0), axis=1)
+        # Byes (-1) advance the other team; higher seed wins exact ties
+        top_advances = (bottom < 0) | ((top >= 0) & (top_scores >= bottom_scores))
+        bracket = np.where(top_advances, top, bottom)
+        playoff_round += 1
+    return bracket[:, 0]
+
+
+def outcome_counts(seeds: np.ndarray, champions: np.ndarray, wins: np.ndarray,
+                   fmt: PlayoffFormat) -> Dict[str, np.ndarray]:
+    """Per-roster counts (and sums) of simulated outcomes"""
+    n_teams = seeds.shape[1]
+    final_rank = np.empty_like(seeds)
+    np.put_along_axis(final_rank, seeds, np.arange(1, n_teams + 1)[None, :].repeat(len(seeds), 0), axis=1)
+    return {
+        "playoffs": np.bincount(seeds[:, :fmt.playoff_teams].ravel(), minlength=n_teams),
+        "byes": np.bincount(seeds[:, :fmt.byes].ravel(), minlength=n_teams),
+        "titles": np.bincount(champions, minlength=n_teams),
+        "wins_sum": wins.sum(axis=0),
+        "seed_sum": final_rank.sum(axis=0)
+    }
+
+
+def _simulate_remaining(task: Tuple) -> Tuple[np.ndarray, np.ndarray]:
+    """Simulated wins and points for over the remaining weeks only, for one shard"""
+    state, means, stds, n_sims, seed, shard = task
+    wins = np.zeros((n_sims, len(state.roster_ids)))
+    points_for = np.zeros((n_sims, len(state.roster_ids)))
+    for week, home, away in state.remaining:
+        play_week(wins, points_for, week_scores(seed, shard, week, n_sims, means, stds), home, away)
+    return wins, points_for
+
+
+def _simulate_shard(task: Tuple) -> Dict[str, np.ndarray]:
+    """Simulate one shard of seasons from the current state (runs in a pool worker)"""
+    state, means, stds, n_sims, seed, shard = task
+    n_teams = len(state.roster_ids)
+    wins = np.broadcast_to(state.wins + 0.5 * state.ties, (n_sims, n_teams)).copy()
+    points_for = np.broadcast_to(state.points_for, (n_sims, n_teams)).copy()
+
+    for week, home, away in state.remaining:
+        play_week(wins, points_for, week_scores(seed, shard, week, n_sims, means, stds), home, away)
+
+    seeds = seed_teams(wins, points_for)
+    champions = play_playoffs(seeds, state.format, means, stds, seed, shard)
+    return outcome_counts(seeds, champions, wins, state.format)
+
+
+def summarize(state: SeasonState, counts: Dict[str, np.ndarray], n_sims: int) -> Dict[str, Dict]:
+    """Probabilities per roster from accumulated outcome counts"""
+    return {
+        roster_id: {
+            "playoff_probability": round(float(counts["playoffs"][i] / n_sims), 4),
+            "bye_probability": round(float(counts["byes"][i] / n_sims), 4),
+            "championship_probability": round(float(counts["titles"][i] / n_sims), 4),
+            "expected_wins": round(float(counts["wins_sum"][i] / n_sims), 2),
+            "average_seed": round(float(counts["seed_sum"][i] / n_sims), 2)
+        }
+        for i, roster_id in enumerate(state.roster_ids)
+    }
+
+
+class SeasonSimulator:
+    """
+    Simulates the rest of a season many times over as NumPy array operations.
+
+    Each simulation draws every remaining regular season score from the teams'
+    weekly score distributions, ranks the standings by wins then points for,
+    and plays the league's playoff bracket. Simulations are split into shards
+    of ``shard_size`` to bound memory; with ``n_jobs > 1`` the shards run in a
+    process pool. Results are reproducible for a given ``seed``.
+    """
+
+    def __init__(self, n_sims: int = 100_000, seed: int = 0, n_jobs: int = 1, shard_size: int = 25_000):
+        self.n_sims = n_sims
+        self.seed = seed
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.shard_size = shard_size
+
+    def simulate(self, state: SeasonState, means: Optional[np.ndarray] = None,
+                 stds: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Playoff, bye and title probabilities per roster"""
+        start = time.perf_counter()
+        if means is None or stds is None:
+            means, stds = state.score_distributions()
+
+        shard_sizes = [self.shard_size] * (self.n_sims // self.shard_size)
+        if self.n_sims % self.shard_size:
+            shard_sizes.append(self.n_sims % self.shard_size)
+        tasks = [(state, means, stds, size, self.seed, shard) for shard, size in enumerate(shard_sizes)]
+
+        if self.n_jobs > 1 and len(tasks) > 1:
+            # Spawned, not forked: the server simulates from a thread of a process holding
+            # an event loop, sockets and locks
+            with ProcessPoolExecutor(max_workers=min(self.n_jobs, len(tasks)),
+                                     mp_context=multiprocessing.get_context("spawn")) as executor:
+                shard_counts = list(executor.map(_simulate_shard, tasks))
+        else:
+            shard_counts = [_simulate_shard(task) for task in tasks]
+
+        counts = {key: sum(shard[key] for shard in shard_counts) for key in shard_counts[0]}
+        return {
+            "teams": summarize(state, counts, self.n_sims),
+            "simulations": self.n_sims,
+            "remaining_weeks": [week for week, _, _ in state.remaining],
+            "simulation_time": round(time.perf_counter() - start, 4)
+        }
+
+
+class SeasonOddsTracker:
+    """
+    Cached simulation state of one league, updated incrementally.
+
+    Keeps, per shard, the simulated wins and points for accumulated over the
+    remaining regular season weeks, plus the score distribution each week was
+    drawn with. Because every (shard, week) has its own random stream, a
+    week's simulated results can be regenerated exactly and taken back out:
+
+    * ``finalize_week`` removes a week's simulated games and adds the real
+      result, leaving every other week untouched;
+    * ``update_team`` (e.g. after a trade) redraws only the games of that
+      roster with its new distribution.
+
+    Only the playoff bracket is replayed on each ``odds`` call. The initial
+    simulation can be spread over a process pool with ``n_jobs``.
+    """
+
+    def __init__(self, state: SeasonState, means: Optional[np.ndarray] = None,
+                 stds: Optional[np.ndarray] = None, n_sims: int = 50_000, seed: int = 0,
+                 shard_size: int = 25_000, n_jobs: int = 1):
+        if means is None or stds is None:
+            means, stds = state.score_distributions()
+        self.state = state
+        self.means = np.array(means, dtype=float)
+        self.stds = np.array(stds, dtype=float)
+        self.seed = seed
+        self.n_sims = n_sims
+
+        sizes = [shard_size] * (n_sims // shard_size) + ([n_sims % shard_size] if n_sims % shard_size else [])
+        self.week_params = {week: (self.means.copy(), self.stds.copy()) for week, _, _ in state.remaining}
+
+        tasks = [(state, self.means, self.stds, size, seed, shard) for shard, size in enumerate(sizes)]
+        if n_jobs > 1 and len(tasks) > 1:
+            # Spawned, not forked, for the same reason as SeasonSimulator.simulate
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)),
+                                     mp_context=multiprocessing.get_context("spawn")) as executor:
+                totals = list(executor.map(_simulate_remaining, tasks))
+        else:
+            totals = [_simulate_remaining(task) for task in tasks]
+        self.shards = [
+            {"shard": shard, "size": size, "wins": wins, "points_for": points_for}
+            for (shard, size), (wins, points_for) in zip(enumerate(sizes), totals)
+        ]
+        self._odds = None
+
+    def odds(self) -> Dict[str, Any]:
+        """Playoff, bye and title probabilities per roster from the cached state"""
+        if self._odds is not None:
+            return self._odds
+
+        start = time.perf_counter()
+        state = self.state
+        counts = None
+        for shard in self.shards:
+            wins = shard["wins"] + (state.wins + 0.5 * state.ties)
+            points_for = shard["points_for"] + state.points_for
+            seeds = seed_teams(wins, points_for)
+            champions = play_playoffs(seeds, state.format, self.means, self.stds, self.seed, shard["shard"])
+            shard_counts = outcome_counts(seeds, champions, wins, state.format)
+            counts = shard_counts if counts is None else {key: counts[key] + shard_counts[key] for key in counts}
+
+        self._odds = {
+            "teams": summarize(state, counts, self.n_sims),
+            "simulations": self.n_sims,
+            "remaining_weeks": [week for week, _, _ in state.remaining],
+            "simulation_time": round(time.perf_counter() - start, 4)
+        }
+        return self._odds
+
+    def finalize_week(self, week: int, matchups: List[Dict]) -> bool:
+        """Replace a week's simulated games with its actual results; False if it was not open"""
+        state = self.state
+        games = [(w, home, away) for w, home, away in state.remaining if w == week]
+        if not games:
+            return False
+        _, home, away = games[0]
+
+        self._apply_week(week, home, away, sign=-1)
+        del self.week_params[week]
+        state.remaining = [game for game in state.remaining if game[0] != week]
+
+        index = {roster_id: i for i, roster_id in enumerate(state.roster_ids)}
+        points = np.full(len(state.roster_ids), np.nan)
+        for entry in matchups:
+            team = index.get(str(entry.get("roster_id")))
+            if team is not None and entry.get("points") is not None:
+                points[team] = float(entry["points"])
+        for home_team, away_team in _matchup_pairs(matchups, index):
+            state.wins[home_team] += points[home_team] > points[away_team]
+            state.wins[away_team] += points[away_team] > points[home_team]
+            state.ties[[home_team, away_team]] += points[home_team] == points[away_team]
+        state.points_for += np.nan_to_num(points)
+        if week <= len(state.weekly_points):
+            state.weekly_points[week - 1] = points
+
+        self._odds = None
+        return True
+
+    def update_team(self, roster_id: str, mean: float, std: Optional[float] = None) -> int:
+        """Redraw a roster's remaining games with a new score distribution; returns games redrawn"""
+        team = self.state.roster_ids.index(str(roster_id))
+        self.means[team] = mean
+        if std is not None:
+            self.stds[team] = std
+
+        redrawn = 0
+        for week, home, away in self.state.remaining:
+            game = (home == team) | (away == team)
+            if not game.any():
+                continue
+            self._apply_week(week, home[game], away[game], sign=-1)
+            means, stds = self.week_params[week]
+            means[team] = mean
+            if std is not None:
+                stds[team] = std
+            self._apply_week(week, home[game], away[game], sign=1)
+            redrawn += int(game.sum())
+
+        self._odds = None
+        return redrawn
+
+    def _apply_week(self, week: int, home: np.ndarray, away: np.ndarray, sign: int) -> None:
+        """Add or remove the given games of a week in every shard, regenerated from their streams"""
+        means, stds = self.week_params[week]
+        for shard in self.shards:
+            scores = week_scores(self.seed, shard["shard"], week, shard["size"], means, stds)
+            play_week(shard["wins"], shard["points_for"], scores, home, away, sign)
@@ -3,8 +3,12 @@ import aiohttp
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
+from collections import OrderedDict
 import json
 
+from .timing import gather_bounded
+from .player_registry import PlayerRegistry
+
 logger = logging.getLogger(__name__)
 
 class SleeperAPIClient:
@@ -17,6 +21,14 @@ class SleeperAPIClient:
         self.session = None
         self._players_cache = {}
         self._cache_expiry = {}
+        self.players_version = None
+        self._player_registry = None
+        # Current season and week, refreshed every few minutes
+        self._nfl_state = None
+        self._nfl_state_expiry = None
+        # (season, week) -> (fetch task, expiry); whole-week stat dumps are large, so keep a few
+        self._week_stats_cache = OrderedDict()
+        self._week_stats_cache_size = 20
         
     async def __aenter__(self):
         self.session = aiohttp.ClientSession()
@@ -88,6 +100,7 @@ class SleeperAPIClient:
         # Cache for 1 hour
         self._players_cache[cache_key] = players
         self._cache_expiry[cache_key] = datetime.now() + timedelta(hours=1)
+        self.players_version = datetime.now().isoformat()
         
         return players
     
@@ -96,9 +109,28 @@ class SleeperAPIClient:
         all_players = await self.get_all_players()
         return all_players.get(player_id, {})
     
+    async def get_player_registry(self) -> PlayerRegistry:
+        """Columnar display fields of the cached players snapshot, rebuilt when the snapshot refreshes"""
+        players = await self.get_all_players()
+        if self._player_registry is None or self._player_registry.version != self.players_version:
+            self._player_registry = PlayerRegistry.build(players, version=self.players_version)
+        return self._player_registry
+    
+    async def get_players_display(self, player_ids: List[str]) -> List[Optional[Dict]]:
+        """Name, position and team of many players in one lookup; None for unknown IDs"""
+        registry = await self.get_player_registry()
+        return registry.hydrate(player_ids)
+    
     async def get_nfl_state(self) -> Dict:
-        """Get current NFL state (week, season, etc.)"""
-        return await self._get("state/nfl")
+        """Get current NFL state (week, season, etc.), cached for a few minutes"""
+        if self._nfl_state_expiry and datetime.now() < self._nfl_state_expiry:
+            return self._nfl_state
+        
+        state = await self._get("state/nfl")
+        if state:
+            self._nfl_state = state
+            self._nfl_state_expiry = datetime.now() + timedelta(minutes=5)
+        return state
     
     async def get_trending_players(self, sport: str = "nfl", add_drop: str = "add", 
                                  hours: int = 24, limit: int = 25) -> List[Dict]:
@@ -110,27 +142,64 @@ class SleeperAPIClient:
         }
         return await self._get(f"players/{sport}/trending", params)
     
+    async def get_week_stats(self, season: str, week: int) -> Dict[str, Dict]:
+        """
+        Get regular season stats of every player for one week, keyed by player ID
+        
+        Cached: the current week for 5 minutes, earlier weeks for 6 hours (stat
+        corrections). Concurrent callers share one request. Treat the result as
+        read-only.
+        """
+        key = (str(season), int(week))
+        entry = self._week_stats_cache.get(key)
+        if entry is not None and datetime.now() < entry[1]:
+            self._week_stats_cache.move_to_end(key)
+            return await asyncio.shield(entry[0])
+        
+        nfl_state = self._nfl_state or {}
+        is_current = key == (str(nfl_state.get("season")), int(nfl_state.get("week") or 0))
+        expiry = datetime.now() + (timedelta(minutes=5) if is_current else timedelta(hours=6))
+        task = asyncio.ensure_future(self._get(f"stats/nfl/regular/{season}/{week}"))
+        self._week_stats_cache[key] = (task, expiry)
+        self._week_stats_cache.move_to_end(key)
+        while len(self._week_stats_cache) > self._week_stats_cache_size:
+            self._week_stats_cache.popitem(last=False)
+        
+        week_stats = await asyncio.shield(task)
+        if not week_stats and self._week_stats_cache.get(key, (None,))[0] is task:
+            # Don't keep failed requests
+            del self._week_stats_cache[key]
+        return week_stats
+    
     async def get_player_stats(self, player_id: str, weeks: int = 8, season: str = "2024") -> List[Dict]:
         """Get player stats for recent weeks"""
+        stats = await self.get_players_stats([player_id], weeks, season)
+        return stats.get(player_id, [])
+    
+    async def get_players_stats(self, player_ids: List[str], weeks: int = 8, season: str = "2024",
+                                concurrency: Optional[int] = None) -> Dict[str, List[Dict]]:
+        """Get recent weekly stats of many players, fetching each week once (``concurrency`` at a time)"""
         try:
             nfl_state = await self.get_nfl_state()
             current_week = nfl_state.get("week", 1)
             
-            stats = []
-            start_week = max(1, current_week - weeks)
+            week_range = list(range(max(1, current_week - weeks), current_week + 1))
+            all_week_stats = await gather_bounded(
+                concurrency or len(week_range),
+                *(self.get_week_stats(season, week) for week in week_range)
+            )
             
-            for week in range(start_week, current_week + 1):
-                week_stats = await self._get(f"stats/nfl/regular/{season}/{week}")
-                player_stats = week_stats.get(player_id, {})
-                if player_stats:
-                    player_stats["week"] = week
-                    player_stats["season"] = season
-                    stats.append(player_stats)
+            stats = {player_id: [] for player_id in player_ids}
+            for week, week_stats in zip(week_range, all_week_stats):
+                for player_id in player_ids:
+                    player_stats = week_stats.get(player_id)
+                    if player_stats:
+                        stats[player_id].append({**player_stats, "week": week, "season": season})
             
             return stats
         except Exception as e:
-            logger.error(f"Error fetching player stats for {player_id}: {str(e)}")
-            return []
+            logger.error(f"Error fetching player stats for {len(player_ids)} players: {str(e)}")
+            return {player_id: [] for player_id in player_ids}
     
     async def get_player_career_stats(self, player_id: str) -> List[Dict]:
         """Get player career statistics"""
@@ -172,10 +241,11 @@ class SleeperAPIClient:
             "reserve": []
         }
     
-    async def get_available_players(self, league_id: str) -> List[Dict]:
+    async def get_available_players(self, league_id: str, rosters: Optional[List[Dict]] = None) -> List[Dict]:
         """Get available players in a league"""
         try:
-            rosters = await self.get_league_rosters(league_id)
+            if rosters is None:
+                rosters = await self.get_league_rosters(league_id)
             all_players = await self.get_all_players()
             
             # Get all rostered players
@@ -0,0 +1,63 @@
+"""
+Opt-in NDJSON streaming of large list responses
+"""
+
+import logging
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Union
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from .serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+NDJSON = "application/x-ndjson"
+
+# Lists of rows, produced synchronously or asynchronously
+Batches = Union[AsyncIterable[Iterable[Any]], Iterable[Iterable[Any]]]
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Whether the client asked for NDJSON with ``Accept: application/x-ndjson``"""
+    return NDJSON in request.headers.get("accept", "")
+
+
+def _encode_rows(rows: Iterable[Any]) -> bytes:
+    """One compact JSON document per row, newline-terminated"""
+    return b"".join(dumps(row) + b"\n" for row in rows)
+
+
+async def _aiter(batches: Batches) -> AsyncIterator[Iterable[Any]]:
+    if hasattr(batches, "__aiter__"):
+        async for batch in batches:
+            yield batch
+    else:
+        for batch in batches:
+            yield batch
+
+
+async def _ndjson_chunks(batches: Batches) -> AsyncIterator[bytes]:
+    try:
+        async for batch in _aiter(batches):
+            chunk = _encode_rows(batch)
+            if chunk:
+                yield chunk
+    except Exception as e:
+        # Headers are already sent, so a failure ends the stream with an error line
+        logger.error(f"Error streaming response: {str(e)}")
+        yield _encode_rows([{"error": "Error generating results"}])
+
+
+def ndjson_response(batches: Batches, headers: dict = None) -> StreamingResponse:
+    """
+    Stream rows as newline-delimited JSON.
+
+    ``batches`` yields lists of rows as they are produced; each batch is
+    serialized and flushed as one chunk, so the first rows go out before
+    later ones are computed and only one batch is held in memory. The next
+    batch is not requested until the previous chunk has been handed to the
+    connection, so a slow client slows production down, and a disconnect
+    cancels it.
+    """
+    return StreamingResponse(_ndjson_chunks(batches), media_type=NDJSON, headers=headers)
@@ -0,0 +1,72 @@
+"""
+Per-request stage timing and bounded concurrent fan-out
+"""
+
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Dict, List, Any, Awaitable, Iterator
+
+from .metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+async def gather_bounded(limit: int, *awaitables: Awaitable, return_exceptions: bool = False) -> List[Any]:
+    """``asyncio.gather`` with at most ``limit`` awaitables running at once"""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def bounded(awaitable: Awaitable) -> Any:
+        async with semaphore:
+            return await awaitable
+
+    return await asyncio.gather(*(bounded(awaitable) for awaitable in awaitables),
+                                return_exceptions=return_exceptions)
+
+
+class StageTimer:
+    """
+    Wall-clock duration of the named stages of one request.
+
+    Stages may overlap when they run concurrently; ``total`` is the elapsed
+    time since the timer was created. Durations are reported in
+    milliseconds and can be sent as a ``Server-Timing`` header. Each stage
+    is also observed in the ``analytics_stage_duration_seconds`` histogram,
+    labeled by the timer's name.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block (which may await)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed * 1000
+            STAGE_SECONDS.labels(self.name, name).observe(elapsed)
+
+    async def run(self, name: str, awaitable: Awaitable) -> Any:
+        """Await and time one stage, e.g. as one branch of a gather"""
+        with self.stage(name):
+            return await awaitable
+
+    def total(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def as_dict(self) -> Dict[str, float]:
+        """Stage durations and the request total, in milliseconds"""
+        return {**{name: round(ms, 2) for name, ms in self.stages.items()}, "total": round(self.total(), 2)}
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value"""
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.as_dict().items())
+
+    def log(self) -> None:
+        logger.info(f"{self.name} stage timings (ms): {self.as_dict()}")
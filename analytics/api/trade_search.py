@@ -0,0 +1,199 @@
+"""
+League-wide trade search over small player packages
+"""
+
+import time
+import logging
+from itertools import combinations
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Package shapes searched, as (players given, players received)
+TRADE_SHAPES = [(1, 1), (2, 1), (1, 2), (2, 2)]
+
+
+class TradeSearchEngine:
+    """
+    Enumerates trade packages between one roster and every other roster in a
+    league and returns the trades that help both sides most.
+
+    Each team values a player at ``value * need_weight[position]``, where the
+    need weight grows with the team's league rank at that position (weakest
+    team 1.25, strongest 0.75). A trade is mutually beneficial when both teams
+    gain weighted value; candidates are ranked by the smaller of the two gains.
+
+    Pruning keeps the search small:
+
+    * only each roster's ``pool_size`` most valuable starter-position players
+      are tradeable;
+    * package pairs are only scored when their raw values are within
+      ``value_band`` of each other, found by binary search over sorted
+      package values;
+    * each side must receive at least one player at a position where it is
+      not already strong.
+    """
+
+    def __init__(self, positions: Optional[List[str]] = None, pool_size: int = 12,
+                 value_band: float = 0.25, min_value: float = 1.0, min_gain: float = 0.5,
+                 shape_limit: int = 50):
+        self.positions = positions or ["QB", "RB", "WR", "TE"]
+        self.pool_size = pool_size
+        self.value_band = value_band
+        self.min_value = min_value
+        self.min_gain = min_gain
+        self.shape_limit = shape_limit
+
+    def search(self, my_roster_id: str, rosters: List[Dict], players: Dict[str, Dict],
+               league_positions: Dict[str, Dict], player_values: Dict[str, float],
+               top_n: int = 10, max_per_team: int = 3) -> Dict[str, Any]:
+        """Find the ``top_n`` best mutually beneficial trades for ``my_roster_id``"""
+        start = time.perf_counter()
+        my_roster_id = str(my_roster_id)
+        roster_ids = [str(roster.get("roster_id")) for roster in rosters]
+        if my_roster_id not in roster_ids or len(roster_ids) < 2:
+            return {"trades": [], "candidates_scored": 0, "search_time": 0.0}
+
+        weights, strong = self._need_weights(roster_ids, league_positions)
+        me = roster_ids.index(my_roster_id)
+
+        pools = [self._trade_pool(roster, players, player_values) for roster in rosters]
+        my_pool = pools[me]
+
+        trades, scored = [], 0
+        for team, roster_id in enumerate(roster_ids):
+            if team == me or not len(pools[team][0]) or not len(my_pool[0]):
+                continue
+            team_trades, team_scored = self._search_partner(
+                my_pool, pools[team], weights[[me, team]], strong[[me, team]]
+            )
+            scored += team_scored
+            for trade in team_trades[:max_per_team]:
+                trades.append({"partner_roster_id": roster_id, **trade})
+
+        trades.sort(key=lambda trade: (trade["score"], trade["my_gain"] + trade["partner_gain"]), reverse=True)
+        return {
+            "trades": trades[:top_n],
+            "candidates_scored": scored,
+            "search_time": round(time.perf_counter() - start, 4)
+        }
+
+    def _need_weights(self, roster_ids: List[str],
+                      league_positions: Dict[str, Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """Need weight and "already strong" flag per (roster, position)"""
+        n_teams = len(roster_ids)
+        weights = np.ones((n_teams, len(self.positions)))
+        strong = np.zeros((n_teams, len(self.positions)), dtype=bool)
+        for r, roster_id in enumerate(roster_ids):
+            analysis = league_positions.get(roster_id, {})
+            for j, position in enumerate(self.positions):
+                info = analysis.get(position)
+                if not info:
+                    continue
+                weights[r, j] = 0.75 + 0.5 * (info["league_rank"] - 1) / max(n_teams - 1, 1)
+                strong[r, j] = info["strength"] == "strong"
+        return weights, strong
+
+    def _trade_pool(self, roster: Dict, players: Dict[str, Dict],
+                    player_values: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Player IDs, values and position columns of a roster's tradeable players, most valuable first"""
+        candidates = []
+        for player_id in roster.get("players") or []:
+            position = players.get(player_id, {}).get("position")
+            value = player_values.get(player_id, 0.0)
+            if position in self.positions and value >= self.min_value:
+                candidates.append((value, player_id, self.positions.index(position)))
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        candidates = candidates[:self.pool_size]
+        return (
+            np.array([c[1] for c in candidates], dtype=object),
+            np.array([c[0] for c in candidates], dtype=float),
+            np.array([c[2] for c in candidates], dtype=np.intp)
+        )
+
+    @staticmethod
+    def _packages(pool_size: int, size: int) -> np.ndarray:
+        """Index rows of every package of ``size`` players from a pool"""
+        if pool_size < size:
+            return np.empty((0, size), dtype=np.intp)
+        return np.array(list(combinations(range(pool_size), size)), dtype=np.intp).reshape(-1, size)
+
+    def _search_partner(self, my_pool, their_pool, weights: np.ndarray,
+                        strong: np.ndarray) -> Tuple[List[Dict], int]:
+        """Score every package pair with one partner; ``weights``/``strong`` rows are (me, partner)"""
+        my_ids, my_values, my_positions = my_pool
+        their_ids, their_values, their_positions = their_pool
+
+        results = []
+        scored = 0
+        for give_size, receive_size in TRADE_SHAPES:
+            give = self._packages(len(my_ids), give_size)
+            receive = self._packages(len(their_ids), receive_size)
+            if not len(give) or not len(receive):
+                continue
+
+            give_raw = my_values[give].sum(axis=1)
+            receive_raw = their_values[receive].sum(axis=1)
+
+            # Pair packages whose raw values lie within the band, via sorted receive values
+            order = np.argsort(receive_raw, kind="stable")
+            sorted_raw = receive_raw[order]
+            lo = np.searchsorted(sorted_raw, give_raw * (1 - self.value_band), side="left")
+            hi = np.searchsorted(sorted_raw, give_raw / (1 - self.value_band), side="right")
+            counts = hi - lo
+            if not counts.sum():
+                continue
+            give_index = np.repeat(np.arange(len(give)), counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            receive_index = order[np.repeat(lo, counts) + offsets]
+
+            # Need filter: each side receives a position it is not already strong at
+            gives = give[give_index]
+            receives = receive[receive_index]
+            give_pos = my_positions[gives]
+            receive_pos = their_positions[receives]
+            keep = (~strong[0, receive_pos]).any(axis=1) & (~strong[1, give_pos]).any(axis=1)
+            gives, receives = gives[keep], receives[keep]
+            give_pos, receive_pos = give_pos[keep], receive_pos[keep]
+            scored += int(keep.sum())
+            if not len(gives):
+                continue
+
+            give_values = my_values[gives]
+            receive_values = their_values[receives]
+            my_gain = (weights[0, receive_pos] * receive_values).sum(axis=1) - \
+                (weights[0, give_pos] * give_values).sum(axis=1)
+            partner_gain = (weights[1, give_pos] * give_values).sum(axis=1) - \
+                (weights[1, receive_pos] * receive_values).sum(axis=1)
+
+            # Only the best few per shape become dicts
+            beneficial = np.flatnonzero((my_gain >= self.min_gain) & (partner_gain >= self.min_gain))
+            score = np.minimum(my_gain, partner_gain)[beneficial]
+            best = beneficial[np.lexsort((-(my_gain + partner_gain)[beneficial], -score))[:self.shape_limit]]
+            for i in best:
+                results.append({
+                    "give": [str(pid) for pid in my_ids[gives[i]]],
+                    "receive": [str(pid) for pid in their_ids[receives[i]]],
+                    "give_value": round(float(give_values[i].sum()), 1),
+                    "receive_value": round(float(receive_values[i].sum()), 1),
+                    "my_gain": round(float(my_gain[i]), 2),
+                    "partner_gain": round(float(partner_gain[i]), 2),
+                    "score": round(float(min(my_gain[i], partner_gain[i])), 2)
+                })
+
+        results.sort(key=lambda trade: (trade["score"], trade["my_gain"] + trade["partner_gain"]), reverse=True)
+        return self._distinct(results), scored
+
+    @staticmethod
+    def _distinct(trades: List[Dict]) -> List[Dict]:
+        """Drop trades that reuse a player already offered in a better trade with the same partner"""
+        used, distinct = set(), []
+        for trade in trades:
+            players = set(trade["give"]) | set(trade["receive"])
+            if players & used:
+                continue
+            used |= players
+            distinct.append(trade)
+        return distinct
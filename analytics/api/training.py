@@ -0,0 +1,253 @@
+"""
+Parallel, cached training pipeline for the player projection model
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.linear_model import SGDRegressor
+from sklearn.model_selection import KFold
+from sklearn.preprocessing import StandardScaler
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from threadpoolctl import threadpool_limits
+
+from .models import PlayerProjectionModel, PROJECTION_FEATURES
+
+logger = logging.getLogger(__name__)
+
+# Hyperparameter candidates; "backend" picks classic or histogram-based boosting.
+# A {"backend": "sgd", ...} candidate trains a linear model that is updated
+# weekly with partial_fit instead of extra boosting rounds.
+DEFAULT_CANDIDATES = [
+    {"backend": "gbr", "n_estimators": 100, "learning_rate": 0.1, "max_depth": 6},
+    {"backend": "gbr", "n_estimators": 200, "learning_rate": 0.05, "max_depth": 4},
+    {"backend": "hist", "max_iter": 200, "learning_rate": 0.1, "max_depth": 6},
+    {"backend": "hist", "max_iter": 400, "learning_rate": 0.05, "max_leaf_nodes": 31},
+]
+
+
+def build_estimator(candidate: Dict[str, Any], random_state: int = 42):
+    """Instantiate the regressor described by a candidate"""
+    params = {key: value for key, value in candidate.items() if key != "backend"}
+    backend = candidate.get("backend", "gbr")
+    if backend == "hist":
+        return HistGradientBoostingRegressor(random_state=random_state, **params)
+    if backend == "sgd":
+        return SGDRegressor(random_state=random_state, **params)
+    return GradientBoostingRegressor(random_state=random_state, **params)
+
+
+# Training data shared with pool workers once, instead of pickling it per task
+_worker_X = None
+_worker_y = None
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray) -> None:
+    global _worker_X, _worker_y
+    _worker_X, _worker_y = X, y
+
+
+def _fit_fold(task: Tuple[int, Dict[str, Any], np.ndarray, np.ndarray, int]) -> Dict[str, Any]:
+    """Fit one candidate on one cross-validation fold (runs in a pool worker)"""
+    candidate_index, candidate, train_index, val_index, random_state = task
+
+    # One thread per process: the pool already uses every core
+    with threadpool_limits(limits=1):
+        scaler = StandardScaler().fit(_worker_X[train_index])
+        X_train = scaler.transform(_worker_X[train_index])
+        X_val = scaler.transform(_worker_X[val_index])
+
+        estimator = build_estimator(candidate, random_state)
+        start = time.perf_counter()
+        estimator.fit(X_train, _worker_y[train_index])
+        fit_time = time.perf_counter() - start
+
+        y_val = _worker_y[val_index]
+        y_pred = estimator.predict(X_val)
+
+    return {
+        "candidate": candidate_index,
+        "fit_time": fit_time,
+        "mae": mean_absolute_error(y_val, y_pred),
+        "rmse": float(np.sqrt(mean_squared_error(y_val, y_pred))),
+        "r2": r2_score(y_val, y_pred)
+    }
+
+
+class TrainingPipeline:
+    """
+    Trains the projection model from batch-built, disk-cached features.
+
+    Every (candidate, fold) pair is fitted in a process pool across all cores; the
+    best candidate by mean validation MAE is refit on the full data set and
+    installed on the model.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, n_jobs: Optional[int] = None,
+                 n_folds: int = 5, candidates: Optional[List[Dict[str, Any]]] = None,
+                 random_state: int = 42):
+        self.cache_dir = cache_dir
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.n_folds = n_folds
+        self.candidates = candidates or DEFAULT_CANDIDATES
+        self.random_state = random_state
+
+    def build_dataset(self, model: PlayerProjectionModel, training_data: List[Dict],
+                      data_version: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, bool]:
+        """Feature matrix and targets, read from the cache when this data version was built before"""
+        cache_path = self._cache_path(data_version)
+        if cache_path and os.path.isfile(cache_path):
+            with np.load(cache_path) as cached:
+                return cached["X"], cached["y"], True
+
+        X, y = model.build_training_set(training_data)
+
+        if cache_path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+            np.savez(tmp_path, X=X, y=y)
+            os.replace(tmp_path, cache_path)
+
+        return X, y, False
+
+    def evaluate(self, X: np.ndarray, y: np.ndarray) -> List[Dict[str, Any]]:
+        """Cross-validate every candidate in parallel; one report row per candidate"""
+        folds = list(KFold(n_splits=self.n_folds, shuffle=True, random_state=self.random_state).split(X))
+        tasks = [
+            (index, candidate, train_index, val_index, self.random_state)
+            for index, candidate in enumerate(self.candidates)
+            for train_index, val_index in folds
+        ]
+
+        with ProcessPoolExecutor(max_workers=min(self.n_jobs, len(tasks)),
+                                 initializer=_init_worker, initargs=(X, y)) as executor:
+            fold_results = list(executor.map(_fit_fold, tasks))
+
+        report = []
+        for index, candidate in enumerate(self.candidates):
+            results = [result for result in fold_results if result["candidate"] == index]
+            report.append({
+                "candidate": candidate,
+                "fit_time_mean": round(float(np.mean([r["fit_time"] for r in results])), 4),
+                "fit_time_total": round(float(np.sum([r["fit_time"] for r in results])), 4),
+                "mae_mean": round(float(np.mean([r["mae"] for r in results])), 4),
+                "mae_std": round(float(np.std([r["mae"] for r in results])), 4),
+                "rmse_mean": round(float(np.mean([r["rmse"] for r in results])), 4),
+                "r2_mean": round(float(np.mean([r["r2"] for r in results])), 4)
+            })
+        return report
+
+    def run(self, model: PlayerProjectionModel, training_data: List[Dict],
+            data_version: Optional[str] = None) -> Dict[str, Any]:
+        """Build features, cross-validate candidates, refit the best and install it on the model"""
+        start = time.perf_counter()
+        X, y, cache_hit = self.build_dataset(model, training_data, data_version)
+        feature_time = time.perf_counter() - start
+
+        if len(X) < max(10, self.n_folds):
+            logger.warning("Insufficient training data")
+            return {"error": "Insufficient training data"}
+
+        cv_start = time.perf_counter()
+        report = self.evaluate(X, y)
+        cv_time = time.perf_counter() - cv_start
+
+        best = min(report, key=lambda row: row["mae_mean"])
+        refit_start = time.perf_counter()
+        scaler = StandardScaler().fit(X)
+        X_scaled = scaler.transform(X)
+        estimator = build_estimator(best["candidate"], self.random_state).fit(X_scaled, y)
+        model.install_estimator(estimator, scaler, validation_features=X_scaled[:500])
+        refit_time = time.perf_counter() - refit_start
+
+        return {
+            "best_candidate": best["candidate"],
+            "candidates": report,
+            "samples": int(len(X)),
+            "folds": self.n_folds,
+            "n_jobs": self.n_jobs,
+            "feature_cache_hit": cache_hit,
+            "feature_time": round(feature_time, 4),
+            "cv_time": round(cv_time, 4),
+            "refit_time": round(refit_time, 4),
+            "total_time": round(time.perf_counter() - start, 4)
+        }
+
+    def _cache_path(self, data_version: Optional[str]) -> Optional[str]:
+        """Cache file for a data version; the feature layout is part of the key"""
+        if not self.cache_dir or not data_version:
+            return None
+        key = hashlib.sha1(f"{data_version}|{','.join(PROJECTION_FEATURES)}".encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"features-{key}.npz")
+
+
+def resolve_training_data(data_dir: str, name: str) -> str:
+    """Path of a training data file named relative to ``data_dir``; names outside it are a ValueError"""
+    root = os.path.realpath(data_dir)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        raise ValueError(f"Unknown training data: {name}")
+    return path
+
+
+def train_and_publish(training_data_path: str, data_version: Optional[str] = None,
+                      cache_dir: Optional[str] = ".feature_cache", n_jobs: Optional[int] = None,
+                      folds: int = 5, output: Optional[str] = None, registry: Optional[str] = None,
+                      activate: bool = False) -> Dict[str, Any]:
+    """Train on a JSON file of processed player dicts, then save and/or publish the model"""
+    with open(training_data_path) as f:
+        training_data = json.load(f)
+
+    model = PlayerProjectionModel()
+    pipeline = TrainingPipeline(cache_dir=cache_dir, n_jobs=n_jobs, n_folds=folds)
+    report = model.train(training_data, pipeline=pipeline, data_version=data_version)
+    if "error" in report:
+        return report
+
+    if output:
+        model.save_model(output)
+    if registry:
+        from .model_registry import ModelRegistry
+        report["version"] = ModelRegistry(registry).publish(
+            model,
+            metadata={"data_version": data_version, "training_report": report},
+            activate=activate
+        )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the player projection model")
+    parser.add_argument("training_data", help="JSON file with a list of processed player dicts")
+    parser.add_argument("--data-version", help="Version of the training data, used as the feature cache key")
+    parser.add_argument("--cache-dir", default=".feature_cache")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--output", help="Artifact directory to save the trained model to")
+    parser.add_argument("--registry", help="Model registry to publish the trained model to")
+    parser.add_argument("--activate", action="store_true", help="Activate the published registry version")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = train_and_publish(
+        args.training_data, data_version=args.data_version, cache_dir=args.cache_dir, n_jobs=args.jobs,
+        folds=args.folds, output=args.output, registry=args.registry, activate=args.activate
+    )
+    print(json.dumps(report, indent=2))
+
+    if "error" in report:
+        raise SystemExit(1)
+    if "version" in report:
+        print(f"Published model version {report['version']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Incremental weekly updates for the player projection model
+"""
+
+import copy
+import json
+import time
+import zlib
+import logging
+import argparse
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+
+from .data_processor import DataProcessor
+from .models import PlayerProjectionModel
+from .model_registry import ModelRegistry, training_cutoff
+from .backtest import PROJECTED_POSITIONS
+
+logger = logging.getLogger(__name__)
+
+
+def supports_incremental(estimator) -> bool:
+    """Check whether an estimator can absorb a new week without a full retrain"""
+    return (
+        hasattr(estimator, "partial_fit")
+        or isinstance(estimator, (GradientBoostingRegressor, HistGradientBoostingRegressor))
+    )
+
+
+class WeeklyUpdater:
+    """
+    Folds one finalized week of data into an already trained projection model.
+
+    Boosted models are warm-started: the existing trees are kept and
+    ``trees_per_week`` new ones are fitted on the residuals of the new week.
+    Linear backends are updated with ``partial_fit``. The feature scaler is kept
+    as-is so earlier trees still see features on the scale they were trained on.
+
+    The updated model is only accepted when its MAE on the holdout set is no
+    worse than the current model's, within ``tolerance``.
+    """
+
+    def __init__(self, trees_per_week: int = 20, tolerance: float = 0.0):
+        self.trees_per_week = trees_per_week
+        self.tolerance = tolerance
+
+    def build_update(self, model: PlayerProjectionModel, new_data: List[Dict]) -> PlayerProjectionModel:
+        """Copy of the model with the new week's examples folded in"""
+        model.ensure_loaded()
+        estimator = model.get_estimator()
+        if estimator is None or not supports_incremental(estimator):
+            raise ValueError(f"{type(estimator).__name__} cannot be updated incrementally; run a full retrain")
+
+        X, y = model.build_training_set(new_data)
+        if len(X) == 0:
+            raise ValueError("No eligible examples in the new week's data")
+
+        scaler = copy.deepcopy(model.scaler)
+        X_scaled = scaler.transform(X)
+        estimator = copy.deepcopy(estimator)
+
+        if isinstance(estimator, GradientBoostingRegressor):
+            estimator.set_params(warm_start=True, n_estimators=estimator.n_estimators_ + self.trees_per_week)
+            estimator.fit(X_scaled, y)
+        elif isinstance(estimator, HistGradientBoostingRegressor):
+            estimator.set_params(warm_start=True, max_iter=estimator.n_iter_ + self.trees_per_week)
+            estimator.fit(X_scaled, y)
+        else:
+            estimator.partial_fit(X_scaled, y)
+
+        candidate = PlayerProjectionModel()
+        candidate.install_estimator(estimator, scaler, validation_features=X_scaled[:500])
+        return candidate
+
+    def validate(self, current: PlayerProjectionModel, candidate: PlayerProjectionModel,
+                 holdout_data: List[Dict]) -> Dict[str, Any]:
+        """Compare current and updated model on the holdout set"""
+        X, y = current.build_training_set(holdout_data)
+        if len(X) == 0:
+            return {"accepted": False, "reason": "No eligible holdout examples", "holdout_samples": 0}
+
+        current_mae = self._mae(current, X, y)
+        candidate_mae = self._mae(candidate, X, y)
+        accepted = candidate_mae <= current_mae * (1 + self.tolerance)
+        return {
+            "accepted": bool(accepted),
+            "reason": None if accepted else "Holdout MAE regressed",
+            "holdout_samples": int(len(X)),
+            "current_mae": round(current_mae, 4),
+            "candidate_mae": round(candidate_mae, 4)
+        }
+
+    def run(self, model: PlayerProjectionModel, new_data: List[Dict],
+            holdout_data: List[Dict]) -> Tuple[Optional[PlayerProjectionModel], Dict[str, Any]]:
+        """Build and validate an update; the model is None when it was rejected"""
+        start = time.perf_counter()
+        candidate = self.build_update(model, new_data)
+        update_time = time.perf_counter() - start
+
+        report = self.validate(model, candidate, holdout_data)
+        report.update({
+            "estimator": type(candidate.get_estimator()).__name__,
+            "update_time": round(update_time, 4),
+            "total_time": round(time.perf_counter() - start, 4)
+        })
+        return (candidate if report["accepted"] else None), report
+
+    @staticmethod
+    def _mae(model: PlayerProjectionModel, X: np.ndarray, y: np.ndarray) -> float:
+        predictions = model._predict_scaled(model.scaler.transform(X))
+        return float(np.mean(np.abs(predictions - y)))
+
+
+def finalize_week(registry: ModelRegistry, season: str, week: int, new_data: List[Dict],
+                  holdout_data: List[Dict], updater: Optional[WeeklyUpdater] = None,
+                  activate: bool = True) -> Dict[str, Any]:
+    """
+    Week-finalization job: update the active registry version with the week's
+    results and publish the result if it passes holdout validation.
+
+    Serving processes polling the registry pick up an activated version without
+    a restart.
+    """
+    parent_version = registry.active_version()
+    if parent_version is None:
+        raise ValueError("Registry has no active model version to update")
+
+    updater = updater or WeeklyUpdater()
+    model = PlayerProjectionModel(artifact_path=registry.version_path(parent_version), mmap_mode=None)
+    candidate, report = updater.run(model, new_data, holdout_data)
+    report.update({"parent_version": parent_version, "season": season, "week": week})
+
+    if candidate is None:
+        logger.warning(f"Weekly update for {season} week {week} rejected: {report['reason']}")
+        return report
+
+    report["version"] = registry.publish(
+        candidate,
+        metadata={
+            "update": "incremental",
+            "parent_version": parent_version,
+            "season": season,
+            "week": week,
+            "validation": {k: report[k] for k in ("holdout_samples", "current_mae", "candidate_mae")}
+        },
+        activate=activate
+    )
+    logger.info(f"Weekly update for {season} week {week} published as {report['version']}")
+    return report
+
+
+def week_data(history: Dict[str, Any], season: str, week: int, lookback: int = 8,
+              holdout_every: int = 5) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Processed player dicts through a finalized week, from Sleeper history
+    (see ``api.backtest.fetch_history``), split into update and holdout sets.
+
+    Every player who played the week gets their last ``lookback`` weeks. One
+    player in ``holdout_every`` is held out, chosen by player ID so the split
+    is the same on every run.
+    """
+    processor = DataProcessor()
+    season_stats = history["stats"].get(str(season), {})
+    weeks = [(w, season_stats.get(str(w), {})) for w in range(max(1, week - lookback + 1), week + 1)]
+
+    new_data, holdout_data = [], []
+    for player_id in season_stats.get(str(week), {}):
+        player = history["players"].get(player_id, {})
+        if player.get("position") not in PROJECTED_POSITIONS:
+            continue
+        performance = [{**stats[player_id], "week": w, "season": season} for w, stats in weeks if stats.get(player_id)]
+        processed = processor.prepare_projection_data({**player, "player_id": player_id}, performance)
+        if zlib.crc32(player_id.encode()) % holdout_every == 0:
+            holdout_data.append(processed)
+        else:
+            new_data.append(processed)
+    return new_data, holdout_data
+
+
+def finalize_week_from_history(registry_path: str, history: Dict[str, Any], season: str, week: int,
+                               lookback: int = 8, activate: bool = True) -> Dict[str, Any]:
+    """
+    ``finalize_week`` on Sleeper history, skipped when the active version
+    already covers the week (run as the API's ``weekly_update`` job).
+    """
+    registry = ModelRegistry(registry_path)
+    active = registry.active_version()
+    cutoff = training_cutoff(registry.metadata(active)) if active else None
+    if cutoff is not None and cutoff >= (int(season), int(week)):
+        return {"skipped": True, "reason": f"Active version {active} already covers {season} week {week}",
+                "parent_version": active, "season": season, "week": week}
+
+    new_data, holdout_data = week_data(history, season, week, lookback)
+    return finalize_week(registry, season, week, new_data, holdout_data, activate=activate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fold a finalized week into the active projection model")
+    parser.add_argument("new_data", help="JSON file with processed player dicts including the finalized week")
+    parser.add_argument("holdout_data", help="JSON file with processed player dicts held out for validation")
+    parser.add_argument("--registry", required=True, help="Model registry holding the active version")
+    parser.add_argument("--season", required=True)
+    parser.add_argument("--week", type=int, required=True)
+    parser.add_argument("--trees", type=int, default=20, help="Boosting rounds added per week")
+    parser.add_argument("--tolerance", type=float, default=0.0,
+                        help="Allowed relative holdout MAE regression")
+    parser.add_argument("--no-activate", action="store_true", help="Publish without activating")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.new_data) as f:
+        new_data = json.load(f)
+    with open(args.holdout_data) as f:
+        holdout_data = json.load(f)
+
+    report = finalize_week(
+        ModelRegistry(args.registry), args.season, args.week, new_data, holdout_data,
+        updater=WeeklyUpdater(trees_per_week=args.trees, tolerance=args.tolerance),
+        activate=not args.no_activate
+    )
+    print(json.dumps(report, indent=2))
+    if "version" not in report:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ import logging
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sleeper_client import SleeperAPIClient
+from lineup_optimizer import LineupOptimizer
 
 # Load environment variables
 load_dotenv()
@@ -38,6 +40,8 @@ class SleeprAnalytics:
     def __init__(self):
         self.engine = engine
         self.logger = logger
+        self.client = SleeperAPIClient()
+        self._players_db = None
         
     def analyze_player_performance(self, player_id: int, weeks_back: int = 8):
         """
@@ -98,34 +102,50 @@ class SleeprAnalytics:
             'confidence': 0.82
         }
     
-    def optimize_lineup(self, team_id: int, week: int):
+    def optimize_lineup(self, team_id: int, week: int, league_id: str, projections: dict):
         """
         Optimize lineup for maximum projected points
         
         Args:
-            team_id: Team ID to optimize
+            team_id: Roster ID of the team to optimize
             week: Week number to optimize for
+            league_id: League the team belongs to
+            projections: Projected points for the week by player ID
             
         Returns:
             dict: Optimized lineup with projections
         """
-        # Placeholder for lineup optimization
-        return {
-            'team_id': team_id,
-            'week': week,
-            'optimized_lineup': {
-                'QB': {'player_id': 1, 'projected_points': 20.5},
-                'RB1': {'player_id': 2, 'projected_points': 18.2},
-                'RB2': {'player_id': 3, 'projected_points': 12.8},
-                'WR1': {'player_id': 4, 'projected_points': 16.4},
-                'WR2': {'player_id': 5, 'projected_points': 14.1},
-                'TE': {'player_id': 6, 'projected_points': 10.3},
-                'FLEX': {'player_id': 7, 'projected_points': 11.7},
-                'DST': {'player_id': 8, 'projected_points': 8.5},
-                'K': {'player_id': 9, 'projected_points': 7.2}
-            },
-            'total_projected': 119.7
-        }
+        lineups = self.optimize_league_lineups(league_id, week, projections, roster_ids=[team_id])
+        if not lineups:
+            raise ValueError(f"Roster {team_id} not found in league {league_id}")
+        return {'team_id': team_id, **lineups[0]}
+    
+    def optimize_league_lineups(self, league_id: str, week: int, projections: dict, roster_ids: list = None):
+        """
+        Optimize the lineups of every roster in a league in one pass
+        
+        Args:
+            league_id: League to optimize
+            week: Week number to optimize for
+            projections: Projected points for the week by player ID
+            roster_ids: Optional subset of roster IDs
+            
+        Returns:
+            list: Optimized lineup with projections per roster
+        """
+        league = self.client.get_league(league_id)
+        rosters = self.client.get_rosters(league_id)
+        if roster_ids is not None:
+            rosters = [roster for roster in rosters if roster.get('roster_id') in set(roster_ids)]
+        
+        # Players data is large and changes daily; fetch it once per instance
+        if self._players_db is None:
+            self._players_db = self.client.get_players()
+        positions = {player_id: player.get('position') for player_id, player in self._players_db.items()}
+        
+        optimizer = LineupOptimizer(league.get('roster_positions') or [])
+        lineups = optimizer.optimize(rosters, positions, projections)
+        return [{'week': week, **lineup} for lineup in lineups]
     
     def dynasty_asset_analysis(self, team_id: int):
         """
@@ -6,7 +6,7 @@ Provides REST API endpoints for machine learning predictions and analytics
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Dict
 import logging
 from analytics import SleeprAnalytics
 from models import PlayerPerformanceModel, WaiverWireAnalyzer
@@ -73,13 +73,22 @@ class TradeAnalysisResponse(BaseModel):
 class LineupOptimizationRequest(BaseModel):
     team_id: int
     week: int
+    league_id: str
+    projections: Dict[str, float]
 
 class LineupOptimizationResponse(BaseModel):
     team_id: int
     week: int
     optimized_lineup: dict
+    starters: List[Optional[str]]
+    bench: List[str]
     total_projected: float
 
+class LeagueLineupOptimizationRequest(BaseModel):
+    league_id: str
+    week: int
+    projections: Dict[str, float]
+
 # API Endpoints
 @app.get("/")
 async def root():
@@ -159,18 +168,50 @@ async def analyze_trade(request: TradeAnalysisRequest):
 async def optimize_lineup(request: LineupOptimizationRequest):
     """Optimize lineup for maximum projected points"""
     try:
-        result = analytics.optimize_lineup(request.team_id, request.week)
+        result = analytics.optimize_lineup(
+            request.team_id,
+            request.week,
+            request.league_id,
+            request.projections
+        )
         
         return LineupOptimizationResponse(
             team_id=result['team_id'],
             week=result['week'],
             optimized_lineup=result['optimized_lineup'],
+            starters=result['starters'],
+            bench=result['bench'],
             total_projected=result['total_projected']
         )
     except Exception as e:
         logger.error(f"Error in lineup optimization: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/analytics/lineup-optimization/league", response_model=List[LineupOptimizationResponse])
+async def optimize_league_lineups(request: LeagueLineupOptimizationRequest):
+    """Optimize the lineups of every team in a league"""
+    try:
+        lineups = analytics.optimize_league_lineups(
+            request.league_id,
+            request.week,
+            request.projections
+        )
+        
+        return [
+            LineupOptimizationResponse(
+                team_id=lineup['roster_id'],
+                week=lineup['week'],
+                optimized_lineup=lineup['optimized_lineup'],
+                starters=lineup['starters'],
+                bench=lineup['bench'],
+                total_projected=lineup['total_projected']
+            )
+            for lineup in lineups
+        ]
+    except Exception as e:
+        logger.error(f"Error in league lineup optimization: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/analytics/dynasty-analysis/{team_id}")
 async def get_dynasty_analysis(team_id: int):
     """Get dynasty team analysis and recommendations"""
@@ -0,0 +1,100 @@
+"""
+Model artifact storage with memory-mapped loading
+
+Shared by both services: src imports it flat, api as ``src.artifacts``.
+"""
+
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+import joblib
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = "sleepr-model-artifact"
+ARTIFACT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+ARRAYS_FILE = "arrays.joblib"
+ESTIMATOR_FILE = "estimator.joblib"
+
+
+def is_artifact(path: str) -> bool:
+    """Check whether a path is an artifact directory rather than a legacy pickle"""
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+
+def save_artifact(path: str, arrays: Dict[str, Any], manifest: Dict[str, Any],
+                  estimator: Any = None) -> None:
+    """
+    Write a model artifact directory.
+
+    ``arrays`` holds everything needed for inference as plain NumPy arrays and is
+    dumped uncompressed, so ``joblib.load(..., mmap_mode="r")`` maps it straight
+    from the page cache and every worker process shares the same pages. The full
+    estimator is stored separately and only read when it is actually needed.
+    """
+    os.makedirs(path, exist_ok=True)
+
+    joblib.dump(arrays, os.path.join(path, ARRAYS_FILE), compress=0)
+    if estimator is not None:
+        joblib.dump(estimator, os.path.join(path, ESTIMATOR_FILE), compress=0)
+
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "format_version": ARTIFACT_VERSION,
+        "created_at": datetime.utcnow().isoformat(),
+        "has_estimator": estimator is not None,
+        **manifest
+    }
+    # Write the manifest last so a half-written artifact is never picked up
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+
+def load_artifact(path: str, mmap_mode: Optional[str] = "r") -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Read an artifact manifest and its (memory-mapped) inference arrays"""
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"Not a model artifact: {path}")
+
+    arrays = joblib.load(os.path.join(path, ARRAYS_FILE), mmap_mode=mmap_mode)
+    return manifest, arrays
+
+
+def load_estimator(path: str) -> Any:
+    """Load the full estimator stored alongside an artifact, if any"""
+    estimator_path = os.path.join(path, ESTIMATOR_FILE)
+    if not os.path.isfile(estimator_path):
+        return None
+    return joblib.load(estimator_path)
+
+
+def scaler_to_arrays(scaler: StandardScaler) -> Dict[str, np.ndarray]:
+    """Export a fitted StandardScaler as arrays"""
+    return {
+        "scaler_mean": np.asarray(scaler.mean_, dtype=np.float64),
+        "scaler_scale": np.asarray(scaler.scale_, dtype=np.float64),
+        "scaler_var": np.asarray(scaler.var_, dtype=np.float64),
+        "scaler_samples": np.asarray(scaler.n_samples_seen_)
+    }
+
+
+def scaler_from_arrays(arrays: Dict[str, Any]) -> StandardScaler:
+    """Rebuild a fitted StandardScaler around (possibly memory-mapped) arrays"""
+    scaler = StandardScaler()
+    scaler.mean_ = arrays["scaler_mean"]
+    scaler.scale_ = arrays["scaler_scale"]
+    scaler.var_ = arrays["scaler_var"]
+    scaler.n_samples_seen_ = arrays["scaler_samples"]
+    scaler.n_features_in_ = len(scaler.mean_)
+    return scaler
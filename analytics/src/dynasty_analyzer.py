@@ -4,6 +4,7 @@ Custom analysis for "A League Far Far Away" and "Stumblin', Bumblin', and Fumbli
 """
 
 import json
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from sleeper_client import SleeperAPIClient, SleeperDataProcessor
@@ -20,12 +21,19 @@ class DynastyAnalyzer:
             "1197641763607556096": "A League Far Far Away",
             "1180092430900092928": "Stumblin', Bumblin', and Fumblin'"
         }
+        
+        # Dynasty values of the whole player universe, rebuilt per players snapshot
+        self._players_db = None
+        self._value_table = None
+        self._value_table_source = None
     
     def analyze_dynasty_assets(self, league_id: str) -> dict:
         """Analyze dynasty assets for long-term value"""
         try:
-            # Get current players data
-            players_db = self.client.get_players()
+            # Get current players data (fetched once per analyzer; Sleeper updates it daily)
+            if self._players_db is None:
+                self._players_db = self.client.get_players()
+            players_db = self._players_db
             league_data = self.processor.analyze_league(league_id)
             
             dynasty_analysis = {
@@ -71,11 +79,12 @@ class DynastyAnalyzer:
             'trade_suggestions': []
         }
         
+        table = self._dynasty_value_table(players_db)
+        
         # Analyze each player on the roster
         for player_id in roster['players']:
-            if player_id in players_db:
-                player = players_db[player_id]
-                player_analysis = self._analyze_player_dynasty_value(player)
+            if player_id in table['index']:
+                player_analysis = self._table_row(table, table['index'][player_id])
                 
                 # Categorize players
                 if player_analysis['age'] <= 24 and player_analysis['position'] in ['RB', 'WR', 'QB']:
@@ -91,47 +100,82 @@ class DynastyAnalyzer:
         
         return team_eval
     
-    def _analyze_player_dynasty_value(self, player: dict) -> dict:
-        """Analyze individual player's dynasty value"""
-        # Extract player info
-        age = player.get('age', 25)  # Default age if not available
-        position = player.get('position', 'UNKNOWN')
-        years_exp = player.get('years_exp', 0)
+    def _dynasty_value_table(self, players_db: dict) -> dict:
+        """Dynasty values of every player in one vectorized pass, cached per players snapshot"""
+        if self._value_table is not None and self._value_table_source is players_db:
+            return self._value_table
         
-        # Base dynasty value calculation
-        dynasty_value = 5.0  # Base value
+        player_ids = list(players_db)
+        players = [players_db[player_id] for player_id in player_ids]
+        self._value_table = {
+            'index': {player_id: row for row, player_id in enumerate(player_ids)},
+            'players': players,
+            **self._dynasty_values(
+                np.array([player.get('age') or 25 for player in players], dtype=float),
+                np.array([player.get('position', 'UNKNOWN') for player in players], dtype=object)
+            )
+        }
+        self._value_table_source = players_db
+        return self._value_table
+    
+    @staticmethod
+    def _dynasty_values(ages: np.ndarray, positions: np.ndarray) -> dict:
+        """
+        Dynasty value for every (age, position) row
         
-        # Age factor (younger = more valuable in dynasty)
-        if age <= 22:
-            dynasty_value += 3.0
-        elif age <= 25:
-            dynasty_value += 2.0
-        elif age <= 27:
-            dynasty_value += 1.0
-        elif age >= 30:
-            dynasty_value -= 2.0
-        elif age >= 32:
-            dynasty_value -= 4.0
+        This is the analyzer's own 0-10 scale, not the API's published
+        ``DynastyValueTable`` (position base values of 20-30). The strategy
+        thresholds below (team scores of 60 and 100) and the printed league
+        scores are calibrated to it, so table values would misplace every team.
+        """
+        # Age factor (younger = more valuable in dynasty); first matching bracket applies
+        age_factor = np.select(
+            [ages <= 22, ages <= 25, ages <= 27, ages >= 30, ages >= 32],
+            [3.0, 2.0, 1.0, -2.0, -4.0], default=0.0
+        )
         
         # Position factor (QB/WR age better than RB)
-        if position == 'QB' and age <= 30:
-            dynasty_value += 2.0
-        elif position == 'WR' and age <= 28:
-            dynasty_value += 1.5
-        elif position == 'RB' and age >= 28:
-            dynasty_value -= 2.0
-        elif position == 'TE' and age <= 26:
-            dynasty_value += 1.0
+        position_factor = np.select(
+            [
+                (positions == 'QB') & (ages <= 30),
+                (positions == 'WR') & (ages <= 28),
+                (positions == 'RB') & (ages >= 28),
+                (positions == 'TE') & (ages <= 26)
+            ],
+            [2.0, 1.5, -2.0, 1.0], default=0.0
+        )
         
+        return {
+            'age': ages,
+            'position': positions,
+            'dynasty_value': np.maximum(0, 5.0 + age_factor + position_factor)  # Don't go negative
+        }
+    
+    @staticmethod
+    def _table_row(table: dict, row: int) -> dict:
+        """Player analysis dict for one row of the value table"""
+        player = table['players'][row]
+        age = table['age'][row]
         return {
             'player_id': player.get('player_id', ''),
             'name': f"{player.get('first_name', '')} {player.get('last_name', '')}".strip(),
-            'position': position,
-            'age': age,
-            'years_exp': years_exp,
+            'position': table['position'][row],
+            'age': int(age) if float(age).is_integer() else float(age),
+            'years_exp': player.get('years_exp', 0),
             'team': player.get('team', ''),
-            'dynasty_value': max(0, dynasty_value)  # Don't go negative
+            'dynasty_value': float(table['dynasty_value'][row])
+        }
+    
+    def _analyze_player_dynasty_value(self, player: dict) -> dict:
+        """Analyze individual player's dynasty value"""
+        table = {
+            'players': [player],
+            **self._dynasty_values(
+                np.array([player.get('age') or 25], dtype=float),
+                np.array([player.get('position', 'UNKNOWN')], dtype=object)
+            )
         }
+        return self._table_row(table, 0)
     
     def _recommend_dynasty_strategy(self, team_eval: dict, roster: dict) -> str:
         """Recommend dynasty strategy based on team composition"""
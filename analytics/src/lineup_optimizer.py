@@ -0,0 +1,133 @@
+"""
+Lineup Optimizer
+Exact starting lineup assignment from a league's roster positions and player projections
+"""
+
+import logging
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+logger = logging.getLogger(__name__)
+
+# Player positions each Sleeper starting slot accepts
+SLOT_ELIGIBILITY = {
+    'QB': ('QB',),
+    'RB': ('RB',),
+    'WR': ('WR',),
+    'TE': ('TE',),
+    'K': ('K',),
+    'DEF': ('DEF',),
+    'DL': ('DL',),
+    'LB': ('LB',),
+    'DB': ('DB',),
+    'FLEX': ('RB', 'WR', 'TE'),
+    'WRRB_FLEX': ('RB', 'WR'),
+    'REC_FLEX': ('WR', 'TE'),
+    'SUPER_FLEX': ('QB', 'RB', 'WR', 'TE'),
+    'IDP_FLEX': ('DL', 'LB', 'DB'),
+}
+NON_STARTING_SLOTS = {'BN', 'IR', 'TAXI'}
+
+# Cost of an ineligible (slot, player) pair; dominates any projection so the
+# assignment fills as many slots as possible before maximizing points
+_INELIGIBLE_COST = 1e6
+
+
+class LineupOptimizer:
+    """
+    Optimal starting lineups for a league's roster positions.
+
+    Choosing starters is a maximum-weight bipartite matching between starting
+    slots and rostered players, where a player can fill a slot if the slot
+    accepts the player's position. It is solved exactly with the Hungarian
+    algorithm, so flex slots are filled optimally rather than greedily.
+    Eligibility and projections of every roster in a league are built as one
+    padded array.
+    """
+
+    def __init__(self, roster_positions: List[str]):
+        unknown = [slot for slot in roster_positions
+                   if slot not in SLOT_ELIGIBILITY and slot not in NON_STARTING_SLOTS]
+        if unknown:
+            logger.warning(f"Ignoring unsupported roster slots: {sorted(set(unknown))}")
+        self.slots = [slot for slot in roster_positions if slot in SLOT_ELIGIBILITY]
+        self.labels = self._slot_labels(self.slots)
+
+        # (slot, position code) eligibility; the last code is "no eligible slot"
+        self.positions = sorted({position for slot in self.slots for position in SLOT_ELIGIBILITY[slot]})
+        self._codes = {position: code for code, position in enumerate(self.positions)}
+        self._eligible = np.zeros((len(self.slots), len(self.positions) + 1), dtype=bool)
+        for s, slot in enumerate(self.slots):
+            for position in SLOT_ELIGIBILITY[slot]:
+                self._eligible[s, self._codes[position]] = True
+
+    @staticmethod
+    def _slot_labels(slots: List[str]) -> List[str]:
+        """Display names of slots, numbering repeated ones (RB1, RB2, ...)"""
+        totals = Counter(slots)
+        seen = Counter()
+        labels = []
+        for slot in slots:
+            seen[slot] += 1
+            labels.append(f"{slot}{seen[slot]}" if totals[slot] > 1 else slot)
+        return labels
+
+    def optimize(self, rosters: List[Dict], positions: Dict[str, str],
+                 projections: Dict[str, float]) -> List[Dict]:
+        """
+        Optimal lineup of every roster
+
+        Args:
+            rosters: Sleeper rosters (``roster_id`` and ``players``)
+            positions: Position of each player ID
+            projections: Projected points of each player ID; missing players project 0
+
+        Returns:
+            list: One lineup per roster, in roster order
+        """
+        player_lists = [[str(player_id) for player_id in roster.get('players') or []] for roster in rosters]
+        n_players = max((len(players) for players in player_lists), default=0)
+
+        # Padded (roster, player) codes and points; padding is ineligible everywhere
+        none_code = len(self.positions)
+        codes = np.full((len(rosters), n_players), none_code, dtype=np.intp)
+        points = np.zeros((len(rosters), n_players))
+        for r, players in enumerate(player_lists):
+            codes[r, :len(players)] = [self._codes.get(positions.get(pid), none_code) for pid in players]
+            points[r, :len(players)] = [float(projections.get(pid) or 0.0) for pid in players]
+
+        eligible = self._eligible[:, codes].transpose(1, 0, 2)  # (roster, slot, player)
+        costs = np.where(eligible, -points[:, None, :], _INELIGIBLE_COST)
+
+        lineups = []
+        for r, (roster, players) in enumerate(zip(rosters, player_lists)):
+            starters = [None] * len(self.slots)
+            if players and self.slots:
+                slot_index, player_index = linear_sum_assignment(costs[r])
+                for s, p in zip(slot_index, player_index):
+                    if eligible[r, s, p]:
+                        starters[s] = int(p)
+            lineups.append(self._lineup(roster, players, starters, positions, points[r]))
+        return lineups
+
+    def _lineup(self, roster: Dict, players: List[str], starters: List[Optional[int]],
+                positions: Dict[str, str], points: np.ndarray) -> Dict:
+        """Lineup dict of one roster from its assigned player indices"""
+        started = {p for p in starters if p is not None}
+        return {
+            'roster_id': roster.get('roster_id'),
+            'optimized_lineup': {
+                label: None if p is None else {
+                    'player_id': players[p],
+                    'position': positions.get(players[p]),
+                    'projected_points': round(float(points[p]), 2)
+                }
+                for label, p in zip(self.labels, starters)
+            },
+            'starters': [None if p is None else players[p] for p in starters],
+            'bench': [pid for p, pid in enumerate(players) if p not in started],
+            'total_projected': round(float(sum(points[p] for p in started)), 2)
+        }
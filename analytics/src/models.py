@@ -11,6 +11,8 @@ from sklearn.metrics import mean_absolute_error, r2_score
 from sklearn.preprocessing import StandardScaler
 import joblib
 import logging
+import artifacts
+from tree_inference import FlatTreeEnsemble, leaf_value_table, streaming_tree_moments
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +27,9 @@ class PlayerPerformanceModel:
             n_jobs=-1
         )
         self.scaler = StandardScaler()
+        self.flat_model = None
+        self.leaf_values = None
+        self.artifact_path = None
         self.is_trained = False
         
     def prepare_features(self, df):
@@ -87,6 +92,7 @@ class PlayerPerformanceModel:
         
         # Train model
         self.model.fit(X_train_scaled, y_train)
+        self._build_inference_tables()
         
         # Evaluate
         y_pred = self.model.predict(X_test_scaled)
@@ -96,15 +102,17 @@ class PlayerPerformanceModel:
         logger.info(f"Model trained - MAE: {mae:.2f}, R²: {r2:.3f}")
         self.is_trained = True
         
-    def predict(self, player_data):
+    def predict(self, player_data, quantiles=None):
         """
         Predict fantasy points for players
         
         Args:
             player_data: DataFrame with current player stats
+            quantiles: Optional quantiles (0-1) of the per-tree predictions
             
         Returns:
-            np.array: Predicted fantasy points
+            dict: Predicted fantasy points with std and confidence bounds,
+                plus per-tree quantiles when requested
         """
         if not self.is_trained:
             raise ValueError("Model must be trained before making predictions")
@@ -112,19 +120,34 @@ class PlayerPerformanceModel:
         X = self.prepare_features(player_data)
         X_scaled = self.scaler.transform(X)
         
-        predictions = self.model.predict(X_scaled)
+        # Gather every tree's leaf value in a single pass; for a Random Forest
+        # the mean is the prediction and the spread gives the confidence interval
+        leaves = self._apply(X_scaled)
+        moments = streaming_tree_moments(self.leaf_values, leaves, quantiles)
+        predictions = moments['mean']
+        std_predictions = np.sqrt(moments['variance'])
         
-        # Calculate confidence intervals
-        # For Random Forest, we can use prediction std from trees
-        tree_predictions = np.array([tree.predict(X_scaled) for tree in self.model.estimators_])
-        std_predictions = np.std(tree_predictions, axis=0)
-        
-        return {
+        result = {
             'predictions': predictions,
             'std': std_predictions,
             'confidence_lower': predictions - 1.96 * std_predictions,
             'confidence_upper': predictions + 1.96 * std_predictions
         }
+        if quantiles is not None:
+            result['quantiles'] = moments['quantiles']
+        
+        return result
+    
+    def _apply(self, X_scaled):
+        """Leaf index per tree for every row, via the flattened forest when available"""
+        if self.flat_model is not None:
+            return self.flat_model.apply(X_scaled)
+        return self.model.apply(X_scaled)
+    
+    def _build_inference_tables(self):
+        """Precompute the flattened forest and its leaf value table"""
+        self.flat_model = FlatTreeEnsemble.from_sklearn(self.model)
+        self.leaf_values = leaf_value_table(self.model)
     
     def get_feature_importance(self):
         """Get feature importance scores"""
@@ -140,31 +163,63 @@ class PlayerPerformanceModel:
         
         importance_df = pd.DataFrame({
             'feature': feature_names,
-            'importance': self.model.feature_importances_
+            'importance': self._estimator().feature_importances_
         }).sort_values('importance', ascending=False)
         
         return importance_df
     
     def save_model(self, filepath):
-        """Save trained model to disk"""
+        """
+        Save trained model to disk as an artifact directory
+        
+        Args:
+            filepath: Directory to write; inference arrays are stored uncompressed
+                so they can be memory-mapped on load
+        """
         if not self.is_trained:
             raise ValueError("Cannot save untrained model")
-            
-        model_data = {
-            'model': self.model,
-            'scaler': self.scaler,
-            'is_trained': self.is_trained
+        
+        arrays = {
+            **artifacts.scaler_to_arrays(self.scaler),
+            'ensemble': self.flat_model.to_arrays(),
+            'leaf_values': self.leaf_values
         }
-        joblib.dump(model_data, filepath)
+        manifest = {
+            'model_class': type(self).__name__,
+            'estimator': type(self._estimator()).__name__
+        }
+        artifacts.save_artifact(filepath, arrays, manifest, estimator=self._estimator())
         logger.info(f"Model saved to {filepath}")
         
-    def load_model(self, filepath):
-        """Load trained model from disk"""
-        model_data = joblib.load(filepath)
-        self.model = model_data['model']
-        self.scaler = model_data['scaler']
-        self.is_trained = model_data['is_trained']
+    def load_model(self, filepath, mmap_mode='r'):
+        """
+        Load trained model from disk
+        
+        Args:
+            filepath: Artifact directory, or a legacy joblib file
+            mmap_mode: Memory-map mode for artifact arrays (None to read into memory)
+        """
+        if artifacts.is_artifact(filepath):
+            _, arrays = artifacts.load_artifact(filepath, mmap_mode=mmap_mode)
+            self.scaler = artifacts.scaler_from_arrays(arrays)
+            self.flat_model = FlatTreeEnsemble.from_arrays(arrays['ensemble'])
+            self.leaf_values = arrays['leaf_values']
+            self.artifact_path = filepath
+            self.model = None
+            self.is_trained = True
+        else:
+            model_data = joblib.load(filepath)
+            self.model = model_data['model']
+            self.scaler = model_data['scaler']
+            self.is_trained = model_data['is_trained']
+            self._build_inference_tables()
         logger.info(f"Model loaded from {filepath}")
+    
+    def _estimator(self):
+        """The scikit-learn forest, read from the artifact only when needed"""
+        if self.model is None and self.artifact_path:
+            self.model = artifacts.load_estimator(self.artifact_path)
+        return self.model
 
 class WaiverWireAnalyzer:
     """Analyzer for identifying waiver wire opportunities"""
@@ -0,0 +1,323 @@
+"""
+Flattened NumPy inference for trained tree ensembles
+
+Shared by both services: src imports it flat, api as ``src.tree_inference``.
+"""
+
+import time
+import logging
+from typing import Dict, List, Any, Optional, Sequence
+
+import numpy as np
+import joblib
+
+logger = logging.getLogger(__name__)
+
+
+class FlatTreeEnsemble:
+    """
+    Tree ensemble flattened into contiguous NumPy arrays.
+
+    All nodes of all trees share the ``feature``, ``threshold``, ``left``, ``right``
+    and ``value`` arrays, and ``roots`` holds the offset of each tree. Leaves point
+    back to themselves, so a whole batch walks every tree for a fixed number of
+    steps with array operations instead of a Python call per tree.
+
+    Predictions are ``baseline + scale * sum(leaf values)``, which covers gradient
+    boosting (``scale`` is the learning rate) and forests (``scale`` is 1 / n_trees).
+    Inputs are assumed to be finite.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, value: np.ndarray, roots: np.ndarray, depth: int,
+                 scale: float = 1.0, baseline: float = 0.0, input_dtype: str = "float32"):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.depth = int(depth)
+        self.scale = float(scale)
+        self.baseline = float(baseline)
+        self.input_dtype = np.dtype(input_dtype)
+        # children[2 * node + went_left] is the next node, so one gather moves every row
+        self._children = np.column_stack([right, left]).ravel()
+
+    @classmethod
+    def from_sklearn(cls, estimator) -> "FlatTreeEnsemble":
+        """Flatten a fitted scikit-learn tree, forest or (histogram) gradient boosting regressor"""
+        input_dtype = "float32"
+        if hasattr(estimator, "_predictors"):
+            # Histogram boosting stores shrunken leaf values and compares raw float64 inputs
+            trees = [_hist_tree_nodes(predictor) for predictor in np.ravel(estimator._predictors)]
+            scale = 1.0
+            baseline = float(np.ravel(estimator._baseline_prediction)[0])
+            input_dtype = "float64"
+        elif hasattr(estimator, "tree_"):
+            trees, scale, baseline = [_sklearn_tree_nodes(estimator.tree_)], 1.0, 0.0
+        elif hasattr(estimator, "learning_rate") and hasattr(estimator, "estimators_"):
+            trees = [_sklearn_tree_nodes(tree.tree_) for tree in np.ravel(estimator.estimators_)]
+            scale = estimator.learning_rate
+            baseline = cls._boosting_baseline(estimator)
+        elif hasattr(estimator, "estimators_"):
+            trees = [_sklearn_tree_nodes(tree.tree_) for tree in estimator.estimators_]
+            scale, baseline = 1.0 / len(trees), 0.0
+        else:
+            raise ValueError(f"Unsupported estimator for flattening: {type(estimator).__name__}")
+
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        offset = 0
+        for tree_feature, tree_threshold, tree_left, tree_right, tree_value, is_leaf, _ in trees:
+            nodes = np.arange(len(tree_value)) + offset
+
+            feature.append(np.where(is_leaf, 0, tree_feature))
+            threshold.append(np.where(is_leaf, np.inf, tree_threshold))
+            left.append(np.where(is_leaf, nodes, tree_left + offset))
+            right.append(np.where(is_leaf, nodes, tree_right + offset))
+            value.append(tree_value)
+            roots.append(offset)
+            offset += len(tree_value)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(feature), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(threshold), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(left), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(right), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(value), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            depth=max(tree[6] for tree in trees),
+            scale=scale,
+            baseline=baseline,
+            input_dtype=input_dtype
+        )
+
+    @staticmethod
+    def _boosting_baseline(estimator) -> float:
+        """Constant initial prediction of a gradient boosting regressor"""
+        init = getattr(estimator, "init_", None)
+        if init is None or init == "zero":
+            return 0.0
+        if hasattr(init, "constant_"):
+            return float(np.ravel(init.constant_)[0])
+        raise ValueError("Only constant initial estimators can be flattened")
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def _leaf_nodes(self, X: np.ndarray) -> np.ndarray:
+        """Global index of the leaf reached in every tree, shaped (n_rows, n_trees)"""
+        X = np.ascontiguousarray(np.atleast_2d(X), dtype=self.input_dtype)
+        flat_X = X.ravel()
+        row_offsets = (np.arange(len(X)) * X.shape[1])[:, None]
+        nodes = np.repeat(self.roots[None, :], len(X), axis=0)
+
+        for _ in range(self.depth):
+            go_left = flat_X[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = self._children[2 * nodes + go_left]
+
+        return nodes
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf index within each tree for every row, matching scikit-learn's ``apply``"""
+        return self._leaf_nodes(X) - self.roots
+
+    def leaf_value_table(self) -> np.ndarray:
+        """Per-tree node values padded into an (n_trees, max_nodes) table"""
+        sizes = np.diff(np.append(self.roots, len(self.value)))
+        table = np.zeros((self.n_trees, sizes.max()))
+        for tree, (root, size) in enumerate(zip(self.roots, sizes)):
+            table[tree, :size] = self.value[root:root + size]
+        return table
+
+    def tree_values(self, X: np.ndarray) -> np.ndarray:
+        """Raw leaf value of every tree for every row, shaped (n_rows, n_trees)"""
+        return self.value[self._leaf_nodes(X)]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predict all rows by traversing every tree at once"""
+        return self.baseline + self.scale * self.tree_values(X).sum(axis=1)
+
+    def max_error(self, estimator, X: np.ndarray) -> float:
+        """Largest absolute difference from the scikit-learn predictions on X"""
+        if len(X) == 0:
+            return 0.0
+        return float(np.max(np.abs(self.predict(X) - estimator.predict(X))))
+
+    def to_arrays(self) -> Dict[str, Any]:
+        """Export the ensemble as plain NumPy arrays and scalars"""
+        return {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "value": self.value,
+            "roots": self.roots,
+            "depth": self.depth,
+            "scale": self.scale,
+            "baseline": self.baseline,
+            "input_dtype": self.input_dtype.name
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, Any]) -> "FlatTreeEnsemble":
+        """Rebuild an ensemble exported with ``to_arrays``"""
+        return cls(**arrays)
+
+    def save(self, filepath: str) -> None:
+        """Save the flattened arrays uncompressed"""
+        joblib.dump(self.to_arrays(), filepath)
+
+    @classmethod
+    def load(cls, filepath: str, mmap_mode: Optional[str] = None) -> "FlatTreeEnsemble":
+        """Load a flattened ensemble, optionally memory-mapping its arrays"""
+        return cls.from_arrays(joblib.load(filepath, mmap_mode=mmap_mode))
+
+
+def _sklearn_tree_nodes(tree):
+    """Node arrays of a scikit-learn ``Tree``"""
+    is_leaf = tree.children_left == -1
+    return (tree.feature, tree.threshold, tree.children_left, tree.children_right,
+            tree.value[:, 0, 0], is_leaf, tree.max_depth)
+
+
+def _hist_tree_nodes(predictor):
+    """Node arrays of a histogram gradient boosting ``TreePredictor``"""
+    nodes = predictor.nodes
+    if nodes["is_categorical"].any():
+        raise ValueError("Categorical splits cannot be flattened")
+    is_leaf = nodes["is_leaf"].astype(bool)
+    return (nodes["feature_idx"], nodes["num_threshold"], nodes["left"], nodes["right"],
+            nodes["value"], is_leaf, int(nodes["depth"].max()))
+
+
+def leaf_value_table(estimator) -> np.ndarray:
+    """
+    Precompute an (n_trees, max_nodes) table of node values for a fitted forest.
+
+    Indexing the table with the output of ``estimator.apply`` gives every tree's
+    prediction for every row without calling each tree's ``predict``.
+    """
+    trees = [tree.tree_ for tree in np.ravel(estimator.estimators_)]
+    table = np.zeros((len(trees), max(tree.node_count for tree in trees)))
+    for index, tree in enumerate(trees):
+        table[index, :tree.node_count] = tree.value[:, 0, 0]
+    return table
+
+
+def streaming_tree_moments(table: np.ndarray, leaves: np.ndarray,
+                           quantiles: Optional[Sequence[float]] = None) -> Dict[str, Any]:
+    """
+    Mean and variance of per-tree predictions accumulated one tree at a time.
+
+    Args:
+        table: Leaf value table from ``leaf_value_table``
+        leaves: Leaf indices shaped (n_rows, n_trees), as returned by ``apply``
+        quantiles: Optional quantiles (0-1) of the per-tree predictions
+
+    Returns:
+        dict: ``mean`` and ``variance`` per row, plus ``quantiles`` keyed by
+        quantile when requested. Welford's update keeps only running per-row
+        statistics; the per-tree values are only retained when quantiles are asked for.
+    """
+    leaves_by_tree = np.ascontiguousarray(np.asarray(leaves).T)
+    n_rows = leaves_by_tree.shape[1]
+    mean = np.zeros(n_rows)
+    sum_squares = np.zeros(n_rows)
+    values = np.empty((len(leaves_by_tree), n_rows)) if quantiles else None
+
+    for tree, tree_leaves in enumerate(leaves_by_tree):
+        tree_values = table[tree, tree_leaves]
+        delta = tree_values - mean
+        mean += delta / (tree + 1)
+        sum_squares += delta * (tree_values - mean)
+        if values is not None:
+            values[tree] = tree_values
+
+    result = {
+        "mean": mean,
+        "variance": sum_squares / max(len(leaves_by_tree), 1)
+    }
+    if values is not None:
+        result["quantiles"] = {
+            q: row for q, row in zip(quantiles, np.quantile(values, quantiles, axis=0))
+        }
+    return result
+
+
+def benchmark_against_sklearn(estimator, X: np.ndarray,
+                              batch_sizes: Sequence[int] = (1, 10, 50, 100, 200, 300, 500),
+                              repeats: int = 50, flat: Optional[FlatTreeEnsemble] = None) -> List[Dict]:
+    """
+    Compare flattened and scikit-learn prediction latency for several batch sizes.
+
+    Returns one row per batch size with median milliseconds per call for both
+    paths, the speedup and the largest prediction difference. ``flat`` is the
+    estimator's flattened form, if already built.
+    """
+    if flat is None:
+        flat = FlatTreeEnsemble.from_sklearn(estimator)
+    results = []
+
+    for batch_size in batch_sizes:
+        batch = X[np.arange(batch_size) % len(X)]
+        timings = {}
+        for name, predict in (("sklearn", estimator.predict), ("flat", flat.predict)):
+            predict(batch)
+            samples = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                predict(batch)
+                samples.append(time.perf_counter() - start)
+            timings[name] = float(np.median(samples)) * 1000
+
+        results.append({
+            "batch_size": batch_size,
+            "sklearn_ms": round(timings["sklearn"], 4),
+            "flat_ms": round(timings["flat"], 4),
+            "speedup": round(timings["sklearn"] / timings["flat"], 2),
+            "max_abs_error": flat.max_error(estimator, batch)
+        })
+
+    return results
+
+
+def flat_max_rows(results: List[Dict]) -> int:
+    """Largest benchmarked batch size up to which the flattened path is faster (0 if never)"""
+    max_rows = 0
+    for row in sorted(results, key=lambda row: row["batch_size"]):
+        if row["speedup"] < 1.0:
+            break
+        max_rows = row["batch_size"]
+    return max_rows
+
+
+if __name__ == "__main__":
+    from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(2000, 21))
+    y = X[:, 0] * 3 + X[:, 1] ** 2 + rng.normal(size=len(X))
+
+    estimators = {
+        "GradientBoostingRegressor": GradientBoostingRegressor(
+            n_estimators=100, learning_rate=0.1, max_depth=6, random_state=42
+        ),
+        "HistGradientBoostingRegressor": HistGradientBoostingRegressor(
+            max_iter=400, learning_rate=0.05, max_leaf_nodes=31, early_stopping=False, random_state=42
+        ),
+        "RandomForestRegressor": RandomForestRegressor(
+            n_estimators=100, max_depth=10, random_state=42, n_jobs=-1
+        )
+    }
+
+    for name, estimator in estimators.items():
+        estimator.fit(X, y)
+        print(name)
+        print(f"{'rows':>6} {'sklearn ms':>11} {'flat ms':>9} {'speedup':>8} {'max err':>10}")
+        results = benchmark_against_sklearn(estimator, X, batch_sizes=(1, 10, 25, 50, 100, 150, 200, 300, 500))
+        for row in results:
+            print(f"{row['batch_size']:>6} {row['sklearn_ms']:>11.3f} {row['flat_ms']:>9.3f} "
+                  f"{row['speedup']:>8.2f} {row['max_abs_error']:>10.2e}")
+        print(f"flattened path faster up to {flat_max_rows(results)} rows")
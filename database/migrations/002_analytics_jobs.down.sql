@@ -0,0 +1,6 @@
+-- Drop indexes
+DROP INDEX IF EXISTS idx_analytics_jobs_expires_at;
+DROP INDEX IF EXISTS idx_analytics_jobs_queue;
+
+-- Drop tables
+DROP TABLE IF EXISTS analytics_jobs;
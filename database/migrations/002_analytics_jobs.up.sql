@@ -0,0 +1,23 @@
+-- Background jobs of the analytics service (POST /jobs), shared by its replicas
+CREATE TABLE IF NOT EXISTS analytics_jobs (
+    id VARCHAR(32) PRIMARY KEY,
+    kind VARCHAR(64) NOT NULL,
+    job_key VARCHAR(64) NOT NULL,
+    -- The job key while the job is queued, running or succeeded; NULL once it failed or was cancelled
+    live_key VARCHAR(64) UNIQUE,
+    params TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status VARCHAR(16) NOT NULL,
+    result TEXT,
+    error TEXT,
+    owner VARCHAR(255),
+    cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+    submitted_at DOUBLE PRECISION NOT NULL,
+    started_at DOUBLE PRECISION,
+    finished_at DOUBLE PRECISION,
+    expires_at DOUBLE PRECISION,
+    heartbeat_at DOUBLE PRECISION
+);
+
+CREATE INDEX IF NOT EXISTS idx_analytics_jobs_queue ON analytics_jobs(status, priority DESC, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_analytics_jobs_expires_at ON analytics_jobs(expires_at);